@@ -0,0 +1,468 @@
+import asyncio
+import functools
+import json
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .circuit import CircuitBreaker
+from .jsonstream import JsonArrayStream
+from .uploads import MultipartBody
+
+# Número de registos pedidos por página nas listagens paginadas
+PAGE_SIZE = 200
+# Tamanho dos blocos lidos da rede ao descodificar uma listagem em streaming
+CHUNK_SIZE = 16 * 1024
+# Limites de tempo (em segundos) de todos os pedidos: para estabelecer a ligação
+# e, por omissão, para esperar por dados (entre blocos da resposta, não no total)
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 15
+# GET (idempotentes): tentativas e espera antes da primeira repetição
+GET_ATTEMPTS = 3
+GET_RETRY_DELAY = 0.5
+# Tentativas de upload de uma foto, espera (em segundos) antes da primeira repetição e limite de leitura
+UPLOAD_ATTEMPTS = 3
+UPLOAD_RETRY_DELAY = 2
+UPLOAD_READ_TIMEOUT = 60
+# Pedidos da convocatória: limite de leitura (em segundos), tentativas e espera antes da primeira repetição
+CONVOCATION_TIMEOUT = 10
+CONVOCATION_ATTEMPTS = 3
+CONVOCATION_RETRY_DELAY = 1
+
+
+class ApiError(Exception):
+    """
+    Erro devolvido pelo backend quando o status HTTP não é o esperado.
+    Guarda o status, o campo "detail" (se existir) e o corpo da resposta.
+    """
+
+    def __init__(self, status_code, detail=None, text=""):
+        super().__init__(detail or f"HTTP {status_code}")
+        self.status_code = status_code
+        self.detail = detail
+        self.text = text
+
+
+class CircuitOpenError(ApiError):
+    """O pedido não chegou a ser feito: o backend está a falhar e o circuit breaker está aberto."""
+
+    def __init__(self):
+        super().__init__(503, "Servidor indisponível. Tente novamente dentro de momentos.")
+
+
+def backoff(delay):
+    """Espera antes de uma repetição: metade de `delay` mais uma parte aleatória, para os pedidos não se repetirem em sincronia."""
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class ApiClient:
+    """
+    Cliente HTTP partilhado por todos os ecrãs da aplicação.
+
+    Usa uma única requests.Session com um pool de ligações keep-alive, de modo
+    que os pedidos reutilizam a mesma ligação TCP/TLS ao backend em vez de
+    abrirem uma nova a cada chamada. O cabeçalho Authorization é injetado uma
+    única vez na sessão, em set_token.
+
+    Os métodos por endpoint são corrotinas: o pedido bloqueante (e a
+    descodificação do JSON) corre num pool de threads, para que os handlers
+    da interface façam `await` sem congelar a thread da GUI.
+
+    Se tiver um ResponseCache, os GET de listagens são condicionais
+    (If-None-Match / If-Modified-Since) e um 304 é servido a partir do cache.
+
+    Todos os pedidos têm limites de ligação e de leitura (CONNECT_TIMEOUT e o
+    limite de leitura de cada endpoint), os GET são repetidos com espera
+    exponencial com jitter e as falhas seguidas abrem o circuit breaker:
+    enquanto estiver aberto os pedidos falham logo (CircuitOpenError) e as
+    listagens que estiverem no cache são servidas a partir dele.
+
+    O requests (com o urllib3 e o charset_normalizer) só é importado quando a
+    sessão é criada, no primeiro pedido, numa thread do pool: o arranque da
+    aplicação não paga esse import.
+    """
+
+    def __init__(self, base_url, pool_size=4, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.token = None
+        self.cache = cache
+        # Âmbito das entradas do cache (o utilizador autenticado), para que
+        # utilizadores diferentes no mesmo dispositivo não partilhem respostas
+        self.cache_scope = ""
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.breaker = CircuitBreaker()
+        # Uma thread por ligação do pool
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="api")
+
+    @property
+    def session(self):
+        """requests.Session partilhada, criada (e o requests importado) na primeira utilização."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    if self.token:
+                        session.headers["Authorization"] = f"Bearer {self.token}"
+                    self._session = session
+        return self._session
+
+    def set_token(self, token):
+        self.token = token
+        if self._session is None:
+            return  # a sessão recebe o token quando for criada
+        if token:
+            self._session.headers["Authorization"] = f"Bearer {token}"
+        else:
+            self._session.headers.pop("Authorization", None)
+
+    async def warm_up(self):
+        """
+        Abre uma ligação ao backend para que o handshake TLS já esteja feito
+        quando o utilizador carregar em "Entrar".
+        """
+        try:
+            # A sessão é criada na thread do pool: o import do requests fica fora da thread da interface
+            # Qualquer resposta abaixo de 500 serve: só interessa a ligação
+            await self._call(self._request, "HEAD", "", expected=range(100, 500))
+        except Exception as e:
+            print("Erro ao pré-aquecer a ligação:", e)
+
+    # ---------------------------
+    # Núcleo dos pedidos
+    # ---------------------------
+    def _request(self, method, path, expected=(200,), timeout=READ_TIMEOUT, **kwargs):
+        """
+        Pedido ao backend com limites de ligação e de leitura (`timeout`), registado
+        no circuit breaker. `path` é relativo a base_url ou um URL absoluto (fotos).
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError()
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+        try:
+            response = self.session.request(method, url, timeout=(CONNECT_TIMEOUT, timeout), **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if response.status_code not in expected:
+            try:
+                detail = response.json().get("detail")
+            except (ValueError, AttributeError):
+                detail = None
+            raise ApiError(response.status_code, detail, response.text)
+        return response
+
+    def _fetch_json(self, method, path, expected=(200,), **kwargs):
+        return self._request(method, path, expected, **kwargs).json()
+
+    def _conditional_get(self, path, params=None, stream=False):
+        """
+        GET com revalidação: envia os validadores guardados no cache.
+        Devolve (response, chave do cache, entrada do cache); a entrada é a
+        resposta a usar quando o servidor responde 304. Se o pedido falhar com
+        o circuit breaker aberto, a entrada é servida tal como está e response
+        é None.
+        """
+        if self.cache is None:
+            return self._request("GET", path, params=params, stream=stream), None, None
+
+        key = self.cache.make_key(self.cache_scope, path, params)
+        cached = self.cache.get(key)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        expected = (200, 304) if headers else (200,)
+        try:
+            response = self._request("GET", path, expected, params=params, headers=headers, stream=stream)
+        except Exception:
+            if cached is not None and self.breaker.is_open:
+                print("Servidor indisponível, a usar a resposta guardada:", path)
+                return None, key, cached
+            raise
+        return response, key, cached
+
+    def _get_json(self, path, params=None):
+        """GET com revalidação: trata o 304 como leitura local do cache."""
+        response, key, cached = self._conditional_get(path, params)
+        if key is None:
+            return response.json()
+        if response is None:
+            return json.loads(cached.body)
+        if response.status_code == 304:
+            self.cache.touch(key)
+            return json.loads(cached.body)
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.cache.put(key, response.content, etag, last_modified)
+        return response.json()
+
+    async def _call(self, fn, *args, **kwargs):
+        """Executa uma função bloqueante no pool de threads do cliente."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def _call_with_retries(self, fn, *args, retry_on=None, attempts=CONVOCATION_ATTEMPTS,
+                                 delay=CONVOCATION_RETRY_DELAY, **kwargs):
+        """
+        Como _call, mas repete (com espera exponencial com jitter) as falhas
+        transitórias: as exceções em retry_on (por omissão, qualquer falha de
+        rede) e os erros 5xx. Os restantes erros sobem de imediato, tal como o
+        CircuitOpenError (repetir só adiaria a mesma recusa).
+        """
+        import requests
+
+        retry_on = retry_on or (requests.RequestException,)
+        for attempt in range(1, attempts + 1):
+            try:
+                return await self._call(fn, *args, **kwargs)
+            except (ApiError, requests.RequestException) as e:
+                if isinstance(e, ApiError):
+                    retryable = e.status_code >= 500 and not isinstance(e, CircuitOpenError)
+                else:
+                    retryable = isinstance(e, retry_on)
+                if not retryable or attempt == attempts:
+                    raise
+                print(f"Falha no pedido (tentativa {attempt}):", e)
+                await asyncio.sleep(backoff(delay))
+                delay *= 2
+
+    async def _iter_pages(self, path, params=None, page_size=PAGE_SIZE):
+        """
+        Percorre uma listagem página a página com `limit` + `cursor`.
+
+        O backend pode responder com {"items": [...], "next_cursor": ...} ou com uma
+        lista simples. Uma lista mais curta do que `limit` é a última (ou a única)
+        página; uma lista com exatamente `limit` registos pode ter sido cortada,
+        por isso pede-se a seguinte com `offset`. Se o servidor ignorar o offset e
+        repetir a mesma lista, a listagem termina aí. Cada página é um GET
+        próprio, logo fica em cache separadamente.
+
+        O corpo é lido em streaming e descodificado elemento a elemento: cada
+        lote de registos completos é entregue assim que chega da rede, em vez
+        de esperar pelo fim do download e pelo response.json() do corpo inteiro.
+
+        O pedido de cada página é repetido em falhas transitórias; uma falha a
+        meio do corpo já não (as primeiras linhas já foram entregues).
+        """
+        params = dict(params or {}, limit=page_size)
+        offset = 0
+        previous_first = None
+        while True:
+            response, key, cached = await self._call_with_retries(
+                self._conditional_get, path, params, stream=True, attempts=GET_ATTEMPTS, delay=GET_RETRY_DELAY
+            )
+            listing = JsonArrayStream()
+            body = None
+            if response is None:
+                # Circuit breaker aberto: a página vem do cache, sem revalidação
+                chunks = iter((cached.body,))
+            elif response.status_code == 304:
+                response.close()
+                await self._call(self.cache.touch, key)
+                chunks = iter((cached.body,))
+            else:
+                chunks = response.iter_content(CHUNK_SIZE)
+                validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                if key is not None and any(validators):
+                    # Só se guarda uma cópia dos bytes se a resposta for para o cache
+                    body = bytearray()
+            count = 0
+            first = None
+            try:
+                while True:
+                    chunk = await self._call(next, chunks, None)
+                    if chunk is None:
+                        items = listing.close()
+                    else:
+                        if body is not None:
+                            body += chunk
+                        items = listing.feed(chunk)
+                    if items:
+                        if not count and offset and listing.is_list and items[0] == previous_first:
+                            # O servidor não pagina: devolveu outra vez a lista que já foi entregue
+                            return
+                        first = first if count else items[0]
+                        count += len(items)
+                        yield items
+                    if chunk is None:
+                        break
+            finally:
+                if response is not None:
+                    response.close()
+            if body is not None:
+                await self._call(self.cache.put, key, bytes(body), *validators)
+
+            if listing.is_list:
+                if count < page_size:
+                    return
+                offset += count
+                previous_first = first
+                params = dict(params, offset=offset)
+                continue
+            cursor = listing.meta.get("next_cursor")
+            if not cursor:
+                return
+            params = dict(params, cursor=cursor)
+
+    def _download(self, url):
+        return self._request("GET", url).content
+
+    async def download(self, url):
+        """GET de um URL absoluto (p.ex. uma foto) pela mesma sessão -> bytes do corpo."""
+        return await self._call_with_retries(self._download, url, attempts=GET_ATTEMPTS, delay=GET_RETRY_DELAY)
+
+    @staticmethod
+    def _filter_params(escalao=None, clube=None):
+        """Converte os filtros da interface em parâmetros de query ("Todos" não filtra)."""
+        params = {}
+        if escalao and escalao != "Todos":
+            params["escalao"] = escalao
+        if clube and clube != "Todos":
+            params["clube"] = clube
+        return params
+
+    # ---------------------------
+    # Autenticação
+    # ---------------------------
+    async def login(self, username, password):
+        """POST /api/auth/login; guarda e devolve o access_token (ou None)."""
+        payload = {"username": username, "password": password}
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        data = await self._call(
+            self._fetch_json, "POST", "/api/auth/login", data=payload, headers=headers
+        )
+        token = data.get("access_token")
+        self.set_token(token)
+        return token
+
+    async def refresh_token(self):
+        """POST /api/auth/refresh com o token atual; guarda e devolve o novo access_token."""
+        data = await self._call(self._fetch_json, "POST", "/api/auth/refresh")
+        token = data.get("access_token")
+        if token:
+            self.set_token(token)
+        return token
+
+    async def get_me(self):
+        """GET /api/auth/me -> dicionário com o perfil do utilizador."""
+        return await self._call_with_retries(
+            self._fetch_json, "GET", "/api/auth/me", attempts=GET_ATTEMPTS, delay=GET_RETRY_DELAY
+        )
+
+    # ---------------------------
+    # Jogadores
+    # ---------------------------
+    def iter_players(self, escalao=None, clube=None):
+        """GET /api/jogadores, filtrado no servidor e paginado -> páginas de dicionários."""
+        return self._iter_pages("/api/jogadores", self._filter_params(escalao, clube))
+
+    async def create_player(self, payload):
+        """POST /api/jogadores -> dicionário do jogador criado."""
+        return await self._call(
+            self._fetch_json, "POST", "/api/jogadores", expected=(200, 201), json=payload
+        )
+
+    async def upload_player_photo(self, jogador_id, data, filename="foto.jpg",
+                                  content_type="image/jpeg", progress=None):
+        """
+        POST /api/jogadores/{id}/upload-foto com os bytes da foto, em streaming.
+        Devolve a resposta do servidor (vazia se o backend não devolver corpo).
+
+        progress(enviados, total) é chamado a partir da thread do pedido. Falhas
+        de rede e erros 5xx são repetidos (com espera crescente) sem criar de
+        novo o jogador; outros erros sobem de imediato como ApiError.
+        """
+        import requests
+
+        body = MultipartBody("file", filename, content_type, data, progress)
+        delay = UPLOAD_RETRY_DELAY
+        for attempt in range(1, UPLOAD_ATTEMPTS + 1):
+            body.rewind()
+            try:
+                response = await self._call(
+                    self._request, "POST", f"/api/jogadores/{jogador_id}/upload-foto",
+                    expected=(200, 201), data=body, timeout=UPLOAD_READ_TIMEOUT,
+                    headers={"Content-Type": body.content_type, "Content-Length": str(len(body))}
+                )
+                return response.json() if response.content else {}
+            except (ApiError, requests.RequestException) as e:
+                retryable = not isinstance(e, ApiError) or (e.status_code >= 500 and not isinstance(e, CircuitOpenError))
+                if not retryable or attempt == UPLOAD_ATTEMPTS:
+                    raise
+                print(f"Falha no upload da foto (tentativa {attempt}):", e)
+                await asyncio.sleep(backoff(delay))
+                delay *= 2
+
+    async def delete_player(self, jogador_id):
+        """DELETE /api/jogadores/{id}."""
+        await self._call(self._request, "DELETE", f"/api/jogadores/{jogador_id}", expected=(200, 204))
+
+    # ---------------------------
+    # Jogos
+    # ---------------------------
+    def iter_games(self, escalao=None, clube=None):
+        """GET /api/jogos, filtrado no servidor e paginado -> páginas de dicionários."""
+        return self._iter_pages("/api/jogos", self._filter_params(escalao, clube))
+
+    async def create_game(self, payload):
+        """POST /api/jogos -> dicionário do jogo criado (vazio se o backend não devolver corpo)."""
+        response = await self._call(self._request, "POST", "/api/jogos", expected=(200, 201), json=payload)
+        return response.json() if response.content else {}
+
+    async def delete_game(self, jogo_id):
+        """DELETE /api/jogos/{id}."""
+        await self._call(self._request, "DELETE", f"/api/jogos/{jogo_id}", expected=(200, 204))
+
+    async def set_game_state(self, jogo_id, estado):
+        """PATCH /api/jogos/{id}/estado com o novo estado (string JSON). Idempotente: é repetido em falhas transitórias."""
+        await self._call_with_retries(
+            self._request, "PATCH", f"/api/jogos/{jogo_id}/estado",
+            expected=(200, 204), json=estado, timeout=CONVOCATION_TIMEOUT
+        )
+
+    # ---------------------------
+    # Convocatórias
+    # ---------------------------
+    async def list_convocados(self, jogo_id):
+        """GET /api/convocados/detalhes/{jogo_id} -> lista de dicionários de jogadores."""
+        return await self._call_with_retries(
+            self._get_json, f"/api/convocados/detalhes/{jogo_id}", attempts=GET_ATTEMPTS, delay=GET_RETRY_DELAY
+        )
+
+    async def add_convocados(self, jogo_id, jogador_ids):
+        """
+        POST /api/convocados/{jogo_id} com os ids a convocar. Falhas de ligação e
+        erros 5xx são repetidos; um timeout à espera da resposta não, porque o
+        pedido pode já ter sido aceite e o POST repetido voltaria a convocar.
+        """
+        import requests
+
+        await self._call_with_retries(
+            self._request, "POST", f"/api/convocados/{jogo_id}",
+            expected=(200, 201), json={"jogadores": list(jogador_ids)},
+            timeout=CONVOCATION_TIMEOUT, retry_on=(requests.ConnectionError,)
+        )
+
+    async def remove_convocados(self, jogo_id, jogador_ids):
+        """DELETE /api/convocados/remover-varios/{jogo_id} com os ids a remover (repetido em falhas transitórias)."""
+        await self._call_with_retries(
+            self._request, "DELETE", f"/api/convocados/remover-varios/{jogo_id}",
+            expected=(200, 204), json={"jogadores": list(jogador_ids)}, timeout=CONVOCATION_TIMEOUT
+        )
@@ -1,50 +1,39 @@
+import time
+
+# Início da fase "imports" do arranque (ver StartupTimer)
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import math
 import os
+
 import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW, CENTER
-import requests
-
-
-# Classe auxiliar que representa um jogador, incluindo estatísticas.
-class Player:
-    def __init__(
-        self,
-        id,
-        nome,
-        numero,
-        posicao,
-        escalao,
-        clube,
-        foto=None,
-        golosMarcados=0,
-        assistencias=0,
-        TTU=0,
-        jogosParticipados=0,
-        CA=0,
-        CV=0,
-    ):
-        self.id = id
-        self.nome = nome
-        self.numero = numero
-        self.posicao = posicao
-        self.escalao = escalao
-        self.clube = clube
-        self.foto = foto
-        self.golosMarcados = golosMarcados
-        self.assistencias = assistencias
-        self.TTU = TTU
-        self.jogosParticipados = jogosParticipados
-        self.CA = CA
-        self.CV = CV
-
-    def __str__(self):
-        return f"{self.numero} - {self.nome}"
-
-    def __repr__(self):
-        return self.__str__()
+
+from .api import ApiClient, ApiError
+from .cache import ResponseCache
+from .credentials import REFRESH_MARGIN, SessionStore, system_vault, token_expiry
+from .models import Player
+from .outbox import OPERATION_LABELS, Outbox
+from .prefetch import Prefetcher
+from .screens import ScreenManager
+from .settings import Settings
+from .stats import LEADERBOARD_METRICS, METRICS
+from .store import GamesStore, RosterStore
+from .tables import PagedTableView, TableBinding
+from .thumbnails import ThumbnailCache
+from .timings import StartupTimer
+from .uploads import prepare_photo
+
+# Mensagem quando os dados de um ecrã não chegam dentro do tempo máximo configurado
+LOAD_TIMEOUT_MESSAGE = "O servidor está a demorar a responder. Tente novamente dentro de momentos."
+
 
 class TeamTrackerMobile(toga.App):
     def __init__(self, *args, **kwargs):
+        self.startup_timer = StartupTimer(_IMPORT_STARTED)
+        self.startup_timer.mark("imports")
         # Inicializa a aplicação com o nome formal e o app_id.
         super().__init__(
             formal_name="Team Tracker Mobile",
@@ -55,23 +44,121 @@ class TeamTrackerMobile(toga.App):
         self.token = None
         self.user_info = None
         self.api_url = "https://teamtracker-production.up.railway.app"
+        # Cliente HTTP único (pool de ligações keep-alive) usado por todos os ecrãs
+        self.api = ApiClient(self.api_url)
+        # Plantel partilhado pelos ecrãs de Jogadores, Estatísticas e convocatória
+        self.roster = RosterStore(self.api)
          # Inicializa as seleções para os Jogadores 
         self.players = []
+        self.players_by_id = {}
         self.selected_player = None
         self.last_selected_player=None
+        self.selected_player_row = None
         # Inicializa as seleções para os jogos
-        self.games = []
+        self.games_store = GamesStore(self.api)
         self.jogo_selecionado = None
         self.last_selected_jogo = None
+        self.selected_game_row = None
+        # Diário das alterações por enviar (criado no startup) e ciclo de envio
+        self.outbox = None
+        self.outbox_task = None
+        # Segunda fase do arranque (recursos carregados depois da janela de login)
+        self.deferred_startup = None
+        # Sessão guardada no dispositivo, revalidação em segundo plano e renovação do token
+        self.session_store = None
+        # True enquanto o ecrã de espera aguarda a leitura da sessão guardada
+        self.awaiting_session = False
+        self.username = None
+        self.main_window_open = False
+        self.logo = None
+        self.logo_failed = False
+        self.revalidate_task = None
+        self.refresh_task = None
+        # Preferências guardadas no dispositivo e pré-carregamento dos ecrãs principais
+        self.settings = None
+        self.prefetcher = Prefetcher()
+        # Ecrãs e janelas já construídos, reutilizados entre aberturas
+        self.screen_manager = ScreenManager()
+        self.main_screen = None
 
     def startup(self):
-        # Inicia a aplicação exibindo a tela de login.
-        self.show_login_screen()
+        self.startup_timer.mark("aplicação")
+        # Com uma sessão guardada mostra-se logo um ecrã de espera, que dá lugar à
+        # página inicial (sem login nem /me) quando a sessão for lida; caso
+        # contrário, a tela de login. O resto é carregado depois de a janela aparecer
+        self.paths.data.mkdir(parents=True, exist_ok=True)
+        self.settings = Settings(self.paths.config / "preferencias.json")
+        # O cofre de credenciais é resolvido em finish_startup, fora da thread da interface
+        self.session_store = SessionStore(self.paths.data / "sessao.json")
+        if self.session_store.path.exists():
+            self.awaiting_session = True
+            self.show_session_placeholder()
+            self.startup_timer.mark("janela (sessão guardada)")
+        else:
+            self.show_login_screen()
+            self.startup_timer.mark("janela de login")
+        self.deferred_startup = self.loop.create_task(self.finish_startup())
+
+    async def finish_startup(self):
+        """
+        Segunda fase do arranque, já com a janela de login no ecrã: liga ao
+        backend, abre os caches e o diário de alterações e carrega o logótipo.
+        No fim publica o tempo de cada fase.
+        """
+        # Abre a ligação ao backend enquanto o utilizador preenche o login
+        self.loop.create_task(self.api.warm_up())
+        await self.restore_session()
+        # Cache local (SQLite) das respostas da API, revalidado com ETag / If-Modified-Since
+        self.paths.cache.mkdir(parents=True, exist_ok=True)
+        self.api.cache = ResponseCache(self.paths.cache / "respostas.sqlite3")
+        # Miniaturas das fotos, partilhadas pelas tabelas de jogadores
+        self.thumbnails = ThumbnailCache(self.api, self.paths.cache / "miniaturas")
+        self.thumbnails.add_listener(self.refresh_photo_cells)
+        # Alterações feitas sem ligação ficam guardadas até poderem ser enviadas
+        self.outbox = Outbox(self.paths.data / "pendentes.sqlite3", user=self.username or "")
+        self.pending_photos_dir = self.paths.data / "fotos_pendentes"
+        self.pending_photos_dir.mkdir(exist_ok=True)
+        if self.user_info is not None:
+            # Sessão retomada: a página inicial já está no ecrã à espera do diário
+            self.start_outbox()
+        self.startup_timer.mark("caches e diário")
+        await self.load_logo()
+        self.startup_timer.mark("logótipo")
+        print(self.startup_timer.summary())
+
+    async def load_logo(self):
+        """Lê o logótipo numa thread e coloca-o no lugar reservado na janela de login."""
+        image_path = os.path.join(os.path.dirname(__file__), "resources", "logo.png")
+        placeholder = getattr(self, "logo_view", None)
+        try:
+            with open(image_path, "rb") as f:
+                data = await self.loop.run_in_executor(None, f.read)
+            self.logo = toga.Image(data)
+            if placeholder is not None:
+                placeholder.image = self.logo
+        except Exception as e:
+            print("Erro ao carregar a imagem:", e)
+            self.logo_failed = True
+            parent = placeholder.parent if placeholder is not None else None
+            if parent is not None:
+                parent.insert(parent.children.index(placeholder),
+                              toga.Label("Logo não encontrada", style=Pack(padding_bottom=20)))
+                parent.remove(placeholder)
 
     # ---------------------------
     # Telas de Login e Home
     # ---------------------------
+    def show_session_placeholder(self):
+        """Ecrã de espera do arranque com sessão guardada, até ela ser lida (ver restore_session)."""
+        box = toga.Box(style=Pack(direction=COLUMN, alignment=CENTER, padding=20, background_color="#e5e7eb"))
+        box.add(toga.Label("A abrir sessão...", style=Pack(padding_top=40, text_align=CENTER)))
+        self.show_main_content(box)
+
     def show_login_screen(self):
+        # O login não fica em cache; o ecrã que estava à vista pode ser descartado
+        if self.main_screen is not None:
+            self.screen_manager.hidden(self.main_screen)
+            self.main_screen = None
         main_box = toga.Box(
             style=Pack(
                 direction=COLUMN,
@@ -81,16 +168,11 @@ class TeamTrackerMobile(toga.App):
             )
         )
 
-        image_path = os.path.join(os.path.dirname(__file__), "resources", "logo.png")
-        try:
-            logo = toga.Image(image_path)
-            logo_view = toga.ImageView(
-                logo,
-                style=Pack(width=128, height=128, padding_bottom=20)
-            )
-        except Exception as e:
-            logo_view = toga.Label("Logo não encontrada", style=Pack(padding_bottom=20))
-            print("Erro ao carregar a imagem:", e)
+        # Lugar do logótipo: a imagem só é lida e descodificada depois de a janela aparecer
+        if self.logo_failed:
+            self.logo_view = toga.Label("Logo não encontrada", style=Pack(padding_bottom=20))
+        else:
+            self.logo_view = toga.ImageView(self.logo, style=Pack(width=128, height=128, padding_bottom=20))
 
         login_box = toga.Box(
             style=Pack(
@@ -124,17 +206,59 @@ class TeamTrackerMobile(toga.App):
             style=Pack(width=200, padding_top=10)
         )
         login_box.add(welcome_label)
-        login_box.add(logo_view)
+        login_box.add(self.logo_view)
         login_box.add(self.username_input)
         login_box.add(self.password_input)
         login_box.add(login_button)
         main_box.add(login_box)
 
-        self.main_window = toga.MainWindow(title=self.formal_name)
-        self.main_window.content = main_box
-        self.main_window.show()
+        self.show_main_content(main_box)
 
-    def do_login(self, widget):
+    # ---------------------------
+    # Ecrãs reutilizados (ver ScreenManager)
+    # ---------------------------
+    def show_screen(self, name, build, cost=1, release=None):
+        """Mostra na janela principal o ecrã `name`, construído só na primeira vez."""
+        content = self.screen_manager.get(name, build, cost, release)
+        if self.main_screen not in (None, name):
+            self.screen_manager.hidden(self.main_screen)
+        self.main_screen = name
+        self.show_main_content(content)
+        return content
+
+    def show_window(self, name, build, cost=1, release=None):
+        """Mostra a janela `name`, construída só na primeira vez; fechá-la apenas a esconde."""
+        window = self.screen_manager.get(name, build, cost, release)
+        window.on_close = lambda widget, **kwargs: self.hide_window(name)
+        window.show()
+        return window
+
+    def hide_window(self, name):
+        """Esconde a janela `name` (continua em cache para a próxima abertura). Devolve False para o toga não a fechar."""
+        if name in self.screen_manager:
+            self.screen_manager[name].hide()
+            self.screen_manager.hidden(name)
+        return False
+
+    async def within_load_ceiling(self, awaitable):
+        """
+        Espera pelos dados de um ecrã no máximo "tempo_maximo_carregamento"
+        segundos (preferências); depois disso o carregamento é cancelado e sobe
+        asyncio.TimeoutError. As páginas já apresentadas ficam no ecrã.
+        """
+        return await asyncio.wait_for(awaitable, self.settings.get("tempo_maximo_carregamento"))
+
+    def show_main_content(self, content):
+        """Mostra `content` na janela principal, criada (e mostrada) na primeira vez."""
+        if not self.main_window_open:
+            self.main_window = toga.MainWindow(title=self.formal_name)
+            self.main_window_open = True
+            self.main_window.content = content
+            self.main_window.show()
+        else:
+            self.main_window.content = content
+
+    async def do_login(self, widget):
         username = self.username_input.value
         password = self.password_input.value
 
@@ -142,38 +266,49 @@ class TeamTrackerMobile(toga.App):
             self.main_window.error_dialog("Erro", "Preencha usuário e senha.")
             return
 
+        # Evita submissões repetidas enquanto o pedido está em curso
+        widget.enabled = False
         try:
-            login_endpoint = f"{self.api_url}/api/auth/login"
-            payload = {"username": username, "password": password}
-            headers = {"Content-Type": "application/x-www-form-urlencoded"}
-            response = requests.post(login_endpoint, data=payload, headers=headers)
-            if response.status_code == 200:
-                data = response.json()
-                self.token = data.get("access_token")
-                if self.token:
-                    self.get_user_info()
-                else:
-                    self.main_window.error_dialog("Erro", "Token não recebido.")
+            # O diário de alterações é aberto na segunda fase do arranque
+            await self.deferred_startup
+            self.token = await self.api.login(username, password)
+            self.username = username
+            self.api.cache_scope = username
+            self.outbox.user = username
+            if self.token:
+                await self.get_user_info()
             else:
-                error_message = response.json().get("detail", "Usuário ou senha inválidos.")
-                self.main_window.error_dialog("Erro", error_message)
+                self.main_window.error_dialog("Erro", "Token não recebido.")
+        except ApiError as e:
+            self.main_window.error_dialog("Erro", e.detail or "Usuário ou senha inválidos.")
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
+        finally:
+            widget.enabled = True
 
-    def get_user_info(self):
+    async def get_user_info(self):
         try:
-            endpoint = f"{self.api_url}/api/auth/me"
-            headers = {"Authorization": f"Bearer {self.token}"}
-            response = requests.get(endpoint, headers=headers)
-            if response.status_code == 200:
-                self.user_info = response.json()
-                self.show_homepage()
-            else:
-                self.main_window.error_dialog("Erro", "Não foi possível recuperar as informações do usuário.")
+            self.user_info = await self.api.get_me()
+            self.save_session()
+            self.schedule_token_refresh()
+            self.show_homepage()
+        except ApiError:
+            self.main_window.error_dialog("Erro", "Não foi possível recuperar as informações do usuário.")
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
 
     def show_homepage(self):
+        self.show_screen("inicio", self.build_homepage)
+        # Religa o ecrã guardado ao utilizador e às preferências atuais
+        self.user_label.text = self.user_info_text()
+        if self.data_saver_switch.value != self.settings.get("poupanca_dados"):
+            self.data_saver_switch.value = self.settings.get("poupanca_dados")
+        # Com a sessão retomada no arranque, o diário só abre na segunda fase (finish_startup)
+        if self.outbox is not None:
+            self.start_outbox()
+        self.start_prefetch()
+
+    def build_homepage(self):
         main_box = toga.Box(
             style=Pack(
                 direction=COLUMN,
@@ -182,14 +317,8 @@ class TeamTrackerMobile(toga.App):
                 background_color="#e5e7eb"
             )
         )
-        user_info_text = "Usuário: {}\nCargo: {}\nClube: {}\nEscalão: {}".format(
-            self.user_info.get("username", "N/A"),
-            self.user_info.get("cargo", "N/A"),
-            self.user_info.get("clube", "N/A"),
-            self.user_info.get("escalao", "N/A")
-        )
-        user_label = toga.Label(user_info_text, style=Pack(padding_bottom=20, text_align="left"))
-        main_box.add(user_label)
+        self.user_label = toga.Label("", style=Pack(padding_bottom=20, text_align="left"))
+        main_box.add(self.user_label)
 
         btn_jogadores = toga.Button("Jogadores", on_press=self.show_jogadores, style=Pack(width=200, padding=10))
         btn_jogos = toga.Button("Jogos", on_press=self.show_jogos, style=Pack(width=200, padding=10))
@@ -197,13 +326,289 @@ class TeamTrackerMobile(toga.App):
         main_box.add(btn_jogadores)
         main_box.add(btn_jogos)
         main_box.add(btn_estatisticas)
+        btn_sair = toga.Button("Terminar sessão", on_press=self.logout, style=Pack(width=200, padding=10))
+        main_box.add(btn_sair)
+        self.data_saver_switch = toga.Switch(
+            "Poupar dados",
+            value=self.settings.get("poupanca_dados"),
+            on_change=self.on_toggle_data_saver,
+            style=Pack(padding_top=10)
+        )
+        main_box.add(self.data_saver_switch)
+
+        # Estado das alterações guardadas no dispositivo e ainda não enviadas
+        self.sync_status = toga.Label("", style=Pack(padding_top=20))
+        main_box.add(self.sync_status)
+        return main_box
+
+    def user_info_text(self):
+        return "Usuário: {}\nCargo: {}\nClube: {}\nEscalão: {}".format(
+            self.user_info.get("username", "N/A"),
+            self.user_info.get("cargo", "N/A"),
+            self.user_info.get("clube", "N/A"),
+            self.user_info.get("escalao", "N/A")
+        )
+
+    # ---------------------------
+    # Pré-carregamento em segundo plano
+    # ---------------------------
+    def start_prefetch(self):
+        """
+        Descarrega o plantel e os jogos do âmbito do utilizador enquanto a página
+        inicial está aberta, para que Jogadores, Jogos e Estatísticas abram com
+        dados já em memória. Não corre com a poupança de dados ligada.
+        """
+        if self.settings.get("poupanca_dados"):
+            return
+        escalao = self.user_info.get("escalao", "Todos")
+        clube = self.user_info.get("clube", "Todos")
+        self.prefetcher.start([
+            lambda: self.roster.get(escalao, clube),
+            lambda: self.games_store.get(escalao, clube),
+        ])
+
+    def on_toggle_data_saver(self, widget):
+        self.settings.set("poupanca_dados", widget.value)
+        if widget.value:
+            self.prefetcher.cancel()
+        else:
+            self.start_prefetch()
+
+    # ---------------------------
+    # Sessão guardada no dispositivo
+    # ---------------------------
+    async def restore_session(self):
+        """
+        Liga o SessionStore ao cofre de credenciais e lê a sessão guardada, numa
+        thread: o cofre do sistema demora a abrir e pode ficar à espera de um
+        pedido de desbloqueio. Com sessão abre a página inicial; sem ela, a tela
+        de login (se ainda estiver o ecrã de espera).
+        """
+        self.session_store.vault = await self.loop.run_in_executor(None, system_vault)
+        saved = await self.loop.run_in_executor(None, self.session_store.load)
+        waiting, self.awaiting_session = self.awaiting_session, False
+        if saved is not None:
+            self.resume_session(saved)
+            self.startup_timer.mark("página inicial (sessão guardada)")
+        elif waiting:
+            self.show_login_screen()
+            self.startup_timer.mark("janela de login")
+
+    def save_session(self):
+        try:
+            self.session_store.save(self.token, self.username, self.user_info)
+        except OSError as e:
+            print("Não foi possível guardar a sessão:", e)
+
+    def resume_session(self, saved):
+        """Abre a página inicial com o token e o perfil guardados e revalida-os em segundo plano."""
+        self.token = saved["token"]
+        self.username = saved.get("username") or saved["user_info"].get("username", "")
+        self.user_info = saved["user_info"]
+        self.api.set_token(self.token)
+        self.api.cache_scope = self.username
+        self.show_homepage()
+        self.revalidate_task = self.loop.create_task(self.revalidate_session())
+        self.schedule_token_refresh()
+
+    async def revalidate_session(self):
+        """
+        Confirma o perfil guardado com /api/auth/me. Só um 401 (token recusado)
+        devolve o utilizador à tela de login; sem rede, a sessão guardada mantém-se.
+        """
+        try:
+            user_info = await self.api.get_me()
+        except ApiError as e:
+            if e.status_code == 401:
+                self.end_session("A sessão expirou. Inicie sessão novamente.")
+            else:
+                print("Não foi possível validar a sessão:", e)
+            return
+        except Exception as e:
+            print("Sem ligação para validar a sessão:", e)
+            return
+        if user_info != self.user_info:
+            # O perfil mudou no servidor (cargo, clube ou escalão)
+            self.user_info = user_info
+            self.save_session()
+            if getattr(self, "user_label", None) is not None:
+                self.user_label.text = self.user_info_text()
+
+    def schedule_token_refresh(self):
+        """Agenda a renovação do token antes de ele expirar (se o token indicar a expiração)."""
+        if self.refresh_task is not None:
+            self.refresh_task.cancel()
+            self.refresh_task = None
+        expiry = token_expiry(self.token)
+        if expiry is not None:
+            self.refresh_task = self.loop.create_task(self.refresh_token_at(expiry - REFRESH_MARGIN))
+
+    async def refresh_token_at(self, when):
+        """Renova o token no instante `when` (epoch), para que nenhum ecrã encontre o token expirado."""
+        await asyncio.sleep(max(0, when - time.time()))
+        while True:
+            try:
+                token = await self.api.refresh_token()
+            except ApiError as e:
+                if e.status_code == 401:
+                    self.end_session("A sessão expirou. Inicie sessão novamente.")
+                else:
+                    # Backend sem renovação: o token é usado até expirar
+                    print("Não foi possível renovar o token:", e)
+                return
+            except Exception as e:
+                print("Sem ligação para renovar o token:", e)
+                await asyncio.sleep(60)
+                continue
+            break
+        if token:
+            self.token = token
+            self.save_session()
+            self.refresh_task = None
+            self.schedule_token_refresh()
+
+    async def logout(self, widget):
+        self.end_session()
+
+    def end_session(self, message=None):
+        """Esquece a sessão (no dispositivo e em memória) e volta à tela de login."""
+        for task in (self.revalidate_task, self.refresh_task, self.outbox_task):
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+        self.revalidate_task = self.refresh_task = self.outbox_task = None
+        self.prefetcher.cancel()
+        self.session_store.clear()
+        self.token = None
+        self.user_info = None
+        self.api.set_token(None)
+        # Os dados em memória eram do utilizador anterior; as alterações por enviar ficam no diário
+        self.roster = RosterStore(self.api)
+        self.games_store = GamesStore(self.api)
+        # Os ecrãs guardados mostram dados e filtros do utilizador anterior
+        self.screen_manager.clear()
+        self.main_screen = None
+        self.show_login_screen()
+        if message:
+            self.main_window.info_dialog("Sessão", message)
+
+    # ---------------------------
+    # Alterações pendentes (envio com ou sem ligação)
+    # ---------------------------
+    def start_outbox(self):
+        """Aplica as alterações pendentes ao estado local e arranca o ciclo de envio."""
+        self.settle_local_state()
+        self.show_sync_status()
+        if self.outbox_task is None:
+            self.outbox_task = asyncio.ensure_future(
+                self.outbox.run(self.api, self.on_outbox_result, self.show_sync_progress)
+            )
 
-        self.main_window.content = main_box
+    async def submit(self, *operations, upload_progress=None, notify_offline=True):
+        """
+        Regista as operações (tipo, dados) no diário e tenta enviá-las já.
+        Sem ligação ficam guardadas e são enviadas mais tarde, em segundo plano
+        (com notify_offline, o utilizador é avisado disso).
+        Devolve True se tudo chegou ao servidor sem conflitos.
+        """
+        for tipo, dados in operations:
+            self.outbox.enqueue(tipo, dados)
+        result = await self.outbox.replay(self.api, self.show_sync_progress, upload_progress)
+        self.on_outbox_result(result)
+        if result.blocked and notify_offline:
+            self.main_window.info_dialog(
+                "Sem ligação",
+                "A alteração foi guardada no dispositivo e será enviada quando a ligação voltar."
+            )
+        return not result.blocked and not result.conflicts
+
+    def on_outbox_result(self, result):
+        # As respostas dos POST substituem os registos locais; o que foi recusado é desfeito
+        for op, entity in result.applied:
+            self.confirm_operation(op, entity)
+        for op, _ in result.conflicts:
+            self.rollback_operation(op)
+        if result.sent or result.conflicts:
+            self.settle_local_state()
+            self.redraw_games()
+            self.redraw_players()
+        self.show_sync_status()
+        if result.conflicts:
+            lines = [f"- {OPERATION_LABELS.get(op.tipo, op.tipo)}: {message}" for op, message in result.conflicts]
+            self.main_window.error_dialog(
+                "Erro", "Algumas alterações não puderam ser enviadas e foram descartadas:\n" + "\n".join(lines)
+            )
+
+    def confirm_operation(self, op, entity):
+        """Aplica aos repositórios a resposta do servidor a uma operação enviada."""
+        entity = entity if isinstance(entity, dict) else {}
+        if op.tipo == "create_game":
+            local_id = op.dados["local_id"]
+            if entity.get("id") is None:
+                self.games_store.confirm_created(local_id, None)
+            else:
+                # Campos que o servidor não devolva mantêm o valor local (p.ex. o estado)
+                local = self.games_store.by_id.get(local_id) or op.dados["payload"]
+                self.games_store.confirm_created(local_id, dict(local, **entity))
+        elif op.tipo == "create_player":
+            local_id = op.dados["local_id"]
+            if entity.get("id") is None:
+                self.roster.confirm_created(local_id, None)
+            else:
+                self.roster.confirm_created(local_id, Player.from_dict(dict(op.dados["payload"], **entity)))
+        elif op.tipo == "upload_photo":
+            player = self.roster.by_id.get(op.dados["jogador_id"])
+            if player is not None and entity.get("foto"):
+                self.thumbnails.invalidate(entity["foto"])
+                player.foto = entity["foto"]
+                self.roster.put_local(player)
+            else:
+                # Sem o caminho da foto na resposta, o próximo carregamento vai buscá-lo
+                self.roster.invalidate()
+
+    def rollback_operation(self, op):
+        """Desfaz no estado local uma alteração recusada pelo servidor."""
+        if op.tipo == "create_game":
+            self.games_store.rollback_created(op.dados["local_id"])
+        elif op.tipo == "create_player":
+            self.roster.rollback_created(op.dados["local_id"])
+        elif op.tipo == "delete_game":
+            self.games_store.rollback_deleted(op.dados["id"])
+        elif op.tipo == "delete_player":
+            self.roster.rollback_deleted(op.dados["id"])
+        elif op.tipo == "convocatoria" and op.dados.get("estado_anterior"):
+            jogo = self.games_store.by_id.get(op.dados["jogo_id"])
+            if jogo is not None:
+                jogo = dict(jogo, estado=op.dados["estado_anterior"])
+                self.games_store.put_local(jogo)
+                if self.jogo_selecionado and self.jogo_selecionado.get("id") == jogo.get("id"):
+                    self.jogo_selecionado = jogo
+
+    def settle_local_state(self):
+        """Indica aos repositórios quais as criações e remoções que ainda estão por enviar."""
+        self.games_store.settle_local(self.outbox.local_ids("create_game"), self.outbox.deleted_ids("delete_game"))
+        self.roster.settle_local(self.outbox.local_ids("create_player"), self.outbox.deleted_ids("delete_player"))
+
+    def show_sync_status(self):
+        if getattr(self, "sync_status", None) is None:
+            return
+        pending = len(self.outbox)
+        self.sync_status.text = f"{pending} alteração(ões) por enviar" if pending else ""
+
+    def show_sync_progress(self, sent, total):
+        if getattr(self, "sync_status", None) is not None:
+            self.sync_status.text = f"A enviar alterações... {sent}/{total}"
 
     # ---------------------------
     # Tela de Jogadores
     # ---------------------------
-    def show_jogadores(self, widget):
+    async def show_jogadores(self, widget):
+        self.show_screen("jogadores", self.build_jogadores, cost=2, release=self.release_jogadores)
+        await self.load_players()
+
+    def release_jogadores(self):
+        self.players_table = self.players_binding = self.players_view = None
+
+    def build_jogadores(self):
         # Cria a caixa principal para a tela de jogadores com fundo claro
         players_box = toga.Box(
             style=Pack(
@@ -222,7 +627,14 @@ class TeamTrackerMobile(toga.App):
             on_select=self.on_select_player,
             style=Pack(flex=1)
         )
+        self.players_binding = TableBinding(self.players_table)
+        self.players_view = PagedTableView(self.players_binding, self.player_row, on_render=self.find_selected_player_row)
         players_box.add(self.players_table)
+        players_box.add(self.players_view.controls)
+
+        # Indicador de carregamento, limpo quando os dados chegam
+        self.players_status = toga.Label("A carregar jogadores...", style=Pack(padding_top=5))
+        players_box.add(self.players_status)
 
         # Caixa para os botões (placeholders)
         buttons_box = toga.Box(
@@ -242,9 +654,7 @@ class TeamTrackerMobile(toga.App):
         buttons_box.add(btn_back)
         
         players_box.add(buttons_box)
-        
-        self.main_window.content = players_box
-        self.load_players()
+        return players_box
 
     def edit_player_placeholder(self, widget):
         if self.selected_player:
@@ -252,51 +662,68 @@ class TeamTrackerMobile(toga.App):
         else:
             self.main_window.error_dialog("Erro", "Nenhum jogador selecionado para editar.")
 
-    def load_players(self):
+    async def load_players(self, force=False):
+        self.players_status.text = "A carregar jogadores..."
         try:
-            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
-            response = requests.get(f"{self.api_url}/api/jogadores", headers=headers)
-            if response.status_code == 200:
-                players_data = response.json()
-                self.players = []
-                rows = []
-                for p in players_data:
-                    player = Player(
-                        id=p.get("id"),
-                        nome=p.get("nome"),
-                        numero=p.get("numero"),
-                        posicao=p.get("posicao"),
-                        escalao=p.get("escalao"),
-                        clube=p.get("clube"),
-                        foto=p.get("foto"),
-                        golosMarcados=p.get("golosMarcados", 0),
-                        assistencias=p.get("assistencias", 0),
-                        TTU=p.get("TTU", 0),
-                        jogosParticipados=p.get("jogosParticipados", 0),
-                        CA=p.get("CA", 0),
-                        CV=p.get("CV", 0)
-                    )
-                    self.players.append(player)
-                    
-                    # Verifica se há foto; se não, exibe "Sem foto"
-                    if player.foto:
-                        photo_view = "Foto"
-                    else:
-                        photo_view = "Sem foto"
-                    
-                    # Adiciona um marcador visual (→) para o jogador selecionado
-                    if self.selected_player and self.selected_player.id == player.id:
-                        marker = "→ "
-                        nome_str = marker + player.nome
-                    else:
-                        nome_str = player.nome
-                    
-                    rows.append([photo_view, str(player.numero), nome_str, player.posicao, player.escalao, player.clube])
-                self.players_table.data = rows
-            else:
-                self.main_window.error_dialog("Erro", "Não foi possível carregar os jogadores.")
+            # Pede ao servidor apenas o âmbito do utilizador, página a página
+            players = await self.within_load_ceiling(self.roster.get(
+                self.user_info.get("escalao", "Todos"),
+                self.user_info.get("clube", "Todos"),
+                force=force,
+                on_page=self.show_players_rows,
+            ))
+            self.show_players_rows(players)
+        except ApiError:
+            self.main_window.error_dialog("Erro", "Não foi possível carregar os jogadores.")
+        except asyncio.TimeoutError:
+            self.main_window.error_dialog("Erro", LOAD_TIMEOUT_MESSAGE)
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
+        finally:
+            self.players_status.text = ""
+
+    def redraw_players(self):
+        """Depois de uma alteração: redesenha a tabela a partir do repositório, sem novo download."""
+        if getattr(self, "players_view", None) is not None:
+            self.show_players_rows(self.roster.filter(
+                self.user_info.get("escalao", "Todos"), self.user_info.get("clube", "Todos")
+            ))
+
+    def show_players_rows(self, players):
+        self.players = players
+        self.players_by_id = self.roster.by_id
+        # Só as páginas visíveis são formatadas e enviadas para a tabela
+        self.players_view.set_items(self.players)
+
+    def find_selected_player_row(self):
+        """
+        Guarda a linha marcada para que a próxima seleção só redesenhe as duas
+        linhas afetadas. Chamado após cada desenho da tabela: ao mudar de página
+        a linha antiga pode ter saído (e a nova entrado já com o marcador).
+        """
+        self.selected_player_row = self.players_binding.row_for(self.selected_player.id) if self.selected_player else None
+
+    def refresh_photo_cells(self):
+        """Chegaram miniaturas novas: volta a desenhar as linhas visíveis das tabelas abertas."""
+        for view_name in ("players_view", "stats_view"):
+            view = getattr(self, view_name, None)
+            if view is not None and view.items:
+                view.render()
+        if getattr(self, "available_players", None) is not None:
+            self.refresh_jogo_planeado_tables()
+
+    def player_row(self, player):
+        # Miniatura da foto (ou "Foto"/"Sem foto" enquanto não houver)
+        photo_view = self.thumbnails.cell(player.foto)
+
+        # Adiciona um marcador visual (→) para o jogador selecionado
+        if self.selected_player and self.selected_player.id == player.id:
+            marker = "→ "
+            nome_str = marker + player.nome
+        else:
+            nome_str = player.nome
+
+        return player.id, [photo_view, str(player.numero), nome_str, player.posicao, player.escalao, player.clube]
 
     # ---------------------------
     # Método para capturar a seleção do jogador na tabela
@@ -304,7 +731,9 @@ class TeamTrackerMobile(toga.App):
     def on_select_player(self, widget):
         """
         Callback chamado quando uma linha da tabela for selecionada.
-        Obtém a seleção diretamente do widget, acessando os atributos do objeto Row.
+        Cada linha guarda o id do jogador, pelo que a procura é direta no índice
+        self.players_by_id. A seleção é uma alteração puramente local: não há
+        pedido à API e só as linhas antiga e nova são redesenhadas.
         """
         # Obter a seleção real do widget
         selected = self.players_table.selection
@@ -317,47 +746,44 @@ class TeamTrackerMobile(toga.App):
 
         print("Linha selecionada:", row)
 
-        try:
-            # Tenta acessar os atributos diretamente; note que alguns atributos podem ter nomes com acento.
-            # Use getattr para ser mais robusto, tentando "número" e, se não existir, "numero".
-            numero_str = getattr(row, "número", None) or getattr(row, "numero", None)
-            nome_str = getattr(row, "nome", None)
-
-            if not numero_str or not nome_str:
-                # Se os atributos não forem encontrados, tenta acessar via row.cells (caso exista)
-                if hasattr(row, "cells"):
-                    cells = row.cells
-                    numero_str = str(cells[1])
-                    nome_str = cells[2]
-                else:
-                    print("Não foi possível extrair 'número' ou 'nome' da linha.")
-                    return
-
-            # Procura o jogador correspondente na lista de jogadores usando os dados obtidos
-            self.selected_player = None
-            for player in self.players:
-                if str(player.numero) == str(numero_str) and player.nome == nome_str:
-                    self.selected_player = player
-                    self.last_selected_player = player
-                    print("Jogador selecionado:", player)
-                    break
-
-            if self.selected_player is None:
-                print("Nenhum jogador correspondente encontrado para Número:", numero_str, "e Nome:", nome_str)
+        self.selected_player = self.players_by_id.get(getattr(row, "id", None))
+        if self.selected_player is None:
+            print("Nenhum jogador correspondente encontrado para a linha:", row)
+        else:
+            self.last_selected_player = self.selected_player
+            print("Jogador selecionado:", self.selected_player)
 
-            # Atualiza a tabela para refletir alterações visuais, como um marcador na linha selecionada
-            self.load_players()
+        # Move o marcador visual (→) apenas nas linhas afetadas
+        self.mark_selected_player_row(row if self.selected_player else None)
 
-        except Exception as e:
-            print("Erro ao processar a seleção:", e)
-            self.selected_player = None
+    def mark_selected_player_row(self, row):
+        """
+        Retira o marcador (→) da linha anteriormente selecionada e coloca-o na nova.
+        Alterar um atributo de um Row notifica a tabela apenas dessa linha.
+        """
+        old_row = self.selected_player_row
+        if old_row is row:
+            return
+        if old_row is not None and old_row.nome.startswith("→ "):
+            old_row.nome = old_row.nome.removeprefix("→ ")
+        if row is not None and not row.nome.startswith("→ "):
+            row.nome = "→ " + row.nome
+        self.selected_player_row = row
 
     # ---------------------------
     # Placeholders para outras telas
     # ---------------------------
-    def show_jogos(self, widget):
+    async def show_jogos(self, widget):
+        self.games_window = self.show_window("jogos", self.build_jogos, cost=2, release=self.release_jogos)
+        # Carrega os jogos (do repositório, se ainda estiverem atuais)
+        await self.load_games()
+
+    def release_jogos(self):
+        self.games_window = self.games_table = self.games_binding = self.games_view = None
+
+    def build_jogos(self):
         # Cria a janela de Jogos
-        self.games_window = toga.Window(title="Jogos Agendados")
+        games_window = toga.Window(title="Jogos Agendados")
         main_box = toga.Box(
             style=Pack(direction=COLUMN, padding=20, alignment=CENTER, background_color="#e5e7eb")
         )
@@ -499,6 +925,7 @@ class TeamTrackerMobile(toga.App):
                 items=["Todos"], style=Pack(width=100, padding_bottom=10)
             )
             self.filter_club_selection.value = "Todos"
+            self.filter_club_items = ["Todos"]
         club_box.add(club_label)
         club_box.add(self.filter_club_selection)
         
@@ -510,6 +937,13 @@ class TeamTrackerMobile(toga.App):
             style=Pack(width=100, padding_top=20)
         )
         button_box.add(refresh_filter_button)
+        # Restringe a lista aos jogos das próximas duas semanas
+        self.filter_upcoming_switch = toga.Switch(
+            "Próximas 2 semanas",
+            on_change=self.on_toggle_upcoming,
+            style=Pack(padding_top=5)
+        )
+        button_box.add(self.filter_upcoming_switch)
         
         # Adiciona as caixas (Escalão, Clube e Botão) lado a lado
         row_filter.add(esc_box)
@@ -524,7 +958,14 @@ class TeamTrackerMobile(toga.App):
             on_select=self.on_select_game,
             style=Pack(flex=1)
         )
+        self.games_binding = TableBinding(self.games_table)
+        self.games_view = PagedTableView(self.games_binding, self.game_row, on_render=self.find_selected_game_row)
         list_box.add(self.games_table)
+        list_box.add(self.games_view.controls)
+
+        # Indicador de carregamento, limpo quando os dados chegam
+        self.games_status = toga.Label("A carregar jogos...", style=Pack(padding_top=5))
+        list_box.add(self.games_status)
 
         # Botões de ação (Ver Jogo e Remover Jogo)
         actions_box = toga.Box(style=Pack(direction=COLUMN, alignment=CENTER, padding_top=10))
@@ -544,54 +985,92 @@ class TeamTrackerMobile(toga.App):
 
         main_box.add(list_box)
 
-        # Define o conteúdo e mostra a janela
-        self.games_window.content = main_box
-        self.games_window.show()
+        games_window.content = main_box
+        return games_window
 
-        # Carrega os jogos a partir da API
-        self.load_games()
 
-
-    def load_games(self):
+    async def load_games(self, force=False):
+        if not await self.refresh_games(None, force=force):
+            return
+        # Atualiza o filtro de clubes se o usuário tiver "Todos" em clube
+        if self.user_info.get("clube", "Todos") == "Todos":
+            clubs = ["Todos"] + self.games_store.index.clubs()
+            if clubs != self.filter_club_items:
+                selected_club = self.filter_club_selection.value
+                self.filter_club_items = clubs
+                self.filter_club_selection.items = clubs
+                self.filter_club_selection.value = selected_club if selected_club in clubs else "Todos"
+                self.show_games_rows()
+
+    def redraw_games(self):
+        """Depois de uma alteração: redesenha a tabela a partir do repositório, sem novo download."""
+        if getattr(self, "games_view", None) is not None:
+            self.show_games_rows()
+
+    async def refresh_games(self, widget, force=False):
+        """
+        Aplica os filtros: o âmbito (escalão, clube) escolhido é pedido ao servidor,
+        filtrado e paginado, se ainda não estiver em memória; a tabela vai sendo
+        preenchida à medida que as páginas chegam. Devolve False em caso de erro.
+        """
+        self.games_status.text = "A carregar jogos..."
+        if widget is not None:
+            # Novo filtro: recomeça na primeira página
+            self.games_view.reset()
         try:
-            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
-            response = requests.get(f"{self.api_url}/api/jogos", headers=headers)
-            if response.status_code == 200:
-                # Ordena os jogos por data
-                jogos_data = sorted(response.json(), key=lambda j: j.get("data"))
-                self.games = jogos_data
-                # Atualiza o filtro de clubes se o usuário tiver "Todos" em clube
-                if self.user_info.get("clube", "Todos") == "Todos":
-                    clubs = sorted(list({ jogo.get("clube", "") for jogo in self.games }))
-                    clubs = ["Todos"] + clubs
-                    self.filter_club_selection.items = clubs
-                    self.filter_club_selection.value = "Todos"
-                self.refresh_games(None)
-            else:
-                self.main_window.error_dialog("Erro", "Não foi possível carregar os jogos.")
+            await self.within_load_ceiling(self.games_store.get(
+                self.filter_esc_selection.value,
+                self.filter_club_selection.value,
+                force=force,
+                on_page=lambda jogos: self.show_games_rows(),
+            ))
+        except ApiError:
+            self.games_status.text = ""
+            self.main_window.error_dialog("Erro", "Não foi possível carregar os jogos.")
+            return False
+        except asyncio.TimeoutError:
+            self.games_status.text = ""
+            self.main_window.error_dialog("Erro", LOAD_TIMEOUT_MESSAGE)
+            return False
         except Exception as e:
+            self.games_status.text = ""
             self.main_window.error_dialog("Erro", str(e))
+            return False
+        self.show_games_rows()
+        return True
 
-    def refresh_games(self, widget):
+    def show_games_rows(self):
         selected_esc = self.filter_esc_selection.value
         selected_club = self.filter_club_selection.value
-        filtered = []
-        for j in self.games:
-            match_esc = (selected_esc == "Todos") or (j.get("escalao") == selected_esc)
-            match_club = (selected_club == "Todos") or (j.get("clube") == selected_club)
-            if match_esc and match_club:
-                adv_field = j.get("adversario", "")
-                if self.jogo_selecionado and self.jogo_selecionado.get("id") == j.get("id"):
-                    adv_field = "→ " + adv_field
-                row = [
-                    j.get("data", ""),
-                    adv_field,
-                    j.get("escalao", ""),
-                    j.get("clube", ""),
-                    j.get("estado", "")
-                ]
-                filtered.append(row)
-        self.games_table.data = filtered
+        index = self.games_store.index
+        # Consulta direta ao balde (escalão, clube) do índice, sem percorrer todos os jogos
+        jogos = index.query(selected_esc, selected_club)
+        upcoming = index.upcoming(14, selected_esc, selected_club)
+        if self.filter_upcoming_switch.value:
+            jogos = upcoming
+        self.games_view.set_items(jogos)
+        self.games_status.text = f"{len(jogos)} jogos ({len(upcoming)} nas próximas 2 semanas)"
+
+    def find_selected_game_row(self):
+        """Como find_selected_player_row, para a tabela de jogos."""
+        self.selected_game_row = self.games_binding.row_for(self.jogo_selecionado.get("id")) if self.jogo_selecionado else None
+
+    def on_toggle_upcoming(self, widget):
+        self.games_view.reset()
+        self.show_games_rows()
+
+    def game_row(self, j):
+        adv_field = j.get("adversario", "")
+        if self.jogo_selecionado and self.jogo_selecionado.get("id") == j.get("id"):
+            adv_field = "→ " + adv_field
+        row = [
+            j.get("data", ""),
+            adv_field,
+            j.get("escalao", ""),
+            j.get("clube", ""),
+            j.get("estado", "")
+        ]
+        return j.get("id"), row
 
     def on_select_game(self, widget):
         # Obter a seleção real do widget
@@ -603,55 +1082,35 @@ class TeamTrackerMobile(toga.App):
         # Se a seleção for múltipla, pega a primeira linha; caso contrário, utiliza o único item.
         row = selected[0] if isinstance(selected, list) else selected
         print("Linha selecionada:", row)
-        
-        try:
-            # Tenta extrair os atributos utilizando os nomes com acentos.
-            data_str = getattr(row, "data", None)
-            adversario_str = getattr(row, "adversário", None) or getattr(row, "adversario", None)
-            escalao_str = getattr(row, "escalão", None) or getattr(row, "escalao", None)
-            clube_str = getattr(row, "clube", None)
-            
-            if not (data_str and adversario_str and escalao_str and clube_str):
-                if hasattr(row, "cells"):
-                    cells = row.cells
-                    if len(cells) >= 4:
-                        data_str = str(cells[0])
-                        adversario_str = cells[1]
-                        escalao_str = cells[2]
-                        clube_str = cells[3]
-                    else:
-                        print("Dados insuficientes na linha para identificação do jogo.")
-                        return
-                else:
-                    print("Não foi possível extrair os dados necessários da linha.")
-                    return
-
-            self.jogo_selecionado = None
-            # Procura o jogo correspondente utilizando os quatro campos
-            for jogo in self.games:
-                if (jogo.get("data") == data_str and
-                    jogo.get("adversario") == adversario_str and
-                    jogo.get("escalao") == escalao_str and
-                    jogo.get("clube") == clube_str):
-                    self.jogo_selecionado = jogo
-                    self.last_selected_jogo = jogo  # Guarda a última seleção válida
-                    print("Jogo selecionado:", jogo)
-                    break
-
-            if self.jogo_selecionado is None:
-                print("Nenhum jogo correspondente encontrado para Data:", data_str,
-                    "Adversário:", adversario_str, "Escalão:", escalao_str, "Clube:", clube_str)
-
-            # Opcional: atualiza a tabela para refletir visualmente a seleção
-            self.refresh_games(None)
-            
-        except Exception as e:
-            print("Erro ao processar a seleção:", e)
-            self.jogo_selecionado = None
 
+        # Cada linha guarda o id do jogo; a procura é direta no índice do GamesStore
+        self.jogo_selecionado = self.games_store.index.by_id.get(getattr(row, "id", None))
+        if self.jogo_selecionado is None:
+            print("Nenhum jogo correspondente encontrado para a linha:", row)
+        else:
+            self.last_selected_jogo = self.jogo_selecionado  # Guarda a última seleção válida
+            print("Jogo selecionado:", self.jogo_selecionado)
 
+        # Move o marcador visual (→) apenas nas linhas afetadas
+        self.mark_selected_game_row(row if self.jogo_selecionado else None)
 
-    def agendar_jogo_method(self, widget):
+    def mark_selected_game_row(self, row):
+        """
+        Retira o marcador (→) do adversário da linha anteriormente selecionada e
+        coloca-o na nova, tal como mark_selected_player_row.
+        """
+        old_row = self.selected_game_row
+        if old_row is row:
+            return
+        # Accessor da coluna "Adversário"
+        accessor = self.games_table.data.accessors[1]
+        if old_row is not None and getattr(old_row, accessor).startswith("→ "):
+            setattr(old_row, accessor, getattr(old_row, accessor).removeprefix("→ "))
+        if row is not None and not getattr(row, accessor).startswith("→ "):
+            setattr(row, accessor, "→ " + getattr(row, accessor))
+        self.selected_game_row = row
+
+    async def agendar_jogo_method(self, widget):
         # Recolhe os dados do formulário
         data = self.jogo_data_input.value
         adversario = self.jogo_adv_input.value
@@ -680,21 +1139,20 @@ class TeamTrackerMobile(toga.App):
             "clube": clube
         }
         try:
-            url = f"{self.api_url}/api/jogos"
-            response = requests.post(url, json=payload)
-            if response.status_code in (200, 201):
+            # O jogo aparece já na lista (com um id local) e é enviado pelo diário
+            local_id = self.outbox.new_local_id()
+            self.games_store.put_local(dict(payload, id=local_id, estado="Planeado"), created=True)
+            sent = await self.submit(("create_game", {"local_id": local_id, "payload": payload}))
+            if sent:
                 self.main_window.info_dialog("Sucesso", "Jogo agendado com sucesso!")
-                # Limpa os campos do formulário
-                self.jogo_data_input.value = ""
-                self.jogo_adv_input.value = ""
-                if hasattr(self.jogo_escalao_input, "value") and self.user_info.get("escalao", "Todos") == "Todos":
-                    self.jogo_escalao_input.value = "Todos"
-                if hasattr(self.jogo_clube_input, "value") and self.user_info.get("clube", "Todos") == "Todos":
-                    self.jogo_clube_input.value = ""
-                self.load_games()
-            else:
-                error_message = response.json().get("detail", "Erro ao agendar o jogo.")
-                self.main_window.error_dialog("Erro", error_message)
+            # Limpa os campos do formulário
+            self.jogo_data_input.value = ""
+            self.jogo_adv_input.value = ""
+            if hasattr(self.jogo_escalao_input, "value") and self.user_info.get("escalao", "Todos") == "Todos":
+                self.jogo_escalao_input.value = "Todos"
+            if hasattr(self.jogo_clube_input, "value") and self.user_info.get("clube", "Todos") == "Todos":
+                self.jogo_clube_input.value = ""
+            self.redraw_games()
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
 
@@ -708,17 +1166,14 @@ class TeamTrackerMobile(toga.App):
         if not confirmar:
             return
         try:
-            url = f"{self.api_url}/api/jogos/{jogo_to_remove.get('id')}"
-            headers = {"Authorization": f"Bearer {self.token}"}
-            response = requests.delete(url, headers=headers)
-            if response.status_code in (200, 204):
+            self.games_store.delete_local(jogo_to_remove.get("id"))
+            sent = await self.submit(("delete_game", {"id": jogo_to_remove.get("id")}))
+            if sent:
                 self.main_window.info_dialog("Sucesso", "Jogo removido com sucesso!")
-                # Limpa a seleção
-                self.jogo_selecionado = None
-                self.last_selected_jogo = None
-                self.load_games()
-            else:
-                self.main_window.error_dialog("Erro", f"Erro ao remover jogo: {response.text}")
+            # Limpa a seleção
+            self.jogo_selecionado = None
+            self.last_selected_jogo = None
+            self.redraw_games()
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
 
@@ -740,16 +1195,13 @@ class TeamTrackerMobile(toga.App):
             return
 
         try:
-            url = f"{self.api_url}/api/jogadores/{player_to_remove.id}"
-            headers = {"Authorization": f"Bearer {self.token}"}
-            response = requests.delete(url, headers=headers)
-            if response.status_code in (200, 204):
+            self.roster.delete_local(player_to_remove.id)
+            sent = await self.submit(("delete_player", {"id": player_to_remove.id}))
+            if sent:
                 self.main_window.info_dialog("Sucesso", "Jogador removido com sucesso!")
-                self.selected_player = None
-                self.last_selected_player = None
-                self.load_players()
-            else:
-                self.main_window.error_dialog("Erro", f"Erro ao remover jogador: {response.text}")
+            self.selected_player = None
+            self.last_selected_player = None
+            self.redraw_players()
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
 
@@ -757,8 +1209,18 @@ class TeamTrackerMobile(toga.App):
     # Métodos para Adicionar Jogador
     # ---------------------------
     def show_add_player_window(self, widget):
+        self.add_player_window = self.show_window("adicionar_jogador", self.build_add_player_window)
+        # Formulário reutilizado: começa sempre vazio
+        self.new_player_name.value = ""
+        self.new_player_number.value = ""
+        self.new_player_photo_path = None  # Armazena o caminho da foto selecionada
+        self.upload_photo_btn.text = "Escolher Foto"
+        self.upload_progress.value = 0
+        self.upload_status.text = ""
+
+    def build_add_player_window(self):
         # Cria uma nova janela para adicionar jogador
-        self.add_player_window = toga.Window(title="Adicionar Jogador")
+        add_player_window = toga.Window(title="Adicionar Jogador")
         main_box = toga.Box(
             style=Pack(
                 direction=COLUMN,
@@ -839,7 +1301,6 @@ class TeamTrackerMobile(toga.App):
         # Botão para upload de foto
         foto_label = toga.Label("Foto:", style=Pack(margin_bottom=5))
         main_box.add(foto_label)
-        self.new_player_photo_path = None  # Armazena o caminho da foto selecionada
         self.upload_photo_btn = toga.Button(
             "Escolher Foto",
             on_press=self.choose_photo,
@@ -848,27 +1309,35 @@ class TeamTrackerMobile(toga.App):
         main_box.add(self.upload_photo_btn)
 
         # Botão para submeter o formulário
-        submit_btn = toga.Button(
+        self.add_player_button = toga.Button(
             "Adicionar",
             on_press=self.add_new_player,
             style=Pack(width=200, margin_top=10)
         )
-        main_box.add(submit_btn)
+        main_box.add(self.add_player_button)
+
+        # Progresso do upload da foto
+        self.upload_progress = toga.ProgressBar(max=100, value=0, style=Pack(width=200, margin_top=10))
+        self.upload_status = toga.Label("", style=Pack(margin_top=5))
+        main_box.add(self.upload_progress)
+        main_box.add(self.upload_status)
 
-        self.add_player_window.content = main_box
-        self.add_player_window.show()
+        add_player_window.content = main_box
+        return add_player_window
 
-    def choose_photo(self, widget):
+    async def choose_photo(self, widget):
         # Abre o diálogo para selecionar um ficheiro de imagem
         try:
-            chosen = self.main_window.open_file_dialog("Escolha a foto", file_types=["*.png", "*.jpg", "*.jpeg"])
-            if chosen:
-                self.new_player_photo_path = chosen[0]
-                self.upload_photo_btn.label = "Foto Selecionada"
+            path = await self.add_player_window.dialog(
+                toga.OpenFileDialog("Escolha a foto", file_types=["png", "jpg", "jpeg"])
+            )
+            if path:
+                self.new_player_photo_path = path
+                self.upload_photo_btn.text = "Foto Selecionada"
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
 
-    def add_new_player(self, widget):
+    async def add_new_player(self, widget):
         # Recolhe os dados do formulário
         nome = self.new_player_name.value
         numero = self.new_player_number.value
@@ -889,31 +1358,86 @@ class TeamTrackerMobile(toga.App):
             "clube": clube
         }
 
+        self.add_player_button.enabled = False
         try:
-            url = f"{self.api_url}/api/jogadores"
-            response = requests.post(url, json=payload)
-            if response.status_code in (200, 201):
-                novo_jogador = response.json()
-                jogador_id = novo_jogador.get("id")
-                # Se existir foto selecionada, faz upload da mesma
-                if self.new_player_photo_path and jogador_id:
-                    upload_url = f"{self.api_url}/api/jogadores/{jogador_id}/upload-foto"
-                    with open(self.new_player_photo_path, "rb") as f:
-                        files = {"file": f}
-                        upload_resp = requests.post(upload_url, files=files)
-                        if upload_resp.status_code not in (200, 201):
-                            self.main_window.error_dialog("Erro", "Jogador criado, mas falha no upload da foto.")
+            # O jogador aparece já no plantel (com um id local) e é enviado pelo diário
+            local_id = self.outbox.new_local_id()
+            operations = [("create_player", {"local_id": local_id, "payload": payload})]
+            # Se existir foto selecionada, é reduzida agora e enviada a seguir à criação,
+            # como operação própria: se falhar, é repetida sem criar de novo o jogador
+            photo = None
+            if self.new_player_photo_path:
+                photo = await self.prepare_pending_photo(local_id, self.new_player_photo_path)
+                if photo is not None:
+                    operations.append(("upload_photo", photo))
+            self.roster.put_local(Player.from_dict(dict(payload, id=local_id)), created=True)
+
+            def report(sent, total):
+                self.loop.call_soon_threadsafe(self.show_upload_progress, sent, total)
+
+            sent = await self.submit(*operations, upload_progress=report, notify_offline=photo is None)
+            # Esgotadas as tentativas do envio da foto, o utilizador escolhe entre tentar já
+            # outra vez ou deixá-la no diário, para o envio em segundo plano
+            while photo is not None and self.photo_pending(local_id):
+                retry = await self.add_player_window.dialog(toga.QuestionDialog("Erro", self.photo_retry_message(local_id)))
+                if not retry:
+                    self.main_window.info_dialog(
+                        "Sem ligação", "A foto foi guardada no dispositivo e será enviada quando a ligação voltar."
+                    )
+                    break
+                sent = await self.submit(upload_progress=report, notify_offline=False)
+            if sent:
                 self.main_window.info_dialog("Sucesso", "Jogador adicionado com sucesso!")
-                self.add_player_window.close()
-                self.load_players()
-            else:
-                error_message = response.json().get("detail", "Erro ao adicionar jogador.")
-                self.main_window.error_dialog("Erro", error_message)
+            self.hide_window("adicionar_jogador")
+            self.redraw_players()
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
-    def show_estatisticas(self, widget):
+        finally:
+            self.add_player_button.enabled = True
+
+    def photo_pending(self, jogador_id):
+        """True se a foto do jogador ainda está no diário por enviar."""
+        return any(op.tipo == "upload_photo" and op.dados["jogador_id"] == jogador_id for op in self.outbox.pending())
+
+    def photo_retry_message(self, jogador_id):
+        if jogador_id in self.outbox.local_ids("create_player"):
+            return "Não foi possível enviar o jogador nem a foto. Tentar novamente agora?"
+        return "O jogador foi criado, mas não foi possível enviar a foto. Tentar novamente agora?"
+
+    async def prepare_pending_photo(self, jogador_id, path):
+        """
+        Reduz a foto no dispositivo (numa thread) e guarda-a junto do diário.
+        Devolve os dados da operação "upload_photo", ou None se a foto não puder ser lida.
+        """
+        self.upload_status.text = "A preparar a foto..."
+        try:
+            data, filename, content_type = await self.loop.run_in_executor(None, prepare_photo, path)
+            ficheiro = self.pending_photos_dir / f"{jogador_id}.jpg"
+            await self.loop.run_in_executor(None, ficheiro.write_bytes, data)
+        except Exception as e:
+            self.main_window.error_dialog("Erro", f"Não foi possível ler a foto: {e}")
+            return None
+        finally:
+            self.upload_status.text = ""
+        return {"jogador_id": jogador_id, "ficheiro": str(ficheiro), "filename": filename, "content_type": content_type}
+
+    def show_upload_progress(self, sent, total):
+        self.upload_progress.value = 100 * sent / total if total else 0
+        self.upload_status.text = f"A enviar a foto... {sent // 1024} / {total // 1024} KB"
+
+    async def show_estatisticas(self, widget):
+        self.stats_window = self.show_window(
+            "estatisticas", self.build_estatisticas, cost=3, release=self.release_estatisticas
+        )
+        await self.load_players_stats()
+
+    def release_estatisticas(self):
+        self.stats_window = self.stats_table = self.stats_binding = self.stats_view = None
+        self.leaderboard_table = self.leaderboard_binding = self.stats_scope = None
+
+    def build_estatisticas(self):
         # Cria uma nova janela para as estatísticas
-        self.stats_window = toga.Window(title="Estatísticas dos Jogadores")
+        stats_window = toga.Window(title="Estatísticas dos Jogadores")
         main_box = toga.Box(style=Pack(direction=COLUMN, padding=20, alignment=CENTER, background_color="#e5e7eb"))
 
         # Caixa de filtros
@@ -958,6 +1482,7 @@ class TeamTrackerMobile(toga.App):
             clube_items = ["Todos"]
             clube_default = "Todos"
             clube_disabled = False
+        self.stats_club_items = clube_items
         self.clube_selection = toga.Selection(
             items=clube_items,
             style=Pack(width=300, padding_bottom=10)
@@ -971,103 +1496,263 @@ class TeamTrackerMobile(toga.App):
         # Botão para atualizar a tabela conforme os filtros
         refresh_button = toga.Button("Aplicar Filtro", on_press=self.refresh_stats, style=Pack(padding_bottom=10))
         filter_box.add(refresh_button)
+
+        # Ordenação (o Table do Toga não tem eventos de clique no cabeçalho).
+        # A métrica principal ordena do melhor para o pior; a segunda desempata.
+        metric_titles = list(METRICS.values())
+        self.stats_sort_selection = toga.Selection(items=metric_titles, style=Pack(width=300, padding_bottom=10))
+        self.stats_sort_selection.value = METRICS["golosMarcados"]
+        self.stats_then_selection = toga.Selection(items=["—"] + metric_titles, style=Pack(width=300, padding_bottom=10))
+        self.stats_then_selection.value = METRICS["assistencias"]
+        self.stats_sort_selection.on_change = self.on_change_stats_sort
+        self.stats_then_selection.on_change = self.on_change_stats_sort
+        filter_box.add(toga.Label("Ordenar por:", style=Pack(padding_bottom=5)))
+        filter_box.add(self.stats_sort_selection)
+        filter_box.add(toga.Label("Depois por:", style=Pack(padding_bottom=5)))
+        filter_box.add(self.stats_then_selection)
         main_box.add(filter_box)
 
         # Tabela para exibir as estatísticas
-        # As colunas serão: Foto, Número, Nome, Jogos, Golos, Assistências, CA, CV, TTU
+        # As colunas serão: Foto, Número, Nome, Jogos, Golos, Assistências, CA, CV, TTU,
+        # seguidas das métricas derivadas e do percentil (no escalão) da métrica de ordenação
         self.stats_table = toga.Table(
-            headings=["Foto", "Número", "Nome", "Jogos", "Golos", "Assistências", "CA", "CV", "TTU"],
+            headings=[
+                "Foto", "Número", "Nome", "Jogos", "Golos", "Assistências", "CA", "CV", "TTU",
+                "G/Jogo", "A/Jogo", "Min/Golo", "Cartões/Jogo", "Percentil"
+            ],
             data=[],
             style=Pack(flex=1)
         )
+        self.stats_scope = None
+        self.stats_binding = TableBinding(self.stats_table)
+        self.stats_view = PagedTableView(self.stats_binding, self.stats_row)
         main_box.add(self.stats_table)
+        main_box.add(self.stats_view.controls)
+
+        # Indicador de carregamento, limpo quando os dados chegam
+        self.stats_status = toga.Label("A carregar estatísticas...", style=Pack(padding_top=5))
+        main_box.add(self.stats_status)
+
+        # Classificações (top 10) do filtro atual, mantidas pelo RosterStore
+        leaderboard_box = toga.Box(style=Pack(direction=ROW, padding_top=10, alignment=CENTER))
+        leaderboard_box.add(toga.Label("Classificação:", style=Pack(padding_right=5)))
+        self.leaderboard_selection = toga.Selection(
+            items=[METRICS[metric] for metric in LEADERBOARD_METRICS],
+            on_change=lambda widget: self.show_leaderboard(),
+            style=Pack(width=200)
+        )
+        leaderboard_box.add(self.leaderboard_selection)
+        main_box.add(leaderboard_box)
+        self.leaderboard_table = toga.Table(
+            headings=["Posição", "Nome", "Valor"],
+            data=[],
+            style=Pack(height=200)
+        )
+        self.leaderboard_binding = TableBinding(self.leaderboard_table)
+        main_box.add(self.leaderboard_table)
 
-        # Botão para exportar para CSV
-        export_button = toga.Button("Exportar CSV", on_press=self.export_stats_csv, style=Pack(padding_top=10))
-        main_box.add(export_button)
-
-        self.stats_window.content = main_box
-        self.stats_window.show()
+        # Botão para exportar (CSV ou XLSX, conforme a extensão escolhida)
+        self.export_button = toga.Button("Exportar CSV/XLSX", on_press=self.export_stats, style=Pack(padding_top=10))
+        main_box.add(self.export_button)
 
-        # Carrega os jogadores a partir da API e atualiza os filtros (no caso de utilizador com "Todos" no clube)
-        self.load_players_stats()
+        stats_window.content = main_box
+        return stats_window
 
-    def load_players_stats(self):
+    async def load_players_stats(self):
+        # Atualiza a tabela com os dados filtrados
+        if not await self.refresh_stats(None):
+            return
+        # Se o clube do utilizador for "Todos", atualiza o widget com os clubes encontrados
+        if self.user_info.get("clube", "Todos") == "Todos":
+            clubs = ["Todos"] + self.roster.clubs()
+            if clubs != self.stats_club_items:
+                # A janela é reutilizada: mantém o clube escolhido se ainda existir
+                selected_club = self.clube_selection.value
+                self.stats_club_items = clubs
+                self.clube_selection.items = clubs
+                self.clube_selection.value = selected_club if selected_club in clubs else "Todos"
+                if self.clube_selection.value != selected_club:
+                    await self.refresh_stats(None)
+
+    async def refresh_stats(self, widget):
+        """
+        Aplica os filtros de escalão e clube: o âmbito escolhido é pedido ao servidor
+        (filtrado e paginado) se ainda não estiver em memória, e a tabela vai sendo
+        preenchida à medida que as páginas chegam. Devolve False em caso de erro.
+        """
+        selected_escalao = self.escalao_selection.value
+        selected_clube = self.clube_selection.value
+        self.stats_status.text = "A carregar estatísticas..."
+        # Novo filtro: recomeça na primeira página
+        self.stats_view.reset()
         try:
-            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
-            response = requests.get(f"{self.api_url}/api/jogadores", headers=headers)
-            if response.status_code == 200:
-                self.all_players = response.json()  # Armazena todos os jogadores com estatísticas
-                # Se o clube do utilizador for "Todos", atualiza o widget com os clubes encontrados
-                if self.user_info.get("clube", "Todos") == "Todos":
-                    clubs = sorted(list({ player.get("clube", "") for player in self.all_players }))
-                    clubs = ["Todos"] + clubs
-                    self.clube_selection.items = clubs
-                    self.clube_selection.value = "Todos"
-                # Atualiza a tabela com os dados filtrados
-                self.refresh_stats(None)
-            else:
-                self.main_window.error_dialog("Erro", "Não foi possível carregar as estatísticas dos jogadores.")
+            await self.within_load_ceiling(self.roster.get(
+                selected_escalao, selected_clube,
+                on_page=lambda players: self.show_stats_rows(selected_escalao, selected_clube)
+            ))
+        except ApiError:
+            self.main_window.error_dialog("Erro", "Não foi possível carregar as estatísticas dos jogadores.")
+            self.stats_status.text = ""
+            return False
+        except asyncio.TimeoutError:
+            self.main_window.error_dialog("Erro", LOAD_TIMEOUT_MESSAGE)
+            self.stats_status.text = ""
+            return False
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
+            self.stats_status.text = ""
+            return False
+        self.show_stats_rows(selected_escalao, selected_clube)
+        return True
+
+    def stats_sort_keys(self):
+        """Chaves de ordenação escolhidas (métrica principal e desempate)."""
+        keys_by_title = {title: key for key, title in METRICS.items()}
+        keys = [keys_by_title[self.stats_sort_selection.value]]
+        then = keys_by_title.get(self.stats_then_selection.value)
+        if then and then not in keys:
+            keys.append(then)
+        return tuple(keys)
+
+    def on_change_stats_sort(self, widget):
+        # Reordenar só reutiliza (ou calcula uma vez) a permutação no StatsEngine
+        if self.stats_scope is None:
+            return
+        self.stats_view.reset()
+        self.show_stats_rows(*self.stats_scope)
+
+    def show_stats_rows(self, escalao, clube):
+        # As estatísticas são lidas da vista colunar do plantel: a tabela recebe
+        # os índices das linhas, já ordenados, e só as páginas visíveis são formatadas.
+        # Guarda o motor usado, para que os índices continuem válidos ao paginar
+        self.stats_scope = (escalao, clube)
+        self.stats_engine = engine = self.roster.stats
+        self.stats_sort_keys_used = keys = self.stats_sort_keys()
+        columns = engine.columns
+        rows = engine.sorted_rows(columns.select(escalao, clube), keys)
+        self.stats_view.set_items(rows)
+        self.show_leaderboard()
+        totals = columns.totals(rows)
+        self.stats_status.text = (
+            f"{len(rows)} jogadores · {totals['golosMarcados']} golos · "
+            f"{totals['assistencias']} assistências"
+        )
 
-    def refresh_stats(self, widget):
-        # Aplica os filtros de escalão e clube e atualiza a tabela de estatísticas
-        selected_escalao = self.escalao_selection.value
-        selected_clube = self.clube_selection.value
-        filtered = []
-        for p in self.all_players:
-            match_escalao = (selected_escalao == "Todos") or (p.get("escalao") == selected_escalao)
-            match_clube = (selected_clube == "Todos") or (p.get("clube") == selected_clube)
-            if match_escalao and match_clube:
-                foto = "Foto" if p.get("foto") else "Sem foto"
-                row = [
-                    foto,
-                    str(p.get("numero", "")),
-                    p.get("nome", ""),
-                    str(p.get("jogosParticipados", 0)),
-                    str(p.get("golosMarcados", 0)),
-                    str(p.get("assistencias", 0)),
-                    str(p.get("CA", 0)),
-                    str(p.get("CV", 0)),
-                    str(p.get("TTU", 0))
-                ]
-                filtered.append(row)
-        self.stats_table.data = filtered
-
-    def export_stats_csv(self, widget):
-        # Gera uma string CSV com os dados exibidos na tabela (exceto a coluna "Foto")
-        header = ["Número", "Nome", "Jogos", "Golos", "Assistências", "CA", "CV", "TTU"]
-        csv_lines = [",".join(header)]
-        for row in self.stats_table.data:
-            csv_lines.append(",".join(row[1:]))  # ignora a primeira coluna (foto)
-        csv_content = "\n".join(csv_lines)
+    def show_leaderboard(self):
+        """Mostra o top da métrica escolhida para o escalão e clube da tabela."""
+        if self.stats_scope is None:
+            return
+        metric = next(m for m in LEADERBOARD_METRICS if METRICS[m] == self.leaderboard_selection.value)
+        top = self.roster.leaderboards.top(metric, *self.stats_scope)
+        rows = []
+        for position, (player_id, value) in enumerate(top, start=1):
+            player = self.roster.by_id.get(player_id)
+            nome = player.nome if player else str(player_id)
+            rows.append((player_id, [str(position), nome, str(value)]))
+        self.leaderboard_binding.update(rows)
+
+    def stats_row(self, i):
+        engine = self.stats_engine
+        columns = engine.columns
+        stats = columns.stats
+        derived = engine.derived
+        minutos_por_golo = derived["minutos_por_golo"][i]
+        foto = self.thumbnails.cell(columns.foto[i])
+        row = [
+            foto,
+            str(columns.numero[i]),
+            columns.nome[i],
+            str(stats["jogosParticipados"][i]),
+            str(stats["golosMarcados"][i]),
+            str(stats["assistencias"][i]),
+            str(stats["CA"][i]),
+            str(stats["CV"][i]),
+            str(stats["TTU"][i]),
+            f"{derived['golos_por_jogo'][i]:.2f}",
+            f"{derived['assistencias_por_jogo'][i]:.2f}",
+            f"{minutos_por_golo:.0f}" if minutos_por_golo != math.inf else "—",
+            f"{derived['cartoes_por_jogo'][i]:.2f}",
+            f"{engine.percentile(self.stats_sort_keys_used[0])[i]:.0f}"
+        ]
+        return columns.ids[i], row
+
+    async def export_stats(self, widget):
+        """
+        Exporta as linhas do filtro e ordenação atuais para um ficheiro escolhido
+        pelo utilizador. Os registos são gerados a partir do StatsEngine e escritos
+        em streaming numa thread, com o progresso na barra de estado.
+        """
+        if self.stats_scope is None:
+            self.stats_window.error_dialog("Erro", "Ainda não há estatísticas para exportar.")
+            return
+        path = await self.stats_window.dialog(toga.SaveFileDialog(
+            "Exportar estatísticas",
+            suggested_filename="estatisticas_jogadores.csv",
+            file_types=["csv", "xlsx"],
+        ))
+        if not path:
+            return
+
+        # Fotografia do estado atual: a tabela pode mudar enquanto a exportação corre
+        engine = self.stats_engine
+        rows = self.stats_view.items
+        total = len(rows)
+
+        def report(count):
+            self.loop.call_soon_threadsafe(
+                setattr, self.stats_status, "text", f"A exportar... {count}/{total}"
+            )
+
+        previous_status = self.stats_status.text
+        self.export_button.enabled = False
         try:
-            with open("estatisticas_jogadores.csv", "w", encoding="utf-8") as f:
-                f.write(csv_content)
-            self.stats_window.info_dialog("Exportação CSV", "Arquivo CSV exportado com sucesso: estatisticas_jogadores.csv")
+            from .export import STATS_HEADER, export_table, stats_records
+
+            count = await self.loop.run_in_executor(
+                None, export_table, path, STATS_HEADER, stats_records(engine, rows), report
+            )
+            self.stats_window.info_dialog("Exportação", f"{count} jogadores exportados para {path}")
         except Exception as e:
             self.stats_window.error_dialog("Erro", str(e))
-    def show_jogo_planeado(self, jogo):
+        finally:
+            self.export_button.enabled = True
+            self.stats_status.text = previous_status
+
+    async def show_jogo_planeado(self, jogo):
         """
         Abre a janela para o jogo planeado, mostrando os detalhes do jogo e
         as duas listas de jogadores: Disponíveis e Convocados.
         """
         self.jogo_selecionado = jogo
+        self.selected_available = self.selected_convoked = None
 
-        # Cria a nova janela
-        self.jogo_planeado_window = toga.Window(title="Jogo Planeado")
-        main_box = toga.Box(style=Pack(direction=COLUMN, padding=20))
-
-        detalhes_text = (
+        # A janela é reutilizada entre jogos: só os detalhes e as listas mudam
+        self.jogo_planeado_window = self.show_window(
+            "jogo_planeado", self.build_jogo_planeado, cost=2, release=self.release_jogo_planeado
+        )
+        self.jogo_planeado_details.text = (
             f"Data: {jogo.get('data')}\n"
             f"Adversário: {jogo.get('adversario')}\n"
             f"Escalão: {jogo.get('escalao')}\n"
             f"Clube: {jogo.get('clube')}\n"
             f"Estado: {jogo.get('estado')}"
         )
-        detalhes_label = toga.Label(detalhes_text, style=Pack(padding_bottom=10))
-        main_box.add(detalhes_label)
+        # Limpa as listas do jogo anterior enquanto as do novo carregam
+        self.available_binding.update([])
+        self.convoked_binding.update([])
+
+        await self.load_jogo_planeado_players(jogo)
+
+    def release_jogo_planeado(self):
+        self.jogo_planeado_window = self.available_table = self.convoked_table = None
+        self.available_binding = self.convoked_binding = self.available_players = None
+
+    def build_jogo_planeado(self):
+        jogo_planeado_window = toga.Window(title="Jogo Planeado")
+        main_box = toga.Box(style=Pack(direction=COLUMN, padding=20))
+
+        self.jogo_planeado_details = toga.Label("", style=Pack(padding_bottom=10))
+        main_box.add(self.jogo_planeado_details)
 
         # Define as tabelas com ordem: [Foto, Num, Nome, Posição]
         # Ajustamos a largura total para acomodar melhor os campos Nome e Posição,
@@ -1084,6 +1769,8 @@ class TeamTrackerMobile(toga.App):
             on_select=self.on_select_convoked,
             style=Pack(width=700, flex=1)
         )
+        self.available_binding = TableBinding(self.available_table)
+        self.convoked_binding = TableBinding(self.convoked_table)
 
         # Insere as tabelas num ScrollContainer para permitir visualizar muitas linhas
         available_scroll = toga.ScrollContainer(
@@ -1100,6 +1787,10 @@ class TeamTrackerMobile(toga.App):
         tables_box.add(convoked_scroll)
         main_box.add(tables_box)
 
+        # Indicador de carregamento, limpo quando os dados chegam
+        self.jogo_planeado_status = toga.Label("A carregar jogadores...", style=Pack(padding_top=5))
+        main_box.add(self.jogo_planeado_status)
+
         # Botões para transferir jogadores
         buttons_box = toga.Box(style=Pack(direction=ROW, alignment=CENTER, padding_top=10))
         add_btn = toga.Button("➡️ Adicionar", on_press=self.add_convoked, style=Pack(padding=5))
@@ -1111,34 +1802,14 @@ class TeamTrackerMobile(toga.App):
         confirm_btn = toga.Button("Avançar (Confirmar Convocatória)", on_press=self.confirm_convocation, style=Pack(padding_top=10))
         main_box.add(confirm_btn)
 
-        self.jogo_planeado_window.content = main_box
-        self.jogo_planeado_window.show()
-
-        self.load_jogo_planeado_players(jogo)
-
-
-    def refresh_jogo_planeado_tables(self):
-        """
-        Atualiza as tabelas exibindo os jogadores disponíveis e os já convocados.
-        Ordem: [Foto, Num, Nome, Posição]
-        """
-        available_rows = []
-        for p in self.available_players:
-            foto_str = "Foto" if p.foto else "Sem foto"
-            available_rows.append([foto_str, str(p.numero), p.nome, p.posicao])
-        self.available_table.data = available_rows
-
-        convoked_rows = []
-        for p in self.convoked_players:
-            foto_str = "Foto" if p.foto else "Sem foto"
-            convoked_rows.append([foto_str, str(p.numero), p.nome, p.posicao])
-        self.convoked_table.data = convoked_rows
+        jogo_planeado_window.content = main_box
+        return jogo_planeado_window
 
 
     def on_select_available(self, widget):
         """
         Callback para seleção na tabela de disponíveis.
-        Usa a abordagem semelhante ao método on_select_player que funciona bem.
+        O jogador é obtido pelo id guardado na linha.
         """
         selected = widget.selection
         if not selected:
@@ -1147,38 +1818,17 @@ class TeamTrackerMobile(toga.App):
             return
         row = selected[0] if isinstance(selected, list) else selected
         print("Linha selecionada (Disponíveis):", row)
-        try:
-            numero_str = getattr(row, "num", None) or getattr(row, "número", None) or getattr(row, "numero", None)
-            nome_str = getattr(row, "nome", None)
-            if not numero_str or not nome_str:
-                if hasattr(row, "cells") and row.cells:
-                    cells = row.cells
-                    if len(cells) >= 3:
-                        numero_str = str(cells[1])
-                        nome_str = str(cells[2])
-                    else:
-                        print("Células insuficientes na tabela de disponíveis.")
-                        return
-                else:
-                    print("Não foi possível extrair 'num' ou 'nome' da linha de disponíveis.")
-                    return
-            self.selected_available = None
-            for player in self.available_players:
-                if str(player.numero) == str(numero_str) and player.nome == nome_str:
-                    self.selected_available = player
-                    print("Jogador selecionado (Disponíveis):", player)
-                    break
-            if self.selected_available is None:
-                print("Nenhum jogador correspondente encontrado na tabela de disponíveis para Num:", numero_str, "Nome:", nome_str)
-        except Exception as e:
-            print("Erro ao processar a seleção (Disponíveis):", e)
-            self.selected_available = None
+        self.selected_available = self.find_player_in_list(row, self.available_by_id)
+        if self.selected_available is None:
+            print("Nenhum jogador correspondente encontrado na tabela de disponíveis para a linha:", row)
+        else:
+            print("Jogador selecionado (Disponíveis):", self.selected_available)
 
 
     def on_select_convoked(self, widget):
         """
         Callback para seleção na tabela de convocados.
-        Usa a mesma lógica do método on_select_player.
+        O jogador é obtido pelo id guardado na linha.
         """
         selected = widget.selection
         if not selected:
@@ -1187,107 +1837,79 @@ class TeamTrackerMobile(toga.App):
             return
         row = selected[0] if isinstance(selected, list) else selected
         print("Linha selecionada (Convocados):", row)
-        try:
-            numero_str = getattr(row, "num", None) or getattr(row, "número", None) or getattr(row, "numero", None)
-            nome_str = getattr(row, "nome", None)
-            if not numero_str or not nome_str:
-                if hasattr(row, "cells") and row.cells:
-                    cells = row.cells
-                    if len(cells) >= 3:
-                        numero_str = str(cells[1])
-                        nome_str = str(cells[2])
-                    else:
-                        print("Células insuficientes na tabela de convocados.")
-                        return
-                else:
-                    print("Não foi possível extrair 'num' ou 'nome' da linha de convocados.")
-                    return
-            self.selected_convoked = None
-            for player in self.convoked_players:
-                if str(player.numero) == str(numero_str) and player.nome == nome_str:
-                    self.selected_convoked = player
-                    print("Jogador selecionado (Convocados):", player)
-                    break
-            if self.selected_convoked is None:
-                print("Nenhum jogador correspondente encontrado na tabela de convocados para Num:", numero_str, "Nome:", nome_str)
-        except Exception as e:
-            print("Erro ao processar a seleção (Convocados):", e)
-            self.selected_convoked = None
+        self.selected_convoked = self.find_player_in_list(row, self.convoked_by_id)
+        if self.selected_convoked is None:
+            print("Nenhum jogador correspondente encontrado na tabela de convocados para a linha:", row)
+        else:
+            print("Jogador selecionado (Convocados):", self.selected_convoked)
 
-    def find_player_in_list(self, row, players_list):
+    def find_player_in_list(self, row, players_by_id):
         """
-        Tenta identificar o objeto Player correspondente à linha selecionada,
-        utilizando os dados (número e nome). Nesta nova ordem de colunas:
-            índice 0 -> número
-            índice 1 -> nome
-        A função primeiro tenta obter os atributos 'num' e 'nome' do row,
-        e se não encontrados, recorre a row.cells.
+        Devolve o objeto Player correspondente à linha selecionada, procurando o
+        id guardado na linha no índice id -> Player da respetiva lista.
         """
-        try:
-            # Tenta extrair diretamente dos atributos do row
-            numero_str = getattr(row, "num", None) or getattr(row, "número", None) or getattr(row, "numero", None)
-            nome_str = getattr(row, "nome", None)
-            if not numero_str or not nome_str:
-                if hasattr(row, "cells") and row.cells:
-                    cells = row.cells
-                    if len(cells) >= 2:
-                        numero_str = str(cells[0])
-                        nome_str = str(cells[1])
-                    else:
-                        return None
-                else:
-                    return None
-            for p in players_list:
-                if str(p.numero) == str(numero_str) and p.nome == nome_str:
-                    return p
-            return None
-        except Exception as e:
-            print("Erro em find_player_in_list:", e)
-            return None
+        return players_by_id.get(getattr(row, "id", None))
 
-    def load_jogo_planeado_players(self, jogo):
+    async def load_jogo_planeado_players(self, jogo):
         """
         Carrega os jogadores do escalão e clube do jogo e os separa nas listas:
         - available_players: jogadores disponíveis (mesmo clube e escalão) que ainda não foram convocados.
         - convoked_players: jogadores já convocados para o jogo.
         Armazena também a lista original de convocados para comparações posteriores.
         """
+        self.jogo_planeado_status.text = "A carregar jogadores..."
         try:
-            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
-            # Busca jogadores pelo escalão (ajuste o endpoint se necessário)
-            jogadores_response = requests.get(
-                f"{self.api_url}/api/jogadores?escalao={jogo.get('escalao')}",
-                headers=headers
-            )
-            if jogadores_response.status_code == 200:
-                all_players_data = jogadores_response.json()
-                # Filtra apenas jogadores do mesmo clube do jogo
-                self.available_players = [Player(**p) for p in all_players_data if p.get("clube") == jogo.get("clube")]
-            else:
+            # Busca, em simultâneo, o âmbito do jogo no plantel partilhado e os já convocados
+            roster_result, convoked_result = await self.within_load_ceiling(asyncio.gather(
+                self.roster.get(jogo.get("escalao"), jogo.get("clube")),
+                self.api.list_convocados(jogo.get("id")),
+                return_exceptions=True,
+            ))
+            for result in (roster_result, convoked_result):
+                if isinstance(result, Exception) and not isinstance(result, ApiError):
+                    raise result
+
+            if isinstance(roster_result, ApiError):
                 self.available_players = []
-
-            # Busca os jogadores já convocados para o jogo
-            conv_response = requests.get(
-                f"{self.api_url}/api/convocados/detalhes/{jogo.get('id')}",
-                headers=headers
-            )
-            if conv_response.status_code == 200:
-                convoked_data = conv_response.json()
-                self.convoked_players = [Player(**p) for p in convoked_data]
             else:
+                # Vista do plantel com os jogadores do escalão e do clube do jogo
+                self.available_players = roster_result
+
+            if isinstance(convoked_result, ApiError):
                 self.convoked_players = []
+            else:
+                # Reutiliza os objetos do plantel sempre que o jogador já lá exista
+                self.convoked_players = [
+                    self.roster.by_id.get(p.get("id")) or Player.from_dict(p) for p in convoked_result
+                ]
+
+            # Sobrepõe as alterações à convocatória ainda por enviar
+            pending_add, pending_remove, _ = self.outbox.pending_convocatoria(jogo.get("id"))
+            self.convoked_players = [p for p in self.convoked_players if p.id not in pending_remove]
+            known_ids = {p.id for p in self.convoked_players}
+            self.convoked_players += [
+                self.roster.by_id[i] for i in pending_add if i not in known_ids and i in self.roster.by_id
+            ]
 
             # Remove os jogadores já convocados da lista de disponíveis
             convoked_ids = {p.id for p in self.convoked_players}
             self.available_players = [p for p in self.available_players if p.id not in convoked_ids]
 
+            # Índices id -> Player usados na seleção das duas tabelas
+            self.available_by_id = {p.id: p for p in self.available_players}
+            self.convoked_by_id = {p.id: p for p in self.convoked_players}
+
             # Armazena a lista original de convocados para comparar alterações na convocatória
             self.original_convoked_players = self.convoked_players.copy()
 
             self.refresh_jogo_planeado_tables()
 
+        except asyncio.TimeoutError:
+            self.main_window.error_dialog("Erro", LOAD_TIMEOUT_MESSAGE)
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
+        finally:
+            self.jogo_planeado_status.text = ""
 
     def refresh_jogo_planeado_tables(self):
         """
@@ -1295,15 +1917,15 @@ class TeamTrackerMobile(toga.App):
         """
         available_rows = []
         for p in self.available_players:
-            foto_str = "Foto" if p.foto else "Sem foto"
-            available_rows.append([foto_str, str(p.numero), p.nome, p.posicao])
-        self.available_table.data = available_rows
+            foto_str = self.thumbnails.cell(p.foto)
+            available_rows.append((p.id, [foto_str, str(p.numero), p.nome, p.posicao]))
+        self.available_binding.update(available_rows)
 
         convoked_rows = []
         for p in self.convoked_players:
-            foto_str = "Foto" if p.foto else "Sem foto"
-            convoked_rows.append([foto_str, str(p.numero), p.nome, p.posicao])
-        self.convoked_table.data = convoked_rows
+            foto_str = self.thumbnails.cell(p.foto)
+            convoked_rows.append((p.id, [foto_str, str(p.numero), p.nome, p.posicao]))
+        self.convoked_binding.update(convoked_rows)
 
 
     def add_convoked(self, widget):
@@ -1316,6 +1938,7 @@ class TeamTrackerMobile(toga.App):
         player = self.selected_available
         self.available_players = [p for p in self.available_players if p.id != player.id]
         self.convoked_players.append(player)
+        self.convoked_by_id[player.id] = self.available_by_id.pop(player.id)
         self.selected_available = None
         self.refresh_jogo_planeado_tables()
 
@@ -1329,16 +1952,16 @@ class TeamTrackerMobile(toga.App):
         player = self.selected_convoked
         self.convoked_players = [p for p in self.convoked_players if p.id != player.id]
         self.available_players.append(player)
+        self.available_by_id[player.id] = self.convoked_by_id.pop(player.id)
         self.selected_convoked = None
         self.refresh_jogo_planeado_tables()
 
-    def confirm_convocation(self, widget):
+    async def confirm_convocation(self, widget):
         """
         Compara as listas original e atual de convocados, identifica os jogadores adicionados e removidos,
         envia as chamadas à API correspondentes e atualiza o estado do jogo para "Em Curso".
         """
         try:
-            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
             jogo_id = self.jogo_selecionado.get("id")
             original_ids = {p.id for p in self.original_convoked_players} if hasattr(self, "original_convoked_players") else set()
             current_ids = {p.id for p in self.convoked_players}
@@ -1347,40 +1970,30 @@ class TeamTrackerMobile(toga.App):
             added_ids = list(current_ids - original_ids)
             removed_ids = list(original_ids - current_ids)
 
-            # Se houver jogadores removidos, envia DELETE em lote
-            if removed_ids:
-                del_payload = {"jogadores": removed_ids}
-                del_url = f"{self.api_url}/api/convocados/remover-varios/{jogo_id}"
-                del_response = requests.delete(del_url, json=del_payload, headers=headers)
-                if del_response.status_code not in (200, 204):
-                    self.main_window.error_dialog("Erro", "Falha ao remover alguns jogadores da convocatória.")
-                    return
-
-            # Se houver jogadores adicionados, envia POST
-            if added_ids:
-                add_payload = {"jogadores": added_ids}
-                add_url = f"{self.api_url}/api/convocados/{jogo_id}"
-                add_response = requests.post(add_url, json=add_payload, headers=headers)
-                if add_response.status_code not in (200, 201):
-                    self.main_window.error_dialog("Erro", "Falha ao adicionar alguns jogadores à convocatória.")
-                    return
-
-            # Atualiza o estado do jogo para "Em Curso" via PATCH
-            patch_url = f"{self.api_url}/api/jogos/{jogo_id}/estado"
-            new_status = "Em Curso"
-            patch_response = requests.patch(patch_url, json=new_status, headers={"Content-Type": "application/json"})
-            if patch_response.status_code in (200, 204):
+            # Aplica já o novo estado localmente; remoções, adições e o PATCH do estado
+            # seguem como uma única operação do diário
+            estado_anterior = self.jogo_selecionado.get("estado")
+            self.jogo_selecionado = dict(self.jogo_selecionado, estado="Em Curso")
+            self.games_store.put_local(self.jogo_selecionado)
+            self.original_convoked_players = self.convoked_players.copy()
+            sent = await self.submit(("convocatoria", {
+                "jogo_id": jogo_id,
+                "adicionar": added_ids,
+                "remover": removed_ids,
+                "estado": "Em Curso",
+                # Para repor o estado se o servidor recusar a convocatória
+                "estado_anterior": estado_anterior,
+            }))
+            if sent:
                 self.main_window.info_dialog("Sucesso", "Convocatória confirmada e jogo iniciado!")
-                # Aqui você pode chamar o método para abrir a tela "Jogo Em Curso"
-                # ex: self.show_jogo_em_curso(self.jogo_selecionado)
-            else:
-                self.main_window.error_dialog("Erro", "Falha ao atualizar o estado do jogo.")
+            # Aqui você pode chamar o método para abrir a tela "Jogo Em Curso"
+            # ex: self.show_jogo_em_curso(self.jogo_selecionado)
         except Exception as e:
             self.main_window.error_dialog("Erro", str(e))
 
     # MÉTODOS DE VISUALIZAÇÃO DO JOGO
 
-    def ver_jogo(self, widget):
+    async def ver_jogo(self, widget):
         """
         Método final para "Ver Jogo". Verifica o estado do jogo selecionado e
         invoca a visualização correspondente:
@@ -1397,7 +2010,7 @@ class TeamTrackerMobile(toga.App):
         if estado.startswith("Resultado:"):
             self.show_jogo_terminado(self.jogo_selecionado)
         elif estado == "Planeado":
-            self.show_jogo_planeado(self.jogo_selecionado)
+            await self.show_jogo_planeado(self.jogo_selecionado)
         elif estado == "Em Curso":
             self.show_jogo_em_curso(self.jogo_selecionado)
         else:
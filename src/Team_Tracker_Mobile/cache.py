@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlencode
+
+# Orçamento (em bytes) para os corpos guardados; acima dele saem as entradas obtidas há mais tempo
+DISK_BUDGET = 16 * 1024 * 1024
+
+CachedResponse = namedtuple("CachedResponse", ["body", "etag", "last_modified", "fetched_at"])
+
+
+class ResponseCache:
+    """
+    Cache persistente (SQLite, no dispositivo) das respostas GET da API.
+
+    Cada entrada é indexada pelo endpoint e pela query e guarda o corpo da
+    resposta juntamente com os validadores (ETag / Last-Modified), para que o
+    ApiClient possa enviar pedidos condicionais e tratar um 304 como uma
+    leitura local. A ligação é partilhada pelas threads do ApiClient, daí o lock.
+
+    Tal como o disco do ThumbnailCache, o cache tem um orçamento: ao guardar,
+    saem as entradas obtidas (ou revalidadas) há mais tempo até os corpos
+    caberem em `disk_budget`. A entrada acabada de guardar fica sempre.
+    """
+
+    def __init__(self, path, disk_budget=DISK_BUDGET):
+        self.disk_budget = disk_budget
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS respostas ("
+                " chave TEXT PRIMARY KEY,"
+                " corpo BLOB NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " obtido_em REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def make_key(scope, path, params=None):
+        """Chave da entrada: âmbito (utilizador) + endpoint + query ordenada."""
+        query = urlencode(sorted((params or {}).items()))
+        return f"{scope}:{path}?{query}"
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT corpo, etag, last_modified, obtido_em FROM respostas WHERE chave = ?",
+                (key,),
+            ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def put(self, key, body, etag=None, last_modified=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas (chave, corpo, etag, last_modified, obtido_em)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, body, etag, last_modified, time.time()),
+            )
+            self._evict(key)
+
+    def _evict(self, keep):
+        """Remove as entradas obtidas há mais tempo até os corpos caberem no orçamento."""
+        total = self._conn.execute("SELECT COALESCE(SUM(LENGTH(corpo)), 0) FROM respostas").fetchone()[0]
+        if total <= self.disk_budget:
+            return
+        rows = self._conn.execute(
+            "SELECT chave, LENGTH(corpo) FROM respostas WHERE chave != ? ORDER BY obtido_em", (keep,)
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.disk_budget:
+                break
+            self._conn.execute("DELETE FROM respostas WHERE chave = ?", (key,))
+            total -= size
+
+    def touch(self, key):
+        """Marca a entrada como revalidada agora (após um 304)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE respostas SET obtido_em = ? WHERE chave = ?", (time.time(), key)
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM respostas")
@@ -0,0 +1,58 @@
+import threading
+import time
+
+# Falhas seguidas (rede, timeouts ou 5xx) que abrem o circuito
+BREAKER_THRESHOLD = 5
+# Tempo (em segundos) com o circuito aberto antes de deixar passar um pedido de teste
+BREAKER_COOLDOWN = 30
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker dos pedidos ao backend.
+
+    Depois de `threshold` falhas seguidas o circuito abre: durante `cooldown`
+    segundos allow() recusa os pedidos, que falham logo em vez de esperarem
+    pelos timeouts (o ApiClient serve as listagens a partir do cache). Passado
+    esse tempo deixa passar um único pedido de teste: se correr bem o circuito
+    fecha, se falhar volta a abrir.
+
+    É partilhado pelas threads do ApiClient, daí o lock.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def is_open(self):
+        """True enquanto o backend é dado como em falha (inclui o pedido de teste em curso)."""
+        return self._opened_at is not None
+
+    def allow(self):
+        """Indica se um pedido pode seguir para a rede."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or self.clock() - self._opened_at < self.cooldown:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = self.clock()
+            self._probing = False
@@ -0,0 +1,114 @@
+import base64
+import json
+import os
+import time
+
+# Antecedência (em segundos) com que o token é renovado antes de expirar
+REFRESH_MARGIN = 5 * 60
+# Entrada do token no cofre de credenciais do sistema
+VAULT_SERVICE = "com.example.teamtrackermobile"
+VAULT_KEY = "sessao"
+
+
+def system_vault():
+    """
+    Cofre de credenciais do sistema (keyring: Keychain no macOS, Credential
+    Manager no Windows, Secret Service no Linux), ou None se o pacote não
+    estiver instalado ou não houver cofre utilizável (p.ex. Android e iOS).
+    """
+    try:
+        import keyring
+        from keyring.backends import fail
+    except ImportError:
+        return None
+    try:
+        if isinstance(keyring.get_keyring(), fail.Keyring):
+            return None
+    except Exception as e:
+        print("Cofre de credenciais indisponível:", e)
+        return None
+    return keyring
+
+
+def token_expiry(token):
+    """
+    Instante (epoch) em que um JWT expira, lido do campo "exp" do payload.
+    A assinatura não é verificada (isso é trabalho do servidor). Devolve None
+    se o token não for um JWT ou não tiver expiração.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (AttributeError, IndexError, ValueError):
+        return None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+class SessionStore:
+    """
+    Sessão guardada no dispositivo: token de acesso, nome de utilizador e perfil
+    (/api/auth/me). Permite abrir logo a página inicial no arranque seguinte,
+    sem os pedidos de login e de perfil.
+
+    Com um cofre (`vault`, com a interface do keyring) o token é guardado
+    nele e o ficheiro fica só com o perfil. Sem cofre, ou se o cofre falhar,
+    o token vai para o ficheiro. O ficheiro fica na pasta de dados privada da
+    aplicação e é criado só com leitura e escrita para o dono (0600). A escrita
+    passa por um ficheiro temporário, para nunca deixar uma sessão a meio.
+    """
+
+    def __init__(self, path, vault=None):
+        self.path = path
+        self.vault = vault
+
+    def load(self):
+        """Devolve {"token", "username", "user_info"}, ou None se não houver sessão válida."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print("Sessão guardada inválida:", e)
+            return None
+        if not isinstance(session, dict) or not isinstance(session.get("user_info"), dict):
+            return None
+        token = session.get("token")
+        if not token and session.get("cofre") and self.vault is not None:
+            try:
+                token = self.vault.get_password(VAULT_SERVICE, VAULT_KEY)
+            except Exception as e:
+                print("Erro ao ler o token do cofre:", e)
+        if not token:
+            return None
+        expiry = token_expiry(token)
+        if expiry is not None and expiry <= time.time():
+            self.clear()
+            return None
+        return {"token": token, "username": session.get("username"), "user_info": session["user_info"]}
+
+    def save(self, token, username, user_info):
+        session = {"username": username, "user_info": user_info}
+        if self.vault is not None:
+            try:
+                self.vault.set_password(VAULT_SERVICE, VAULT_KEY, token)
+                session["cofre"] = True
+            except Exception as e:
+                print("Erro ao guardar o token no cofre, fica no ficheiro:", e)
+        if not session.get("cofre"):
+            session["token"] = token
+        temp_path = self.path.with_name(self.path.name + ".part")
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(session, f)
+        os.chmod(temp_path, 0o600)  # o ficheiro pode já existir com outras permissões
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+        if self.vault is not None:
+            try:
+                self.vault.delete_password(VAULT_SERVICE, VAULT_KEY)
+            except Exception:
+                pass  # não havia token no cofre
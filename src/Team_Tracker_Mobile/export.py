@@ -0,0 +1,158 @@
+import csv
+import math
+import os
+import re
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+# Colunas exportadas a partir do ecrã de Estatísticas
+STATS_HEADER = [
+    "Número", "Nome", "Escalão", "Clube", "Jogos", "Golos", "Assistências", "CA", "CV", "TTU",
+    "Golos por jogo", "Assistências por jogo", "Minutos por golo", "Cartões por jogo",
+]
+
+# De quantas em quantas linhas é comunicado o progresso
+PROGRESS_EVERY = 500
+
+# Caracteres de controlo que não são permitidos em XML
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def stats_records(engine, rows):
+    """
+    Gera, linha a linha, os registos a exportar a partir do StatsEngine,
+    pela ordem de `rows` (índices da vista colunar). Nada é acumulado em memória.
+    """
+    columns = engine.columns
+    stats = columns.stats
+    derived = engine.derived
+    for i in rows:
+        minutos_por_golo = derived["minutos_por_golo"][i]
+        yield [
+            columns.numero[i],
+            columns.nome[i],
+            columns.escalao[i],
+            columns.clube[i],
+            stats["jogosParticipados"][i],
+            stats["golosMarcados"][i],
+            stats["assistencias"][i],
+            stats["CA"][i],
+            stats["CV"][i],
+            stats["TTU"][i],
+            round(derived["golos_por_jogo"][i], 2),
+            round(derived["assistencias_por_jogo"][i], 2),
+            None if minutos_por_golo == math.inf else round(minutos_por_golo, 1),
+            round(derived["cartoes_por_jogo"][i], 2),
+        ]
+
+
+def write_csv(file, header, records, progress=None):
+    """Escreve os registos em CSV (aspas e separadores tratados pelo módulo csv)."""
+    writer = csv.writer(file)
+    writer.writerow(header)
+    count = 0
+    for record in records:
+        writer.writerow(["" if value is None else value for value in record])
+        count += 1
+        if progress is not None and count % PROGRESS_EVERY == 0:
+            progress(count)
+    return count
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml"'
+    ' ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml"'
+    ' ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1"'
+    ' Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"'
+    ' Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Estatísticas" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1"'
+    ' Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"'
+    ' Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None:
+            cells.append("<c/>")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f"<c><v>{value}</v></c>")
+        else:
+            text = escape(_XML_ILLEGAL.sub("", str(value)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return "<row>" + "".join(cells) + "</row>"
+
+
+def write_xlsx(file, header, records, progress=None):
+    """
+    Escreve os registos numa folha XLSX mínima (uma folha, strings inline).
+    A folha é escrita em streaming para dentro do zip, sem montar o XML em memória.
+    """
+    count = 0
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _XLSX_WORKBOOK)
+        archive.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(header).encode("utf-8"))
+            for record in records:
+                sheet.write(_xlsx_row(record).encode("utf-8"))
+                count += 1
+                if progress is not None and count % PROGRESS_EVERY == 0:
+                    progress(count)
+            sheet.write(b"</sheetData></worksheet>")
+    return count
+
+
+def export_table(path, header, records, progress=None):
+    """
+    Exporta para `path` em CSV ou XLSX (conforme a extensão) e devolve o número de linhas.
+    Escreve primeiro num ficheiro temporário ao lado, para nunca deixar um ficheiro a meio.
+    """
+    path = Path(path)
+    temp_path = path.with_name(path.name + ".part")
+    try:
+        if path.suffix.lower() == ".xlsx":
+            with open(temp_path, "wb") as file:
+                count = write_xlsx(file, header, records, progress)
+        else:
+            with open(temp_path, "w", encoding="utf-8", newline="") as file:
+                count = write_csv(file, header, records, progress)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    if progress is not None:
+        progress(count)
+    return count
@@ -0,0 +1,147 @@
+import codecs
+import json
+
+_WHITESPACE = " \t\n\r"
+# Caracteres com que um número ainda pode continuar (p.ex. "2", "2." ou "2e-")
+_NUMBER_TAIL = "0123456789.eE+-"
+
+
+def _skip_whitespace(text, pos):
+    while pos < len(text) and text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _may_continue(text, end):
+    """Um valor seguido só de restos de número até ao fim do bloco pode continuar no bloco seguinte."""
+    return text[end:].strip(_NUMBER_TAIL) == ""
+
+
+class JsonArrayStream:
+    """
+    Leitura incremental de uma listagem JSON, à medida que os bytes chegam.
+
+    Aceita uma lista no topo ([...]) ou um objeto em que a chave `items_key` é
+    uma lista ({"items": [...], "next_cursor": ...}). feed() devolve os
+    elementos da lista que já ficaram completos, sem esperar pelo fim do corpo
+    e sem construir a árvore inteira em memória; as restantes chaves do objeto
+    ficam em `meta`. close() confirma que o documento terminou.
+    """
+
+    def __init__(self, items_key="items"):
+        self.items_key = items_key
+        self.meta = {}
+        # True se o topo for uma lista, False se for um objeto (None até se saber)
+        self.is_list = None
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = "start"
+        self._key = None
+
+    def feed(self, chunk, final=False):
+        """Acrescenta um bloco de bytes e devolve a lista de elementos completos."""
+        self._buffer += self._text.decode(chunk, final)
+        text = self._buffer
+        decode = self._decoder.raw_decode
+        state = self._state
+        items = []
+        pos = 0
+        while True:
+            pos = _skip_whitespace(text, pos)
+            if pos == len(text):
+                break
+            char = text[pos]
+
+            if state == "start":
+                if char == "[":
+                    self.is_list = True
+                    state = "first_item"
+                elif char == "{":
+                    self.is_list = False
+                    state = "first_key"
+                else:
+                    raise ValueError("Listagem JSON inválida: esperava '[' ou '{'")
+                pos += 1
+
+            elif state in ("first_item", "item"):
+                if char == "]" and state == "first_item":
+                    state = "done" if self.is_list else "member_sep"
+                    pos += 1
+                    continue
+                try:
+                    value, end = decode(text, pos)
+                except json.JSONDecodeError:
+                    break  # elemento ainda incompleto
+                # Um número no fim do bloco pode continuar no bloco seguinte
+                if not final and _may_continue(text, end):
+                    break
+                items.append(value)
+                pos = end
+                state = "item_sep"
+
+            elif state == "item_sep":
+                if char == ",":
+                    state = "item"
+                elif char == "]":
+                    state = "done" if self.is_list else "member_sep"
+                else:
+                    raise ValueError("Listagem JSON inválida: esperava ',' ou ']'")
+                pos += 1
+
+            elif state in ("first_key", "key"):
+                if char == "}" and state == "first_key":
+                    state = "done"
+                    pos += 1
+                    continue
+                if char != '"':
+                    raise ValueError("Listagem JSON inválida: esperava uma chave")
+                try:
+                    self._key, pos = decode(text, pos)
+                except json.JSONDecodeError:
+                    break
+                state = "colon"
+
+            elif state == "colon":
+                if char != ":":
+                    raise ValueError("Listagem JSON inválida: esperava ':'")
+                pos += 1
+                state = "value"
+
+            elif state == "value":
+                if self._key == self.items_key and char == "[":
+                    state = "first_item"
+                    pos += 1
+                    continue
+                try:
+                    value, end = decode(text, pos)
+                except json.JSONDecodeError:
+                    break
+                if not final and _may_continue(text, end):
+                    break
+                self.meta[self._key] = value
+                pos = end
+                state = "member_sep"
+
+            elif state == "member_sep":
+                if char == ",":
+                    state = "key"
+                elif char == "}":
+                    state = "done"
+                else:
+                    raise ValueError("Listagem JSON inválida: esperava ',' ou '}'")
+                pos += 1
+
+            else:
+                raise ValueError("Listagem JSON inválida: dados após o fim")
+
+        self._buffer = text[pos:]
+        self._state = state
+        return items
+
+    def close(self):
+        """Processa o que falta no buffer; falha se o documento estiver incompleto."""
+        items = self.feed(b"", final=True)
+        if self._state != "done":
+            raise ValueError("Listagem JSON incompleta")
+        return items
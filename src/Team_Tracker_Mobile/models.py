@@ -0,0 +1,70 @@
+import sys
+
+
+def _intern(value):
+    """Interna strings repetidas (escalão, clube, posição), para que todos os jogadores partilhem o mesmo objeto."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+# Classe auxiliar que representa um jogador, incluindo estatísticas.
+# Usa __slots__ (sem __dict__ por instância) para reduzir a memória ocupada por cada jogador.
+class Player:
+    __slots__ = (
+        "id", "nome", "numero", "posicao", "escalao", "clube", "foto",
+        "golosMarcados", "assistencias", "TTU", "jogosParticipados", "CA", "CV",
+    )
+
+    def __init__(
+        self,
+        id,
+        nome,
+        numero,
+        posicao,
+        escalao,
+        clube,
+        foto=None,
+        golosMarcados=0,
+        assistencias=0,
+        TTU=0,
+        jogosParticipados=0,
+        CA=0,
+        CV=0,
+    ):
+        self.id = id
+        self.nome = nome
+        self.numero = numero
+        self.posicao = _intern(posicao)
+        self.escalao = _intern(escalao)
+        self.clube = _intern(clube)
+        self.foto = foto
+        self.golosMarcados = golosMarcados
+        self.assistencias = assistencias
+        self.TTU = TTU
+        self.jogosParticipados = jogosParticipados
+        self.CA = CA
+        self.CV = CV
+
+    @classmethod
+    def from_dict(cls, p):
+        """Cria um Player a partir do dicionário devolvido pela API (ignora campos extra)."""
+        return cls(
+            id=p.get("id"),
+            nome=p.get("nome"),
+            numero=p.get("numero"),
+            posicao=p.get("posicao"),
+            escalao=p.get("escalao"),
+            clube=p.get("clube"),
+            foto=p.get("foto"),
+            golosMarcados=p.get("golosMarcados", 0),
+            assistencias=p.get("assistencias", 0),
+            TTU=p.get("TTU", 0),
+            jogosParticipados=p.get("jogosParticipados", 0),
+            CA=p.get("CA", 0),
+            CV=p.get("CV", 0)
+        )
+
+    def __str__(self):
+        return f"{self.numero} - {self.nome}"
+
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,397 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+from .api import ApiError
+
+# Espera (em segundos) antes de repetir após uma falha de rede; duplica até RETRY_MAX
+RETRY_BASE = 2
+RETRY_MAX = 300
+
+# Campos dos dados de uma operação que podem conter ids (locais ou do servidor)
+_ID_FIELDS = ("id", "jogo_id", "jogador_id")
+_ID_LIST_FIELDS = ("adicionar", "remover")
+# Operações que não podem ser repetidas às cegas: um segundo POST criaria um duplicado
+_CREATE_TYPES = ("create_game", "create_player")
+
+# Descrição de cada tipo de operação, usada nas mensagens ao utilizador
+OPERATION_LABELS = {
+    "create_game": "Agendar jogo",
+    "delete_game": "Remover jogo",
+    "create_player": "Adicionar jogador",
+    "delete_player": "Remover jogador",
+    "upload_photo": "Enviar foto",
+    "convocatoria": "Convocatória",
+}
+
+Operation = namedtuple("Operation", ["id", "tipo", "dados", "tentativas"])
+# applied: lista de (operação com os ids já traduzidos, resposta do servidor)
+ReplayResult = namedtuple("ReplayResult", ["sent", "conflicts", "blocked", "pending", "applied"])
+
+
+class Outbox:
+    """
+    Diário persistente (SQLite, no dispositivo) das alterações ainda não enviadas.
+
+    Os ecrãs registam cada alteração com enqueue() e aplicam-na logo ao estado
+    local; replay() envia as operações pela ordem em que foram feitas. Uma falha
+    de rede (ou um 5xx, ou um 401 de sessão expirada) pára o envio e mantém a
+    operação para a próxima tentativa; os outros erros 4xx são conflitos: a
+    operação é descartada e reportada.
+    Apagar algo que já não existe (404) conta como feito.
+
+    Uma criação só volta a ser tentada se o pedido de certeza não chegou ao
+    servidor (falha ao ligar); depois de um timeout de leitura pode já ter sido
+    feita, e é tratada como conflito. Falhas locais (p.ex. a foto guardada já
+    não existe) e respostas ilegíveis também são conflitos: repetir não ajudaria.
+
+    Entidades criadas sem ligação recebem um id local negativo; quando a
+    criação chega ao servidor, o id real fica registado e as operações
+    seguintes que usam o id local são traduzidas antes do envio.
+
+    Ao registar, as operações redundantes são fundidas: criar e apagar a mesma
+    entidade anulam-se, e convocar e desconvocar o mesmo jogador também.
+    """
+
+    def __init__(self, path, user=""):
+        self.user = user
+        self._conn = sqlite3.connect(str(path))
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS operacoes ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " utilizador TEXT NOT NULL,"
+                " tipo TEXT NOT NULL,"
+                " dados TEXT NOT NULL,"
+                " criado_em REAL NOT NULL,"
+                " tentativas INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ids_locais ("
+                " local INTEGER PRIMARY KEY,"
+                " real INTEGER NOT NULL)"
+            )
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        # Operação a ser enviada neste momento (não pode ser fundida nem anulada)
+        self._in_flight = None
+        self._last_local_id = 0
+
+    # ---------------------------
+    # Registo de operações
+    # ---------------------------
+    def new_local_id(self):
+        """Id negativo e único para uma entidade criada no dispositivo."""
+        local_id = -int(time.time() * 1000)
+        if local_id >= self._last_local_id:
+            local_id = self._last_local_id - 1
+        self._last_local_id = local_id
+        return local_id
+
+    def pending(self):
+        rows = self._conn.execute(
+            "SELECT id, tipo, dados, tentativas FROM operacoes WHERE utilizador = ? ORDER BY id",
+            (self.user,),
+        ).fetchall()
+        return [Operation(op_id, tipo, json.loads(dados), tentativas) for op_id, tipo, dados, tentativas in rows]
+
+    def _get(self, op_id):
+        """Operação com o id indicado, tal como está agora no diário (ou None se já lá não estiver)."""
+        row = self._conn.execute(
+            "SELECT id, tipo, dados, tentativas FROM operacoes WHERE id = ?", (op_id,)
+        ).fetchone()
+        return Operation(row[0], row[1], json.loads(row[2]), row[3]) if row else None
+
+    def __len__(self):
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM operacoes WHERE utilizador = ?", (self.user,)
+        ).fetchone()[0]
+
+    def enqueue(self, tipo, dados):
+        """Regista uma operação (já fundida com as pendentes) e acorda o envio."""
+        with self._conn:
+            self._coalesce(tipo, dados)
+        self._wakeup.set()
+
+    def wake(self):
+        """Pede uma nova tentativa de envio já (p.ex. quando um pedido à API voltou a funcionar)."""
+        self._wakeup.set()
+
+    def _coalesce(self, tipo, dados):
+        pending = [op for op in self.pending() if op.id != self._in_flight]
+
+        if tipo in ("delete_game", "delete_player"):
+            target = dados["id"]
+            create_type = "create_game" if tipo == "delete_game" else "create_player"
+            created_here = [op for op in pending if op.tipo == create_type and op.dados["local_id"] == target]
+            for op in pending:
+                # Operações sobre a entidade apagada deixam de fazer sentido
+                if tipo == "delete_game" and op.tipo == "convocatoria" and op.dados["jogo_id"] == target:
+                    self._delete(op.id)
+                elif tipo == "delete_player" and op.tipo == "upload_photo" and op.dados["jogador_id"] == target:
+                    self._delete(op.id)
+                    _remove_file(op.dados.get("ficheiro"))
+                elif tipo == "delete_player" and op.tipo == "convocatoria":
+                    merged = dict(op.dados)
+                    merged["adicionar"] = [i for i in op.dados["adicionar"] if i != target]
+                    self._update(op.id, merged)
+            if created_here:
+                # Criada e apagada sem nunca chegar ao servidor: nada a enviar
+                self._delete(created_here[0].id)
+                return
+            self._insert(tipo, dados)
+            return
+
+        if tipo == "convocatoria":
+            existing = [op for op in pending if op.tipo == "convocatoria" and op.dados["jogo_id"] == dados["jogo_id"]]
+            if existing:
+                op = existing[-1]
+                add = list(op.dados["adicionar"])
+                remove = list(op.dados["remover"])
+                for jogador_id in dados["adicionar"]:
+                    if jogador_id in remove:
+                        remove.remove(jogador_id)
+                    elif jogador_id not in add:
+                        add.append(jogador_id)
+                for jogador_id in dados["remover"]:
+                    if jogador_id in add:
+                        add.remove(jogador_id)
+                    elif jogador_id not in remove:
+                        remove.append(jogador_id)
+                merged = dict(op.dados, adicionar=add, remover=remove, estado=dados.get("estado") or op.dados.get("estado"))
+                if not add and not remove and not merged["estado"]:
+                    self._delete(op.id)
+                else:
+                    self._update(op.id, merged)
+                return
+            if not dados["adicionar"] and not dados["remover"] and not dados.get("estado"):
+                return
+
+        self._insert(tipo, dados)
+
+    def _insert(self, tipo, dados):
+        self._conn.execute(
+            "INSERT INTO operacoes (utilizador, tipo, dados, criado_em) VALUES (?, ?, ?, ?)",
+            (self.user, tipo, json.dumps(dados), time.time()),
+        )
+
+    def _update(self, op_id, dados):
+        self._conn.execute("UPDATE operacoes SET dados = ? WHERE id = ?", (json.dumps(dados), op_id))
+
+    def _delete(self, op_id):
+        self._conn.execute("DELETE FROM operacoes WHERE id = ?", (op_id,))
+
+    # ---------------------------
+    # Consultas usadas para sobrepor o estado local aos dados do servidor
+    # ---------------------------
+    def local_ids(self, tipo):
+        """Ids locais das entidades criadas (tipo "create_game"/"create_player") ainda por enviar."""
+        return {op.dados["local_id"] for op in self.pending() if op.tipo == tipo}
+
+    def deleted_ids(self, tipo):
+        """Ids das entidades com remoção (tipo "delete_game"/"delete_player") ainda por enviar."""
+        return {op.dados["id"] for op in self.pending() if op.tipo == tipo}
+
+    def pending_convocatoria(self, jogo_id):
+        """(adicionar, remover, estado) ainda por enviar para um jogo."""
+        add, remove, estado = set(), set(), None
+        for op in self.pending():
+            if op.tipo == "convocatoria" and op.dados["jogo_id"] == jogo_id:
+                add.update(op.dados["adicionar"])
+                remove.update(op.dados["remover"])
+                estado = op.dados.get("estado") or estado
+        return add, remove, estado
+
+    # ---------------------------
+    # Envio
+    # ---------------------------
+    def _real_id(self, value):
+        if not isinstance(value, int) or value >= 0:
+            return value
+        row = self._conn.execute("SELECT real FROM ids_locais WHERE local = ?", (value,)).fetchone()
+        return row[0] if row else value
+
+    def _resolve(self, dados):
+        """Traduz os ids locais para os do servidor; devolve None se algum ainda não existir."""
+        resolved = dict(dados)
+        for field in _ID_FIELDS:
+            if field in resolved:
+                resolved[field] = self._real_id(resolved[field])
+                if isinstance(resolved[field], int) and resolved[field] < 0:
+                    return None
+        for field in _ID_LIST_FIELDS:
+            if field in resolved:
+                resolved[field] = [self._real_id(i) for i in resolved[field]]
+                if any(isinstance(i, int) and i < 0 for i in resolved[field]):
+                    return None
+        return resolved
+
+    async def replay(self, api, progress=None, upload_progress=None):
+        """
+        Envia as operações pendentes, por ordem. progress(enviadas, total) é chamado
+        após cada operação. Devolve um ReplayResult.
+
+        Enquanto se espera pela rede, enqueue() pode fundir ou anular operações
+        ainda por enviar; por isso cada uma é relida do diário mesmo antes do
+        envio, e as que entretanto desapareceram são saltadas.
+        """
+        import requests
+
+        async with self._lock:
+            op_ids = [op.id for op in self.pending()]
+            sent = 0
+            conflicts = []
+            applied = []
+            for op_id in op_ids:
+                op = self._get(op_id)
+                if op is None:
+                    continue  # anulada entretanto (p.ex. criada e apagada)
+                dados = self._resolve(op.dados)
+                if dados is None:
+                    # Depende de uma criação que foi rejeitada pelo servidor
+                    conflicts.append((op, "Depende de um registo que não foi criado."))
+                    with self._conn:
+                        self._delete(op.id)
+                    if op.tipo == "upload_photo":
+                        _remove_file(op.dados.get("ficheiro"))
+                    continue
+                self._in_flight = op.id
+                try:
+                    entity = await self._apply(api, op, dados, upload_progress)
+                    applied.append((op._replace(dados=dados), entity))
+                except ApiError as e:
+                    # 401: a sessão expirou; a operação espera pelo próximo login em vez de se perder
+                    if e.status_code >= 500 or e.status_code in (401, 408, 429):
+                        self._failed_attempt(op)
+                        return ReplayResult(sent, conflicts, True, len(self), applied)
+                    if e.status_code == 404 and op.tipo.startswith("delete"):
+                        applied.append((op._replace(dados=dados), None))
+                    else:
+                        conflicts.append((op, e.detail or f"HTTP {e.status_code}"))
+                except requests.RequestException as e:
+                    if isinstance(e, ValueError):
+                        # requests.JSONDecodeError: o servidor respondeu, mas não com JSON válido
+                        conflicts.append((op, "Resposta inválida do servidor."))
+                    elif op.tipo in _CREATE_TYPES and not isinstance(e, requests.ConnectionError):
+                        conflicts.append((op, "O servidor não respondeu a tempo; o registo pode já ter sido criado."))
+                    else:
+                        print("Sem ligação ao enviar alterações:", e)
+                        self._failed_attempt(op)
+                        return ReplayResult(sent, conflicts, True, len(self), applied)
+                except (OSError, ValueError) as e:
+                    print("Erro ao preparar o envio de uma alteração:", e)
+                    conflicts.append((op, "Não foi possível preparar o envio."))
+                finally:
+                    self._in_flight = None
+                with self._conn:
+                    self._delete(op.id)
+                if op.tipo == "upload_photo":
+                    _remove_file(op.dados.get("ficheiro"))
+                sent += 1
+                if progress is not None:
+                    progress(sent, len(op_ids))
+            return ReplayResult(sent, conflicts, False, len(self), applied)
+
+    def _failed_attempt(self, op):
+        with self._conn:
+            self._conn.execute("UPDATE operacoes SET tentativas = tentativas + 1 WHERE id = ?", (op.id,))
+
+    async def _apply(self, api, op, dados, upload_progress):
+        """Envia uma operação; devolve a resposta do servidor (o registo criado), se houver."""
+        if op.tipo == "create_game":
+            created = await api.create_game(dados["payload"])
+            self._map_local_id(dados["local_id"], created)
+            return created
+        elif op.tipo == "delete_game":
+            await api.delete_game(dados["id"])
+        elif op.tipo == "create_player":
+            created = await api.create_player(dados["payload"])
+            self._map_local_id(dados["local_id"], created)
+            return created
+        elif op.tipo == "delete_player":
+            await api.delete_player(dados["id"])
+        elif op.tipo == "upload_photo":
+            with open(dados["ficheiro"], "rb") as f:
+                data = f.read()
+            return await api.upload_player_photo(
+                dados["jogador_id"], data, dados["filename"], dados["content_type"], progress=upload_progress
+            )
+        elif op.tipo == "convocatoria":
+            await self._apply_convocatoria(api, op, dados)
+        else:
+            raise ValueError(f"Operação desconhecida: {op.tipo}")
+        return None
+
+    async def _apply_convocatoria(self, api, op, dados):
+        """
+        Envia uma convocatória. Remoções e adições mexem em jogadores diferentes
+        (o diário já as fundiu), por isso seguem em simultâneo; o estado só muda
+        depois de as duas terem chegado. Cada passo aceite pelo servidor é logo
+        retirado da operação guardada, pelo que uma nova tentativa retoma onde a
+        anterior parou em vez de repetir pedidos já feitos.
+        """
+        steps = {}
+        if dados["remover"]:
+            steps["remover"] = api.remove_convocados(dados["jogo_id"], dados["remover"])
+        if dados["adicionar"]:
+            steps["adicionar"] = api.add_convocados(dados["jogo_id"], dados["adicionar"])
+        results = await asyncio.gather(*steps.values(), return_exceptions=True)
+        done = [step for step, result in zip(steps, results) if not isinstance(result, BaseException)]
+        if done:
+            with self._conn:
+                self._update(op.id, dict(op.dados, **{step: [] for step in done}))
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        if dados.get("estado"):
+            await api.set_game_state(dados["jogo_id"], dados["estado"])
+
+    def _map_local_id(self, local_id, created):
+        real_id = created.get("id") if isinstance(created, dict) else None
+        if real_id is None:
+            return
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ids_locais (local, real) VALUES (?, ?)", (local_id, real_id)
+            )
+
+    async def run(self, api, on_result, progress=None):
+        """
+        Ciclo em segundo plano: envia o que estiver pendente e, sem ligação,
+        volta a tentar com espera exponencial (RETRY_BASE, 2x, ... até RETRY_MAX).
+        on_result(ReplayResult) é chamado após cada tentativa. Um erro inesperado
+        é registado e tratado como uma falha de rede, para o ciclo não morrer.
+        """
+        delay = RETRY_BASE
+        while True:
+            if not len(self):
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            self._wakeup.clear()
+            try:
+                result = await self.replay(api, progress)
+                on_result(result)
+                blocked = result.blocked
+            except Exception as e:
+                print("Erro inesperado no envio de alterações:", repr(e))
+                blocked = True
+            if not blocked:
+                delay = RETRY_BASE
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, RETRY_MAX)
+
+
+def _remove_file(path):
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,44 @@
+import asyncio
+
+# Espera (em segundos) antes de começar, para a página inicial ser desenhada e ficar utilizável primeiro
+PREFETCH_DELAY = 0.5
+
+
+class Prefetcher:
+    """
+    Pré-carregamento em segundo plano dos dados dos ecrãs principais.
+
+    start() recebe funções assíncronas (p.ex. o get() de cada repositório) e
+    corre-as em simultâneo, com baixa prioridade: só depois de uma pequena
+    espera e sem mostrar erros ao utilizador (o ecrã volta a tentar quando for
+    aberto). Como os repositórios partilham downloads em curso, um ecrã aberto
+    a meio do pré-carregamento aproveita-o em vez de pedir tudo de novo.
+
+    cancel() interrompe o que ainda estiver a decorrer: os downloads que só o
+    pré-carregamento estava a usar são cancelados nos repositórios.
+    """
+
+    def __init__(self, delay=PREFETCH_DELAY):
+        self.delay = delay
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self, jobs):
+        """Cancela o pré-carregamento anterior e agenda as funções `jobs`."""
+        self.cancel()
+        self._task = asyncio.ensure_future(self._run(list(jobs)))
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, jobs):
+        await asyncio.sleep(self.delay)
+        results = await asyncio.gather(*(job() for job in jobs), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                print("Erro no pré-carregamento:", result)
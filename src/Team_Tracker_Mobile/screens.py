@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+import toga
+
+# Custo (aproximado) que os ecrãs escondidos podem ocupar em memória; acima
+# dele, os usados há mais tempo são descartados. Um ecrã simples custa 1 e um
+# ecrã com tabelas grandes custa mais (ver ScreenManager.get)
+SCREEN_BUDGET = 4
+
+
+class _Screen:
+    __slots__ = ("content", "cost", "release")
+
+    def __init__(self, content, cost, release):
+        self.content = content
+        self.cost = cost
+        self.release = release
+
+
+class ScreenManager:
+    """
+    Cache dos ecrãs já construídos (árvores de widgets e janelas).
+
+    get() constrói cada ecrã uma única vez e devolve-o de novo nas aberturas
+    seguintes: quem o mostra só tem de o religar aos dados atuais. Os ecrãs
+    escondidos ficam numa LRU limitada por SCREEN_BUDGET; quando a passam, os
+    menos usados são descartados: as janelas são fechadas e release() larga as
+    referências que a aplicação guardava para os seus widgets.
+    """
+
+    def __init__(self, budget=SCREEN_BUDGET):
+        self.budget = budget
+        # nome -> _Screen, do menos para o mais recentemente mostrado
+        self._screens = OrderedDict()
+        self._visible = set()
+
+    def __contains__(self, name):
+        return name in self._screens
+
+    def __getitem__(self, name):
+        return self._screens[name].content
+
+    def get(self, name, build, cost=1, release=None):
+        """Devolve o ecrã `name` (construído por build() se ainda não existir) e marca-o como visível."""
+        screen = self._screens.get(name)
+        if screen is None:
+            screen = self._screens[name] = _Screen(build(), cost, release)
+        self._screens.move_to_end(name)
+        self._visible.add(name)
+        return screen.content
+
+    def hidden(self, name):
+        """O ecrã deixou de estar à vista: continua em cache, mas pode ser descartado."""
+        self._visible.discard(name)
+        self._evict()
+
+    def discard(self, name):
+        screen = self._screens.pop(name, None)
+        self._visible.discard(name)
+        if screen is None:
+            return
+        if isinstance(screen.content, toga.Window):
+            screen.content.close()
+        if screen.release is not None:
+            screen.release()
+
+    def clear(self):
+        """Descarta todos os ecrãs (p.ex. ao terminar sessão: foram construídos para outro utilizador)."""
+        for name in list(self._screens):
+            self.discard(name)
+
+    def _evict(self):
+        hidden = [name for name in self._screens if name not in self._visible]
+        cost = sum(self._screens[name].cost for name in hidden)
+        for name in hidden:
+            if cost <= self.budget:
+                break
+            cost -= self._screens[name].cost
+            self.discard(name)
@@ -0,0 +1,38 @@
+import json
+import os
+
+
+class Settings:
+    """
+    Preferências do utilizador guardadas no dispositivo (um JSON na pasta de
+    configuração da aplicação). Chaves desconhecidas ficam com o valor de DEFAULTS.
+    """
+
+    DEFAULTS = {
+        # Poupança de dados: sem pré-carregamento em segundo plano
+        "poupanca_dados": False,
+        # Tempo máximo (em segundos) à espera dos dados de um ecrã antes de desistir
+        "tempo_maximo_carregamento": 20,
+    }
+
+    def __init__(self, path):
+        self.path = path
+        self._values = dict(self.DEFAULTS)
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._values.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print("Preferências inválidas, a usar as predefinidas:", e)
+
+    def get(self, key):
+        return self._values.get(key, self.DEFAULTS.get(key))
+
+    def set(self, key, value):
+        self._values[key] = value
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + ".part")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._values, f)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,222 @@
+import heapq
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+# Métricas disponíveis para ordenar: chave -> título apresentado
+METRICS = {
+    "golosMarcados": "Golos",
+    "assistencias": "Assistências",
+    "jogosParticipados": "Jogos",
+    "TTU": "Minutos (TTU)",
+    "CA": "Cartões amarelos",
+    "CV": "Cartões vermelhos",
+    "golos_por_jogo": "Golos por jogo",
+    "assistencias_por_jogo": "Assistências por jogo",
+    "minutos_por_golo": "Minutos por golo",
+    "cartoes_por_jogo": "Cartões por jogo",
+    "numero": "Número",
+    "nome": "Nome",
+}
+
+# Métricas em que um valor menor é melhor (ordenadas por ordem crescente)
+LOWER_IS_BETTER = {"CA", "CV", "minutos_por_golo", "cartoes_por_jogo", "numero", "nome"}
+
+
+class StatsEngine:
+    """
+    Motor de estatísticas sobre a vista colunar do plantel (RosterColumns).
+
+    As métricas derivadas (golos e assistências por jogo, minutos por golo,
+    cartões por jogo) são calculadas de uma só vez, coluna a coluna, para
+    arrays tipados. As permutações de ordenação e os percentis por escalão são
+    calculados na primeira utilização e guardados, pelo que mudar a ordenação
+    da tabela é só reutilizar (ou filtrar) uma permutação já existente.
+
+    Um motor corresponde a um estado do plantel: quando o plantel muda, o
+    RosterStore cria um motor novo.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        stats = columns.stats
+        jogos = stats["jogosParticipados"]
+        golos = stats["golosMarcados"]
+        self.derived = {
+            "golos_por_jogo": array("d", (g / j if j else 0.0 for g, j in zip(golos, jogos))),
+            "assistencias_por_jogo": array(
+                "d", (a / j if j else 0.0 for a, j in zip(stats["assistencias"], jogos))
+            ),
+            # Sem golos não há minutos por golo: fica infinito (último numa ordenação crescente)
+            "minutos_por_golo": array("d", (t / g if g else math.inf for t, g in zip(stats["TTU"], golos))),
+            "cartoes_por_jogo": array(
+                "d", ((ca + cv) / j if j else 0.0 for ca, cv, j in zip(stats["CA"], stats["CV"], jogos))
+            ),
+        }
+        # tuplo de chaves de ordenação -> permutação das linhas
+        self._orders = {}
+        # métrica -> array com o percentil de cada linha dentro do seu escalão
+        self._percentiles = {}
+
+    def column(self, key):
+        """Coluna (indexável por linha) de uma métrica base ou derivada."""
+        if key in self.derived:
+            return self.derived[key]
+        if key in self.columns.stats:
+            return self.columns.stats[key]
+        if key == "nome":
+            return [(nome or "").casefold() for nome in self.columns.nome]
+        if key == "numero":
+            return [numero if isinstance(numero, int) else math.inf for numero in self.columns.numero]
+        raise KeyError(key)
+
+    def order(self, keys):
+        """
+        Permutação de todas as linhas ordenadas pelas métricas `keys` (a primeira
+        é a principal; as seguintes desempatam), cada uma do melhor para o pior.
+        """
+        keys = tuple(keys)
+        perm = self._orders.get(keys)
+        if perm is None:
+            perm = list(range(len(self.columns)))
+            # Ordenações estáveis da última chave para a primeira = ordenação por várias chaves
+            for key in reversed(keys):
+                perm.sort(key=self.column(key).__getitem__, reverse=key not in LOWER_IS_BETTER)
+            self._orders[keys] = perm
+        return perm
+
+    def sorted_rows(self, rows, keys):
+        """Devolve as linhas `rows` pela ordem de order(keys)."""
+        perm = self.order(keys)
+        if len(rows) == len(perm):
+            return list(perm)
+        selected = set(rows)
+        return [i for i in perm if i in selected]
+
+    def percentile(self, key):
+        """
+        Percentil (0-100) de cada linha na métrica `key`, dentro do seu escalão:
+        percentagem de jogadores do escalão com um valor igual ou pior.
+        """
+        result = self._percentiles.get(key)
+        if result is not None:
+            return result
+        column = self.column(key)
+        groups = defaultdict(list)
+        for i, escalao in enumerate(self.columns.escalao):
+            groups[escalao].append(i)
+        result = array("d", bytes(8 * len(column)))
+        lower_is_better = key in LOWER_IS_BETTER
+        for rows in groups.values():
+            values = sorted(column[i] for i in rows)
+            size = len(values)
+            for i in rows:
+                if lower_is_better:
+                    result[i] = 100.0 * (size - bisect_left(values, column[i])) / size
+                else:
+                    result[i] = 100.0 * bisect_right(values, column[i]) / size
+        self._percentiles[key] = result
+        return result
+
+
+# Métricas com classificação (top-k) mantida em permanência
+LEADERBOARD_METRICS = ("golosMarcados", "assistencias", "TTU")
+LEADERBOARD_SIZE = 10
+
+
+class _TopBoard:
+    """
+    Classificação de uma faceta: heap de máximos com remoção preguiçosa.
+
+    Cada alteração acrescenta uma entrada nova ao heap (O(log n)) e as
+    entradas antigas só são descartadas quando chegam ao topo. Quando o
+    heap acumula demasiadas entradas obsoletas é reconstruído a partir dos
+    valores atuais.
+    """
+
+    def __init__(self):
+        # id do jogador -> valor atual
+        self.values = {}
+        # entradas (-valor, id); podem estar obsoletas
+        self.heap = []
+
+    def set(self, player_id, value):
+        if self.values.get(player_id) == value:
+            return
+        self.values[player_id] = value
+        heapq.heappush(self.heap, (-value, player_id))
+        if len(self.heap) > 2 * len(self.values) + 16:
+            self.heap = [(-v, pid) for pid, v in self.values.items()]
+            heapq.heapify(self.heap)
+
+    def discard(self, player_id):
+        self.values.pop(player_id, None)
+
+    def top(self, k):
+        """Os k melhores (id, valor), do maior para o menor valor."""
+        result = []
+        kept = []
+        seen = set()
+        while self.heap and len(result) < k:
+            entry = heapq.heappop(self.heap)
+            neg_value, player_id = entry
+            if player_id in seen or self.values.get(player_id) != -neg_value:
+                continue  # entrada obsoleta ou repetida: fica descartada
+            seen.add(player_id)
+            kept.append(entry)
+            result.append((player_id, -neg_value))
+        for entry in kept:
+            heapq.heappush(self.heap, entry)
+        return result
+
+
+class Leaderboards:
+    """
+    Classificações top-k por (métrica, escalão, clube), atualizadas jogador a jogador.
+
+    Cada jogador entra nas facetas (escalão, clube), (escalão, "Todos"),
+    ("Todos", clube) e ("Todos", "Todos") de cada métrica. Quando os contadores
+    de um jogador mudam, update() só mexe nas entradas desse jogador, em vez de
+    voltar a ordenar o plantel inteiro.
+    """
+
+    def __init__(self, metrics=LEADERBOARD_METRICS, size=LEADERBOARD_SIZE):
+        self.metrics = metrics
+        self.size = size
+        # (métrica, escalão, clube) -> _TopBoard
+        self._boards = defaultdict(_TopBoard)
+        # id do jogador -> facetas (escalão, clube) em que está
+        self._facets = {}
+
+    @staticmethod
+    def _facet_keys(escalao, clube):
+        return ((escalao, clube), (escalao, "Todos"), ("Todos", clube), ("Todos", "Todos"))
+
+    def update(self, player):
+        """Regista (ou atualiza) os contadores de um jogador."""
+        facets = self._facet_keys(player.escalao or "", player.clube or "")
+        previous = self._facets.get(player.id)
+        if previous is not None and previous != facets:
+            self.remove(player.id)
+        self._facets[player.id] = facets
+        for metric in self.metrics:
+            value = int(getattr(player, metric) or 0)
+            for escalao, clube in facets:
+                self._boards[(metric, escalao, clube)].set(player.id, value)
+
+    def remove(self, player_id):
+        """Retira um jogador de todas as classificações."""
+        facets = self._facets.pop(player_id, None)
+        if facets is None:
+            return
+        for metric in self.metrics:
+            for escalao, clube in facets:
+                self._boards[(metric, escalao, clube)].discard(player_id)
+
+    def top(self, metric, escalao="Todos", clube="Todos", k=None):
+        """Lista (id do jogador, valor) dos melhores na métrica e filtro indicados."""
+        board = self._boards.get((metric, escalao, clube))
+        if board is None:
+            return []
+        return board.top(k or self.size)
@@ -0,0 +1,485 @@
+import asyncio
+import datetime
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+
+from .models import Player
+from .stats import Leaderboards, StatsEngine
+
+# Tempo (em segundos) durante o qual os dados em memória são considerados atuais
+ROSTER_TTL = 120
+GAMES_TTL = 120
+# Intervalo mínimo (em segundos) entre as chamadas de on_page durante um download:
+# os lotes chegam a cada bloco lido da rede, mas redesenhar a cada um custaria
+# mais do que o próprio download
+NOTIFY_INTERVAL = 0.25
+
+# Campos numéricos das estatísticas, guardados em colunas no RosterColumns
+STAT_FIELDS = ("jogosParticipados", "golosMarcados", "assistencias", "CA", "CV", "TTU")
+
+
+class _Download:
+    """Download de um âmbito em curso, partilhado por todos os get() que esperam por ele."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.task = None
+        # Callbacks a chamar após cada lote recebido
+        self.listeners = []
+        self.waiters = 0
+
+
+class ScopedStore:
+    """
+    Base dos repositórios em memória alimentados por listagens paginadas da API.
+
+    Os dados são pedidos por âmbito (escalão, clube): o filtro escolhido no ecrã
+    é enviado ao servidor como parâmetros de query, as páginas são juntadas num
+    único índice id -> objeto e o âmbito fica atual durante o TTL. Um âmbito
+    também é servido localmente se um âmbito mais largo que o contém (p.ex.
+    ("Todos", "Todos")) estiver atual. Pedidos simultâneos ao mesmo âmbito (ou a
+    um âmbito contido num que já está a ser descarregado, como o do
+    pré-carregamento) partilham o mesmo download; quando todos os que esperam
+    por um download desistem (são cancelados), o download é interrompido.
+    """
+
+    def __init__(self, api, ttl):
+        self.api = api
+        self.ttl = ttl
+        self.by_id = {}
+        # (escalão, clube) -> instante (monotonic) do último download completo
+        self._scopes = {}
+        # (escalão, clube) -> _Download em curso
+        self._pending = {}
+        # Alterações feitas no dispositivo e ainda não enviadas (ver Outbox): os
+        # itens criados localmente mantêm-se e os apagados ficam escondidos,
+        # mesmo depois de um novo download
+        self._local_ids = set()
+        self._deleted_ids = set()
+        # Itens locais já criados no servidor: saem no próximo download, que traz os reais
+        self._confirmed_local_ids = set()
+        # id -> item apagado localmente, para o repor se o servidor recusar a remoção
+        self._deleted_items = {}
+
+    # Métodos a definir pelas subclasses
+    def _iter_pages(self, escalao, clube):
+        raise NotImplementedError
+
+    def _build(self, data):
+        raise NotImplementedError
+
+    def _facets(self, item):
+        """Devolve (id, escalão, clube) de um item guardado."""
+        raise NotImplementedError
+
+    def _changed(self):
+        """Chamado sempre que o conteúdo do repositório muda."""
+
+    def _stored(self, item):
+        """Chamado para cada item recebido do servidor (novo ou atualizado)."""
+
+    def _removed(self, item):
+        """Chamado para cada item que deixou de existir no servidor."""
+
+    @staticmethod
+    def _covering_scopes(escalao, clube):
+        return {(escalao, clube), (escalao, "Todos"), ("Todos", clube), ("Todos", "Todos")}
+
+    def is_fresh(self, escalao="Todos", clube="Todos"):
+        now = time.monotonic()
+        return any(
+            now - self._scopes[scope] < self.ttl
+            for scope in self._covering_scopes(escalao, clube)
+            if scope in self._scopes
+        )
+
+    def invalidate(self):
+        """Obriga o próximo get() a ir ao servidor (p.ex. depois de uma alteração)."""
+        self._scopes.clear()
+
+    async def get(self, escalao="Todos", clube="Todos", force=False, on_page=None):
+        """
+        Devolve os itens do âmbito, descarregando-o apenas se não estiver atual.
+        on_page(itens), se indicado, é chamado com a vista parcial à medida que os lotes
+        chegam: logo após o primeiro e depois no máximo a cada NOTIFY_INTERVAL segundos.
+        """
+        if force:
+            self.invalidate()
+        if not self.is_fresh(escalao, clube):
+            download = next(
+                (
+                    self._pending[scope] for scope in self._covering_scopes(escalao, clube)
+                    if scope in self._pending and not self._pending[scope].task.done()
+                ),
+                None,
+            )
+            if download is None:
+                download = self._pending[(escalao, clube)] = _Download((escalao, clube))
+                download.task = asyncio.ensure_future(self._fetch(download.scope, download.listeners))
+            listener = None
+            if on_page is not None:
+                listener = lambda: on_page(self.filter(escalao, clube))
+                download.listeners.append(listener)
+            download.waiters += 1
+            try:
+                await asyncio.shield(download.task)
+            except asyncio.CancelledError:
+                if download.waiters == 1:
+                    download.task.cancel()  # mais ninguém espera por este download
+                raise
+            finally:
+                download.waiters -= 1
+                if listener is not None:
+                    download.listeners.remove(listener)
+                if download.task.done() and self._pending.get(download.scope) is download:
+                    del self._pending[download.scope]
+        return self.filter(escalao, clube)
+
+    async def _fetch(self, scope, listeners):
+        seen = set()
+        notified_at = None
+        unnotified = False
+        async for page in self._iter_pages(*scope):
+            for data in page:
+                item = self._build(data)
+                item_id = self._facets(item)[0]
+                if item_id in self._deleted_ids:
+                    continue
+                self.by_id[item_id] = item
+                self._stored(item)
+                seen.add(item_id)
+            self._changed()
+            now = time.monotonic()
+            if notified_at is None or now - notified_at >= NOTIFY_INTERVAL:
+                notified_at = now
+                unnotified = False
+                for listener in list(listeners):
+                    listener()
+            else:
+                unnotified = True
+        if unnotified:
+            # Os últimos lotes também chegam aos ecrãs, mesmo sem esperar pelo fim do get()
+            for listener in list(listeners):
+                listener()
+        # Remove os itens do âmbito que deixaram de existir no servidor
+        for item_id in [
+            item_id for item_id, item in self.by_id.items()
+            if item_id not in seen and item_id not in self._local_ids and self._in_scope(item, *scope)
+        ]:
+            self._removed(self.by_id.pop(item_id))
+        for item_id in self._confirmed_local_ids:
+            item = self.by_id.pop(item_id, None)
+            if item is not None:
+                self._removed(item)
+        self._confirmed_local_ids.clear()
+        self._scopes[scope] = time.monotonic()
+        self._changed()
+
+    def put_local(self, item, created=False):
+        """Aplica já ao repositório um item alterado (ou criado, com id local) no dispositivo."""
+        item_id = self._facets(item)[0]
+        self.by_id[item_id] = item
+        if created:
+            self._local_ids.add(item_id)
+        self._stored(item)
+        self._changed()
+
+    def delete_local(self, item_id):
+        """Esconde já um item apagado no dispositivo, até a remoção chegar ao servidor."""
+        self._deleted_ids.add(item_id)
+        item = self.by_id.pop(item_id, None)
+        if item is not None:
+            self._deleted_items[item_id] = item
+            self._removed(item)
+            self._changed()
+
+    def confirm_created(self, local_id, item):
+        """
+        A criação local chegou ao servidor: troca o item com id local pelo devolvido
+        no POST. Se o servidor não devolveu o registo, o item local fica visível até
+        ao próximo download, que traz o real.
+        """
+        self._local_ids.discard(local_id)
+        if item is None:
+            self._confirmed_local_ids.add(local_id)
+            self.invalidate()
+            return
+        local = self.by_id.pop(local_id, None)
+        if local is not None:
+            self._removed(local)
+        self.by_id[self._facets(item)[0]] = item
+        self._stored(item)
+        self._changed()
+
+    def rollback_created(self, local_id):
+        """O servidor recusou a criação: retira o item com id local."""
+        self._local_ids.discard(local_id)
+        item = self.by_id.pop(local_id, None)
+        if item is not None:
+            self._removed(item)
+            self._changed()
+
+    def rollback_deleted(self, item_id):
+        """O servidor recusou a remoção: repõe o item tal como estava antes de ser apagado."""
+        self._deleted_ids.discard(item_id)
+        item = self._deleted_items.pop(item_id, None)
+        if item is not None:
+            self.by_id[item_id] = item
+            self._stored(item)
+            self._changed()
+
+    def settle_local(self, local_ids, deleted_ids):
+        """
+        Indica quais alterações locais continuam pendentes. Criações já enviadas mas
+        ainda não trocadas pelo registo do servidor (ver confirm_created) continuam
+        visíveis até o próximo download trazer os reais.
+        """
+        confirmed = self._local_ids - set(local_ids)
+        if confirmed:
+            self._confirmed_local_ids |= confirmed
+            self.invalidate()
+        self._local_ids = set(local_ids)
+        self._deleted_ids = set(deleted_ids)
+        self._deleted_items = {
+            item_id: item for item_id, item in self._deleted_items.items() if item_id in self._deleted_ids
+        }
+
+    def _in_scope(self, item, escalao, clube):
+        _, item_escalao, item_clube = self._facets(item)
+        return (escalao == "Todos" or item_escalao == escalao) and (clube == "Todos" or item_clube == clube)
+
+    def filter(self, escalao="Todos", clube="Todos"):
+        """Vista dos itens em memória filtrada por escalão e clube ("Todos" não filtra)."""
+        return [item for item in self.by_id.values() if self._in_scope(item, escalao, clube)]
+
+
+class RosterStore(ScopedStore):
+    """
+    Repositório único, em memória, do plantel (/api/jogadores).
+
+    Os ecrãs de Jogadores, Estatísticas e convocatória leem todos daqui: cada
+    âmbito é descarregado uma vez e reutilizado enquanto estiver dentro do TTL,
+    e os subconjuntos por escalão/clube são vistas filtradas sobre os mesmos
+    objetos Player, em vez de novos downloads.
+    """
+
+    def __init__(self, api, ttl=ROSTER_TTL):
+        super().__init__(api, ttl)
+        self._columns = None
+        self._stats = None
+        # Classificações top-k, atualizadas jogador a jogador à medida que chegam
+        self.leaderboards = Leaderboards()
+
+    def _iter_pages(self, escalao, clube):
+        return self.api.iter_players(escalao, clube)
+
+    def _build(self, data):
+        return Player.from_dict(data)
+
+    def _facets(self, player):
+        return player.id, player.escalao, player.clube
+
+    def _stored(self, player):
+        self.leaderboards.update(player)
+
+    def _removed(self, player):
+        self.leaderboards.remove(player.id)
+
+    def _changed(self):
+        # As colunas (e as estatísticas) só são reconstruídas quando alguém as volta a ler
+        self._columns = None
+        self._stats = None
+
+    @property
+    def players(self):
+        return list(self.by_id.values())
+
+    @property
+    def columns(self):
+        """Vista colunar (RosterColumns) do plantel em memória."""
+        if self._columns is None:
+            self._columns = RosterColumns(self.by_id.values())
+        return self._columns
+
+    @property
+    def stats(self):
+        """StatsEngine sobre a vista colunar atual."""
+        if self._stats is None:
+            self._stats = StatsEngine(self.columns)
+        return self._stats
+
+    def clubs(self):
+        """Clubes presentes no plantel, por ordem alfabética."""
+        return sorted({p.clube or "" for p in self.by_id.values()})
+
+
+class RosterColumns:
+    """
+    Representação colunar do plantel, usada pelo ecrã de Estatísticas.
+
+    Cada jogador é uma posição (linha) comum a todas as colunas: as estatísticas
+    numéricas ficam em arrays tipados (4 bytes por valor em vez de um objeto
+    int por jogador) e as colunas de texto partilham as strings internadas dos
+    Player. Filtrar, somar ou ordenar uma estatística percorre um único array.
+    """
+
+    def __init__(self, players=()):
+        players = list(players)
+        self.ids = [p.id for p in players]
+        self.numero = [p.numero for p in players]
+        self.nome = [p.nome for p in players]
+        self.foto = [p.foto for p in players]
+        self.escalao = [p.escalao for p in players]
+        self.clube = [p.clube for p in players]
+        self.stats = {
+            field: array("i", (int(getattr(p, field) or 0) for p in players))
+            for field in STAT_FIELDS
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select(self, escalao="Todos", clube="Todos"):
+        """Índices das linhas do escalão e clube indicados ("Todos" não filtra)."""
+        if escalao == "Todos" and clube == "Todos":
+            return list(range(len(self.ids)))
+        return [
+            i for i, (e, c) in enumerate(zip(self.escalao, self.clube))
+            if (escalao == "Todos" or e == escalao) and (clube == "Todos" or c == clube)
+        ]
+
+    def totals(self, rows):
+        """Soma de cada estatística nas linhas indicadas."""
+        return {field: sum(column[i] for i in rows) for field, column in self.stats.items()}
+
+
+class GamesIndex:
+    """
+    Índice dos jogos em memória, ordenado por data e agrupado por (escalão, clube).
+
+    Cada jogo é colocado nos baldes (escalão, clube), (escalão, "Todos"),
+    ("Todos", clube) e ("Todos", "Todos"), pelo que aplicar um filtro é uma
+    consulta a um dicionário. Cada balde mantém a lista de datas em paralelo,
+    para consultas por intervalo de datas com bisect. As contagens por escalão
+    e por clube (facetas) acompanham o índice.
+
+    add() e remove() atualizam só os baldes do jogo (inserção ordenada com
+    bisect), para que um download em curso não reconstrua o índice a cada lote.
+    """
+
+    def __init__(self, games=()):
+        self.rebuild(games)
+
+    def rebuild(self, games):
+        # As datas são strings ISO (AAAA-MM-DD), logo a ordem lexicográfica é a cronológica
+        games = sorted(games, key=lambda j: j.get("data") or "")
+        self.by_id = {jogo.get("id"): jogo for jogo in games}
+        self.escalao_counts = Counter()
+        self.clube_counts = Counter()
+        self._buckets = defaultdict(list)
+        self._bucket_dates = defaultdict(list)
+        for jogo in self.by_id.values():
+            escalao, clube, keys = self._keys(jogo)
+            self.escalao_counts[escalao] += 1
+            self.clube_counts[clube] += 1
+            for key in keys:
+                self._buckets[key].append(jogo)
+                self._bucket_dates[key].append(jogo.get("data") or "")
+
+    @staticmethod
+    def _keys(jogo):
+        escalao = jogo.get("escalao") or ""
+        clube = jogo.get("clube") or ""
+        return escalao, clube, ((escalao, clube), (escalao, "Todos"), ("Todos", clube), ("Todos", "Todos"))
+
+    def add(self, jogo):
+        """Insere (ou substitui, se o id já existir) um jogo, mantendo os baldes ordenados por data."""
+        jogo_id = jogo.get("id")
+        if jogo_id in self.by_id:
+            self.remove(jogo_id)
+        self.by_id[jogo_id] = jogo
+        date = jogo.get("data") or ""
+        escalao, clube, keys = self._keys(jogo)
+        self.escalao_counts[escalao] += 1
+        self.clube_counts[clube] += 1
+        for key in keys:
+            dates = self._bucket_dates[key]
+            position = bisect_right(dates, date)
+            dates.insert(position, date)
+            self._buckets[key].insert(position, jogo)
+
+    def remove(self, jogo_id):
+        """Retira o jogo com o id indicado (se existir) dos seus baldes."""
+        jogo = self.by_id.pop(jogo_id, None)
+        if jogo is None:
+            return
+        date = jogo.get("data") or ""
+        escalao, clube, keys = self._keys(jogo)
+        for counts, value in ((self.escalao_counts, escalao), (self.clube_counts, clube)):
+            counts[value] -= 1
+            if not counts[value]:
+                del counts[value]
+        for key in keys:
+            dates = self._bucket_dates[key]
+            bucket = self._buckets[key]
+            # Procura entre os jogos da mesma data; se a data tiver sido alterada no próprio dict, percorre o balde
+            position = next(
+                (i for i in range(bisect_left(dates, date), bisect_right(dates, date)) if bucket[i] is jogo),
+                None,
+            )
+            if position is None:
+                position = next(i for i, item in enumerate(bucket) if item is jogo)
+            del dates[position]
+            del bucket[position]
+
+    @property
+    def games(self):
+        """Todos os jogos, por ordem de data."""
+        return self._buckets[("Todos", "Todos")]
+
+    def clubs(self):
+        """Clubes com jogos, por ordem alfabética."""
+        return sorted(self.clube_counts)
+
+    def query(self, escalao="Todos", clube="Todos"):
+        """Jogos do escalão e clube indicados ("Todos" não filtra), por ordem de data."""
+        return self._buckets.get((escalao, clube), [])
+
+    def between(self, start, end, escalao="Todos", clube="Todos"):
+        """Jogos com data em [start, end) (strings ISO), dentro do filtro indicado."""
+        key = (escalao, clube)
+        dates = self._bucket_dates.get(key, [])
+        lo = bisect_left(dates, start)
+        hi = bisect_left(dates, end, lo)
+        return self._buckets.get(key, [])[lo:hi]
+
+    def upcoming(self, days, escalao="Todos", clube="Todos", today=None):
+        """Jogos de hoje até daqui a `days` dias (inclusive)."""
+        today = today or datetime.date.today()
+        end = today + datetime.timedelta(days=days + 1)
+        return self.between(today.isoformat(), end.isoformat(), escalao, clube)
+
+
+class GamesStore(ScopedStore):
+    """Repositório em memória dos jogos (/api/jogos), com um GamesIndex atualizado jogo a jogo."""
+
+    def __init__(self, api, ttl=GAMES_TTL):
+        super().__init__(api, ttl)
+        self.index = GamesIndex()
+
+    def _iter_pages(self, escalao, clube):
+        return self.api.iter_games(escalao, clube)
+
+    def _build(self, data):
+        return data
+
+    def _facets(self, jogo):
+        return jogo.get("id"), jogo.get("escalao"), jogo.get("clube")
+
+    def _stored(self, jogo):
+        self.index.add(jogo)
+
+    def _removed(self, jogo):
+        self.index.remove(jogo.get("id"))
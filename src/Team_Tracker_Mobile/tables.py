@@ -0,0 +1,177 @@
+from bisect import bisect_left
+
+import toga
+from toga.style import Pack
+from toga.style.pack import ROW, CENTER
+
+# Linhas por página e número máximo de páginas apresentadas ao mesmo tempo
+PAGE_SIZE = 50
+MAX_PAGES = 4
+
+
+class TableBinding:
+    """
+    Liga um toga.Table a um modelo indexado por chave (normalmente o id da entidade).
+
+    Em vez de atribuir uma lista nova a `table.data` (o que obriga o widget nativo
+    a descartar e reconstruir todas as linhas), update() compara os registos novos
+    com as linhas atuais do ListSource e aplica apenas as remoções, inserções e
+    alterações de células necessárias.
+    """
+
+    def __init__(self, table, key="id"):
+        self.table = table
+        self.key = key
+        # chave -> Row atualmente apresentado
+        self.rows = {}
+
+    def row_for(self, key):
+        """Devolve o Row apresentado para a chave, ou None."""
+        return self.rows.get(key)
+
+    def _row_data(self, key, values):
+        data = dict(zip(self.table.data.accessors, values))
+        data[self.key] = key
+        return data
+
+    def update(self, records):
+        """
+        Aplica à tabela a lista de registos `(chave, [valores das colunas])`,
+        pela ordem em que devem ser apresentados.
+        """
+        records = list(records)
+        source = self.table.data
+
+        # Carga inicial (ou tabela esvaziada): uma única atribuição é mais barata
+        # do que inserir linha a linha.
+        if not self.rows or not records:
+            self.table.data = [self._row_data(key, values) for key, values in records]
+            self.rows = {getattr(row, self.key): row for row in self.table.data}
+            return
+
+        new_keys = [key for key, _ in records]
+        new_positions = {key: i for i, key in enumerate(new_keys)}
+
+        # 1. Remove as linhas cujas chaves desapareceram
+        for key in [key for key in self.rows if key not in new_positions]:
+            source.remove(self.rows.pop(key))
+
+        # 2. Das linhas que ficam, mantém no sítio a maior subsequência que já está
+        #    na ordem certa; as restantes são removidas e reinseridas na posição nova.
+        current = [getattr(row, self.key) for row in source]
+        keep = _longest_increasing_subsequence([new_positions[key] for key in current])
+        for key in current:
+            if new_positions[key] not in keep:
+                source.remove(self.rows.pop(key))
+
+        # 3. Percorre a ordem nova: insere o que falta e atualiza só as células alteradas
+        accessors = source.accessors
+        for index, (key, values) in enumerate(records):
+            row = self.rows.get(key)
+            if row is None:
+                self.rows[key] = source.insert(index, self._row_data(key, values))
+                continue
+            changed = False
+            for accessor, value in zip(accessors, values):
+                if getattr(row, accessor, None) != value:
+                    # Altera sem notificar célula a célula; a notificação é feita uma vez no fim
+                    object.__setattr__(row, accessor, value)
+                    changed = True
+            if changed:
+                source.notify("change", item=row)
+
+
+class PagedTableView:
+    """
+    Janela deslizante de páginas sobre uma lista de entidades, por cima de um TableBinding.
+
+    A tabela só recebe (e só formata) as linhas das páginas visíveis: "Mostrar
+    mais" acrescenta a página seguinte e, passado MAX_PAGES, liberta a primeira;
+    "Anteriores" faz o inverso. Assim o tempo até ao primeiro desenho e a memória
+    do widget não dependem do tamanho do plantel ou do calendário. Os controlos
+    ficam em `controls`, para colocar por baixo da tabela.
+
+    As linhas que saem da janela deixam de estar na tabela; on_render() é
+    chamado depois de cada desenho para quem guarda referências a linhas.
+    """
+
+    def __init__(self, binding, format_row, page_size=PAGE_SIZE, max_pages=MAX_PAGES, on_render=None):
+        self.binding = binding
+        # entidade -> (chave, [valores das colunas])
+        self.format_row = format_row
+        self.on_render = on_render
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.items = []
+        # Páginas visíveis: [first_page, last_page)
+        self.first_page = 0
+        self.last_page = 1
+
+        self.previous_button = toga.Button("▲ Anteriores", on_press=self.show_previous, style=Pack(padding=5))
+        self.more_button = toga.Button("▼ Mostrar mais", on_press=self.show_more, style=Pack(padding=5))
+        self.range_label = toga.Label("", style=Pack(padding=5))
+        self.controls = toga.Box(style=Pack(direction=ROW, alignment=CENTER))
+        self.controls.add(self.previous_button)
+        self.controls.add(self.range_label)
+        self.controls.add(self.more_button)
+
+    def reset(self):
+        """Volta à primeira página (p.ex. quando o filtro muda)."""
+        self.first_page = 0
+        self.last_page = 1
+
+    def set_items(self, items):
+        """Substitui a lista de entidades, mantendo a janela atual (se ainda existir)."""
+        self.items = items
+        page_count = max(1, -(-len(items) // self.page_size))
+        if self.last_page > page_count:
+            self.last_page = page_count
+            self.first_page = min(self.first_page, self.last_page - 1)
+        self.render()
+
+    def render(self):
+        start = self.first_page * self.page_size
+        end = min(self.last_page * self.page_size, len(self.items))
+        self.binding.update(self.format_row(item) for item in self.items[start:end])
+        self.previous_button.enabled = self.first_page > 0
+        self.more_button.enabled = end < len(self.items)
+        self.range_label.text = f"{start + 1 if end else 0}–{end} de {len(self.items)}"
+        if self.on_render is not None:
+            self.on_render()
+
+    def show_more(self, widget=None):
+        self.last_page += 1
+        if self.last_page - self.first_page > self.max_pages:
+            self.first_page += 1
+        self.render()
+
+    def show_previous(self, widget=None):
+        if self.first_page == 0:
+            return
+        self.first_page -= 1
+        if self.last_page - self.first_page > self.max_pages:
+            self.last_page -= 1
+        self.render()
+
+
+def _longest_increasing_subsequence(values):
+    """Devolve o conjunto de valores de uma subsequência crescente máxima (O(n log n))."""
+    tails = []
+    tails_index = []
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        pos = bisect_left(tails, value)
+        if pos == len(tails):
+            tails.append(value)
+            tails_index.append(i)
+        else:
+            tails[pos] = value
+            tails_index[pos] = i
+        previous[i] = tails_index[pos - 1] if pos > 0 else -1
+
+    result = set()
+    i = tails_index[-1] if tails_index else -1
+    while i != -1:
+        result.add(values[i])
+        i = previous[i]
+    return result
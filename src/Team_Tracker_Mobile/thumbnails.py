@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+from collections import OrderedDict
+
+import toga
+
+# Tamanho (em píxeis) das miniaturas apresentadas nas tabelas
+THUMBNAIL_SIZE = 48
+# Downloads de fotos em simultâneo (abaixo do pool do ApiClient, para não bloquear as listagens)
+MAX_CONCURRENT = 3
+# Orçamentos de memória e de disco
+MEMORY_BUDGET = 4 * 1024 * 1024
+DISK_BUDGET = 32 * 1024 * 1024
+# Espera antes de avisar as tabelas, para juntar várias miniaturas numa só atualização
+NOTIFY_DELAY = 0.2
+# Espera (em segundos) antes de voltar a pedir uma foto que falhou; duplica a cada nova falha
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 10 * 60
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    """Reduz a imagem para caber em size x size e devolve-a em PNG (sem Pillow, devolve os bytes originais)."""
+    # Import tardio (corre numa thread do executor), para não pesar no arranque da aplicação
+    try:
+        from PIL import Image
+    except ImportError:  # Sem Pillow as fotos são guardadas sem redimensionar
+        return data
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        output = io.BytesIO()
+        image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+class ThumbnailCache:
+    """
+    Miniaturas das fotos dos jogadores, partilhadas pelas tabelas de Jogadores,
+    Estatísticas e convocatória.
+
+    get() é síncrono e nunca espera pela rede: devolve o toga.Icon se a
+    miniatura já existir (em memória ou no disco) e, caso contrário, agenda o
+    download e devolve None. Os downloads são limitados por um semáforo e cada
+    foto só é pedida uma vez, mesmo que várias tabelas a peçam em simultâneo.
+    Quando chegam miniaturas novas, os listeners são avisados (uma vez por
+    lote) para voltarem a desenhar as linhas visíveis.
+
+    A memória guarda um LRU de ícones limitado em bytes; o disco guarda os PNG
+    já reduzidos, com remoção dos menos usados quando passa do orçamento. A
+    chave inclui o URL e a versão da foto, pelo que uma foto nova nunca é
+    confundida com a antiga.
+
+    Uma foto cujo download falhou (p.ex. sem rede) só volta a ser pedida
+    depois de RETRY_DELAY segundos, com a espera a duplicar a cada falha.
+    """
+
+    def __init__(
+        self,
+        api,
+        directory,
+        size=THUMBNAIL_SIZE,
+        max_concurrent=MAX_CONCURRENT,
+        memory_budget=MEMORY_BUDGET,
+        disk_budget=DISK_BUDGET,
+        clock=time.monotonic,
+    ):
+        self.api = api
+        self.directory = directory
+        self.size = size
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.clock = clock
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        # chave -> (toga.Icon, bytes ocupados), do menos para o mais recente
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        # chave -> bytes no disco, do menos para o mais recentemente usado
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._load_disk_index()
+        # chave -> tarefa de download em curso
+        self._pending = {}
+        # chave -> (instante a partir do qual se volta a tentar, espera usada) das fotos que falharam
+        self._failed = {}
+        self._listeners = []
+        self._notify_handle = None
+
+    # ---------------------------
+    # Interface usada pelas tabelas
+    # ---------------------------
+    def add_listener(self, callback):
+        """callback() é chamado quando há miniaturas novas disponíveis."""
+        self._listeners.append(callback)
+
+    def key(self, foto, version=None):
+        raw = f"{self.url_for(foto)}#{version or ''}#{self.size}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def url_for(self, foto):
+        """URL absoluto da foto (o backend pode devolver caminhos relativos)."""
+        if foto.startswith(("http://", "https://")):
+            return foto
+        return f"{self.api.base_url}/{foto.lstrip('/')}"
+
+    def get(self, foto, version=None):
+        """Devolve o toga.Icon da miniatura, ou None (e agenda o download)."""
+        if not foto:
+            return None
+        key = self.key(foto, version)
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry[0]
+        failed = self._failed.get(key)
+        if failed is not None and self.clock() < failed[0]:
+            return None
+        if key in self._disk:
+            self._disk.move_to_end(key)
+            os.utime(self._path(key))  # a ordem de uso sobrevive ao reinício da aplicação
+            return self._remember(key, self._path(key))
+        if key not in self._pending:
+            self._pending[key] = asyncio.ensure_future(self._download(key, self.url_for(foto)))
+        return None
+
+    def cell(self, foto, version=None):
+        """Valor da coluna "Foto" de uma tabela: ícone, ou texto enquanto não há miniatura."""
+        if not foto:
+            return "Sem foto"
+        icon = self.get(foto, version)
+        return (icon, "") if icon is not None else "Foto"
+
+    def invalidate(self, foto, version=None):
+        """Esquece a miniatura de uma foto (p.ex. depois de um novo upload com o mesmo URL)."""
+        key = self.key(foto, version)
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+        self._failed.pop(key, None)
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+        self._path(key).unlink(missing_ok=True)
+
+    # ---------------------------
+    # Memória, disco e rede
+    # ---------------------------
+    def _path(self, key):
+        return self.directory / f"{key}.png"
+
+    def _load_disk_index(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _remember(self, key, path):
+        icon = toga.Icon(path)
+        # O custo em memória é o da imagem descodificada (RGBA), não o do PNG
+        size = max(self._disk[key], self.size * self.size * 4)
+        self._memory[key] = (icon, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+        return icon
+
+    async def _download(self, key, url):
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._semaphore:
+                data = await self.api.download(url)
+                # Descodificar e redimensionar é trabalho de CPU: fica fora da thread da interface
+                size = await loop.run_in_executor(None, self._store, key, data)
+        except Exception as e:
+            print("Erro ao obter a foto", url, e)
+            previous = self._failed.get(key)
+            delay = RETRY_DELAY if previous is None else min(previous[1] * 2, MAX_RETRY_DELAY)
+            self._failed[key] = (self.clock() + delay, delay)
+            return
+        finally:
+            self._pending.pop(key, None)
+        self._failed.pop(key, None)
+        self._disk[key] = size
+        self._disk_bytes += size
+        self._evict_disk()
+        self._schedule_notify()
+
+    def _store(self, key, data):
+        thumbnail = make_thumbnail(data, self.size)
+        path = self._path(key)
+        temp_path = path.with_suffix(".part")
+        temp_path.write_bytes(thumbnail)
+        os.replace(temp_path, path)
+        return len(thumbnail)
+
+    def _evict_disk(self):
+        """Remove as miniaturas usadas há mais tempo até o disco caber no orçamento."""
+        while self._disk_bytes > self.disk_budget and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._path(key).unlink(missing_ok=True)
+            entry = self._memory.pop(key, None)
+            if entry is not None:
+                self._memory_bytes -= entry[1]
+
+    def _schedule_notify(self):
+        if self._notify_handle is None:
+            loop = asyncio.get_running_loop()
+            self._notify_handle = loop.call_later(NOTIFY_DELAY, self._notify)
+
+    def _notify(self):
+        self._notify_handle = None
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                print("Erro ao atualizar miniaturas:", e)
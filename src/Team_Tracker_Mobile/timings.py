@@ -0,0 +1,28 @@
+import time
+
+
+class StartupTimer:
+    """
+    Mede as fases do arranque (imports, criação da aplicação, janela de login,
+    recursos carregados depois) e publica o resumo quando o arranque termina.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self._last = self.started
+        # (fase, duração em segundos), pela ordem em que terminaram
+        self.phases = []
+
+    def mark(self, phase):
+        """Fecha a fase `phase`: conta o tempo desde a marca anterior."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    @property
+    def total(self):
+        return self._last - self.started
+
+    def summary(self):
+        parts = ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.phases)
+        return f"Arranque em {self.total * 1000:.0f} ms ({parts})"
@@ -0,0 +1,102 @@
+import io
+import uuid
+
+# Lado maior (em píxeis) e tamanho máximo (em bytes) da foto enviada para o servidor
+MAX_SIDE = 1280
+MAX_BYTES = 350 * 1024
+# Qualidades JPEG tentadas, da melhor para a pior, até caber em MAX_BYTES
+JPEG_QUALITIES = (85, 75, 65, 55, 45)
+# Tamanho dos blocos enviados (e intervalo entre avisos de progresso)
+UPLOAD_CHUNK_SIZE = 32 * 1024
+
+
+def prepare_photo(path, max_side=MAX_SIDE, max_bytes=MAX_BYTES):
+    """
+    Lê a foto escolhida e reduz a resolução e o tamanho antes do upload:
+    roda conforme o EXIF, limita o lado maior a max_side e volta a codificar em
+    JPEG, baixando a qualidade até caber em max_bytes (ou até à qualidade mínima).
+    Devolve (bytes, nome do ficheiro, content type).
+    """
+    # Pillow só é importado aqui (numa thread), para não pesar no arranque da aplicação
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:  # Sem Pillow a foto é enviada tal como está
+        with open(path, "rb") as f:
+            data = f.read()
+        return data, "foto" + _suffix(path), "application/octet-stream"
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        for quality in JPEG_QUALITIES:
+            output = io.BytesIO()
+            image.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+            if output.tell() <= max_bytes:
+                break
+    return output.getvalue(), "foto.jpg", "image/jpeg"
+
+
+def _suffix(path):
+    name = str(path)
+    dot = name.rfind(".")
+    return name[dot:].lower() if dot != -1 else ""
+
+
+class MultipartBody:
+    """
+    Corpo multipart/form-data com um único ficheiro, lido por blocos.
+
+    O requests envia objetos com read() por blocos e usa len() para o
+    Content-Length, pelo que o pedido não é construído de uma só vez em
+    memória e progress(enviados, total) é chamado à medida que a foto sai.
+    """
+
+    def __init__(self, field, filename, content_type, data, progress=None):
+        self.boundary = uuid.uuid4().hex
+        head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._parts = [head, memoryview(data), tail]
+        self._part = 0
+        self._offset = 0
+        self.total = len(head) + len(data) + len(tail)
+        self.sent = 0
+        self.progress = progress
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self.total
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = UPLOAD_CHUNK_SIZE
+        size = min(size, UPLOAD_CHUNK_SIZE)
+        chunks = []
+        while size > 0 and self._part < len(self._parts):
+            part = self._parts[self._part]
+            chunk = part[self._offset:self._offset + size]
+            chunks.append(bytes(chunk))
+            size -= len(chunk)
+            self._offset += len(chunk)
+            if self._offset >= len(part):
+                self._part += 1
+                self._offset = 0
+        data = b"".join(chunks)
+        self.sent += len(data)
+        if self.progress is not None and data:
+            self.progress(self.sent, self.total)
+        return data
+
+    def rewind(self):
+        """Volta ao início (para repetir o envio numa nova tentativa)."""
+        self._part = 0
+        self._offset = 0
+        self.sent = 0
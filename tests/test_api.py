@@ -0,0 +1,135 @@
+import asyncio
+import json
+
+import pytest
+import requests
+
+from Team_Tracker_Mobile import api as api_module
+from Team_Tracker_Mobile.api import GET_RETRY_DELAY, ApiClient, ApiError, CircuitOpenError
+from Team_Tracker_Mobile.cache import ResponseCache
+
+
+class StubResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.content = body
+        self.text = body.decode("utf-8")
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size):
+        return iter([self.content[i:i + chunk_size] for i in range(0, len(self.content), chunk_size)])
+
+    def close(self):
+        pass
+
+
+class StubSession:
+    """Sessão falsa: devolve (ou lança) as respostas da fila e regista os pedidos."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.requests.append((method, url, timeout, kwargs.get("params")))
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Regista as esperas entre tentativas em vez de esperar."""
+    recorded = []
+
+    async def sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr(api_module.asyncio, "sleep", sleep)
+    return recorded
+
+
+def make_client(session, cache=None):
+    client = ApiClient("https://exemplo.pt", cache=cache)
+    client._session = session
+    return client
+
+
+def test_get_is_retried_with_jittered_backoff(delays):
+    """Um GET com 5xx é repetido com esperas crescentes e aleatórias; um 4xx não é repetido."""
+    session = StubSession(StubResponse(503), StubResponse(502), StubResponse(200, b'{"username": "ana"}'))
+    client = make_client(session)
+    assert asyncio.run(client.get_me()) == {"username": "ana"}
+    assert len(session.requests) == 3
+    assert session.requests[0][2] == (api_module.CONNECT_TIMEOUT, api_module.READ_TIMEOUT)
+    first, second = delays
+    assert GET_RETRY_DELAY / 2 <= first <= GET_RETRY_DELAY
+    assert GET_RETRY_DELAY <= second <= 2 * GET_RETRY_DELAY
+
+    delays.clear()
+    session = StubSession(StubResponse(404, '{"detail": "Não existe"}'.encode()))
+    with pytest.raises(ApiError):
+        asyncio.run(make_client(session).get_me())
+    assert len(session.requests) == 1 and delays == []
+
+
+def test_open_breaker_fails_fast_without_retries(delays):
+    """Com o circuito aberto os pedidos (incl. fotos) não chegam à rede nem são repetidos."""
+    session = StubSession(requests.ConnectionError("sem rede"))
+    client = make_client(session)
+    client.breaker.threshold = 2
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.get_me())
+    # A segunda tentativa abriu o circuito: a terceira foi recusada sem ir à rede
+    assert len(session.requests) == 2 and client.breaker.is_open
+
+    delays.clear()
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.download("https://fotos.exemplo.pt/1.jpg"))
+    assert len(session.requests) == 2 and delays == []
+
+
+def test_listing_served_from_cache_while_breaker_is_open(tmp_path, delays):
+    """Com o backend em falha, uma listagem guardada é servida do cache; sem cópia, falha logo."""
+    page = json.dumps({"items": [{"id": 1}, {"id": 2}], "next_cursor": None}).encode()
+    session = StubSession(StubResponse(200, page, {"ETag": '"v1"'}))
+    client = make_client(session, ResponseCache(tmp_path / "respostas.sqlite3"))
+    client.breaker.threshold = 1
+
+    async def listing(path):
+        return [item async for items in client._iter_pages(path) for item in items]
+
+    assert asyncio.run(listing("/api/jogadores")) == [{"id": 1}, {"id": 2}]
+
+    session.responses = [StubResponse(500)]
+    assert asyncio.run(listing("/api/jogadores")) == [{"id": 1}, {"id": 2}]
+    assert client.breaker.is_open and delays == []
+
+    sent = len(session.requests)
+    assert asyncio.run(listing("/api/jogadores")) == [{"id": 1}, {"id": 2}]
+    assert len(session.requests) == sent
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(listing("/api/jogos"))
+
+
+def test_full_bare_list_page_asks_for_the_next_offset(delays):
+    """Uma lista simples com `limit` registos pode estar cortada: pede-se o offset seguinte até vir uma página curta."""
+    page = lambda ids: StubResponse(200, json.dumps([{"id": i} for i in ids]).encode())
+    session = StubSession(page([1, 2]), page([3, 4]), page([5]))
+    client = make_client(session)
+
+    async def listing():
+        return [item["id"] async for items in client._iter_pages("/api/jogos", page_size=2) for item in items]
+
+    assert asyncio.run(listing()) == [1, 2, 3, 4, 5]
+    assert [params.get("offset") for *_, params in session.requests] == [None, 2, 4]
+
+    # Servidor que ignora limit e offset: a lista repetida não é entregue duas vezes
+    session = StubSession(page([1, 2]))
+    client = make_client(session)
+    assert asyncio.run(listing()) == [1, 2]
+    assert len(session.requests) == 2
@@ -0,0 +1,44 @@
+from Team_Tracker_Mobile.cache import ResponseCache
+
+
+def test_key_ignores_query_order():
+    """A chave do cache não depende da ordem dos parâmetros da query."""
+    a = ResponseCache.make_key("ana", "/api/jogadores", {"escalao": "X", "clube": "Y"})
+    b = ResponseCache.make_key("ana", "/api/jogadores", {"clube": "Y", "escalao": "X"})
+    assert a == b
+    assert a != ResponseCache.make_key("rui", "/api/jogadores", {"escalao": "X", "clube": "Y"})
+
+
+def test_put_get_touch(tmp_path):
+    """As respostas e os validadores persistem entre ligações à base de dados."""
+    cache = ResponseCache(tmp_path / "respostas.sqlite3")
+    cache.put("k", b"[1, 2]", etag='"v1"', last_modified=None)
+    first = cache.get("k")
+    cache.touch("k")
+
+    reopened = ResponseCache(tmp_path / "respostas.sqlite3").get("k")
+    assert reopened.body == b"[1, 2]"
+    assert reopened.etag == '"v1"'
+    assert reopened.fetched_at >= first.fetched_at
+    assert cache.get("outra") is None
+
+
+def test_oldest_entries_leave_when_over_budget(tmp_path, monkeypatch):
+    """Acima do orçamento saem as entradas obtidas há mais tempo; uma revalidação (touch) conta como recente."""
+    now = [0.0]
+    monkeypatch.setattr("Team_Tracker_Mobile.cache.time.time", lambda: now[0])
+    cache = ResponseCache(tmp_path / "respostas.sqlite3", disk_budget=25)
+    for key in ("a", "b", "c"):
+        now[0] += 1
+        cache.put(key, b"x" * 10)
+    assert cache.get("a") is None and cache.get("b") and cache.get("c")
+
+    now[0] += 1
+    cache.touch("b")
+    now[0] += 1
+    cache.put("d", b"x" * 10)
+    assert cache.get("c") is None and cache.get("b") and cache.get("d")
+
+    # Uma resposta maior do que o orçamento fica na mesma (é a que vai ser usada)
+    cache.put("grande", b"x" * 100)
+    assert cache.get("grande") and cache.get("b") is None
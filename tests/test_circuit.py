@@ -0,0 +1,25 @@
+from Team_Tracker_Mobile.circuit import CircuitBreaker
+
+
+def test_breaker_opens_after_failures_and_probes_after_cooldown():
+    """Abre após N falhas seguidas, recusa pedidos durante o cooldown e deixa passar um único pedido de teste."""
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=2, cooldown=10, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+    now[0] = 10
+    assert breaker.allow()
+    assert not breaker.allow()  # só um pedido de teste de cada vez
+
+    # O teste falhou: volta a abrir por mais um cooldown
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open and breaker.allow()
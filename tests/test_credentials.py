@@ -0,0 +1,69 @@
+import base64
+import json
+import os
+import time
+
+from Team_Tracker_Mobile.credentials import SessionStore, token_expiry
+
+
+def make_token(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"sub": "ana", "exp": exp}).encode()).decode().rstrip("=")
+    return f"cabecalho.{payload}.assinatura"
+
+
+def test_session_saved_privately_and_dropped_when_expired(tmp_path):
+    """A sessão fica num ficheiro só do dono; um token já expirado não é retomado."""
+    store = SessionStore(tmp_path / "sessao.json")
+    assert store.load() is None
+
+    token = make_token(time.time() + 3600)
+    store.save(token, "ana", {"username": "ana", "escalao": "Todos"})
+    assert os.stat(store.path).st_mode & 0o777 == 0o600
+    assert store.load() == {"token": token, "username": "ana", "user_info": {"username": "ana", "escalao": "Todos"}}
+
+    store.save(make_token(time.time() - 1), "ana", {"username": "ana"})
+    assert store.load() is None
+    assert not store.path.exists()
+
+
+class FakeVault:
+    """Cofre em memória com a interface do keyring; pode falhar como um cofre bloqueado."""
+
+    def __init__(self, locked=False):
+        self.passwords = {}
+        self.locked = locked
+
+    def get_password(self, service, key):
+        return self.passwords.get((service, key))
+
+    def set_password(self, service, key, value):
+        if self.locked:
+            raise RuntimeError("cofre bloqueado")
+        self.passwords[(service, key)] = value
+
+    def delete_password(self, service, key):
+        del self.passwords[(service, key)]
+
+
+def test_token_kept_in_vault_when_available(tmp_path):
+    """Com cofre o token não vai para o ficheiro; se o cofre falhar, fica no ficheiro privado."""
+    vault = FakeVault()
+    store = SessionStore(tmp_path / "sessao.json", vault=vault)
+    token = make_token(time.time() + 3600)
+    store.save(token, "ana", {"username": "ana"})
+    assert token not in store.path.read_text()
+    assert store.load()["token"] == token
+
+    store.clear()
+    assert vault.passwords == {} and store.load() is None
+
+    locked = SessionStore(tmp_path / "sessao.json", vault=FakeVault(locked=True))
+    locked.save(token, "ana", {"username": "ana"})
+    assert locked.load()["token"] == token
+
+
+def test_token_expiry_reads_jwt_payload():
+    """A expiração vem do campo "exp" do JWT; tokens opacos não têm expiração conhecida."""
+    assert token_expiry(make_token(1700000000)) == 1700000000
+    assert token_expiry("token-opaco") is None
+    assert token_expiry(None) is None
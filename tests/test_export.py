@@ -0,0 +1,29 @@
+import csv
+import zipfile
+
+from Team_Tracker_Mobile.export import export_table
+
+HEADER = ["Número", "Nome", "Golos"]
+RECORDS = [[7, 'Silva, "Zé"', 3], [9, "Ana <b>", None]]
+
+
+def test_csv_export_quotes_commas(tmp_path):
+    """Nomes com vírgulas e aspas sobrevivem à exportação CSV."""
+    path = tmp_path / "estatisticas.csv"
+    progress = []
+    assert export_table(path, HEADER, iter(RECORDS), progress.append) == 2
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [HEADER, ["7", 'Silva, "Zé"', "3"], ["9", "Ana <b>", ""]]
+    assert progress == [2]
+    assert not (tmp_path / "estatisticas.csv.part").exists()
+
+
+def test_xlsx_export_escapes_text(tmp_path):
+    """A folha XLSX tem o texto escapado e os números como valores."""
+    path = tmp_path / "estatisticas.xlsx"
+    export_table(path, HEADER, iter(RECORDS))
+    with zipfile.ZipFile(path) as archive:
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+    assert "Ana &lt;b&gt;" in sheet
+    assert "<c><v>7</v></c>" in sheet
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from Team_Tracker_Mobile.jsonstream import JsonArrayStream
+
+
+def test_stream_object_listing_in_small_chunks():
+    """Os elementos saem à medida que ficam completos, mesmo partidos a meio (incl. UTF-8)."""
+    payload = {"items": [{"id": i, "nome": "João", "golos": i * 10} for i in range(5)], "next_cursor": 17}
+    raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    listing = JsonArrayStream()
+    items = []
+    for i in range(0, len(raw), 7):
+        items += listing.feed(raw[i:i + 7])
+    items += listing.close()
+    assert items == payload["items"]
+    assert listing.meta == {"next_cursor": 17}
+    assert listing.is_list is False
+
+
+def test_stream_plain_list_and_truncated_body():
+    """Uma lista no topo é aceite; um corpo cortado falha no close()."""
+    listing = JsonArrayStream()
+    # "2" ainda pode continuar no bloco seguinte
+    assert listing.feed(b"[1, 2") == [1]
+    assert listing.feed(b"3]") == [23]
+    assert listing.close() == []
+    assert listing.is_list is True
+
+    truncated = JsonArrayStream()
+    assert truncated.feed(b'[{"id": 1}, {"id"') == [{"id": 1}]
+    with pytest.raises(ValueError):
+        truncated.close()
+
+
+def test_stream_number_split_inside_fraction_or_exponent():
+    """Um número partido depois do "." ou do expoente espera pelo bloco seguinte (elementos e meta)."""
+    listing = JsonArrayStream()
+    assert listing.feed(b"[1, 2.") == [1]
+    assert listing.feed(b"5, 3e") == [2.5]
+    assert listing.feed(b"-2]") == [0.03]
+    assert listing.close() == []
+
+    meta = JsonArrayStream()
+    assert meta.feed(b'{"items": [], "next_cursor": 2.') == []
+    assert meta.feed(b"5}") == []
+    meta.close()
+    assert meta.meta == {"next_cursor": 2.5}
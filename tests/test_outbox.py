@@ -0,0 +1,200 @@
+import asyncio
+
+import requests
+
+from Team_Tracker_Mobile.api import ApiError
+from Team_Tracker_Mobile.outbox import Outbox
+
+
+class FakeApi:
+    """API falsa: regista as chamadas e pode simular falta de rede ou erros do servidor."""
+
+    def __init__(self):
+        self.calls = []
+        self.offline = False
+        self.errors = {}
+        # nome -> função chamada durante o pedido (p.ex. o utilizador a mexer no ecrã)
+        self.during = {}
+
+    async def _record(self, name, *args):
+        if name in self.during:
+            self.during.pop(name)()
+        if self.offline:
+            raise requests.ConnectionError("sem rede")
+        if name in self.errors:
+            raise self.errors[name]
+        self.calls.append((name,) + args)
+
+    async def create_player(self, payload):
+        await self._record("create_player", payload["nome"])
+        return {"id": 200}
+
+    async def create_game(self, payload):
+        await self._record("create_game", payload["adversario"])
+        return {"id": 100}
+
+    async def delete_game(self, jogo_id):
+        await self._record("delete_game", jogo_id)
+
+    async def add_convocados(self, jogo_id, ids):
+        await self._record("add_convocados", jogo_id, sorted(ids))
+
+    async def remove_convocados(self, jogo_id, ids):
+        await self._record("remove_convocados", jogo_id, sorted(ids))
+
+    async def set_game_state(self, jogo_id, estado):
+        await self._record("set_game_state", jogo_id, estado)
+
+
+def test_coalesce_redundant_operations(tmp_path):
+    """Criar e apagar anulam-se; convocar e desconvocar o mesmo jogador também."""
+    outbox = Outbox(tmp_path / "pendentes.sqlite3", user="ana")
+    outbox.enqueue("create_game", {"local_id": -1, "payload": {"adversario": "X"}})
+    outbox.enqueue("convocatoria", {"jogo_id": -1, "adicionar": [7], "remover": [], "estado": None})
+    outbox.enqueue("delete_game", {"id": -1})
+    assert len(outbox) == 0
+
+    outbox.enqueue("convocatoria", {"jogo_id": 5, "adicionar": [7, 8], "remover": [], "estado": None})
+    outbox.enqueue("convocatoria", {"jogo_id": 5, "adicionar": [], "remover": [7], "estado": "Em Curso"})
+    [op] = outbox.pending()
+    assert op.dados["adicionar"] == [8]
+    assert op.dados["estado"] == "Em Curso"
+
+    # O diário é do utilizador: outro utilizador não vê as operações
+    assert len(Outbox(tmp_path / "pendentes.sqlite3", user="rui")) == 0
+
+
+def test_replay_in_order_with_local_ids_and_conflicts(tmp_path):
+    """Sem rede nada se perde; com rede envia por ordem, traduz ids locais e reporta conflitos."""
+    outbox = Outbox(tmp_path / "pendentes.sqlite3")
+    api = FakeApi()
+    outbox.enqueue("create_game", {"local_id": -1, "payload": {"adversario": "X"}})
+    outbox.enqueue("convocatoria", {"jogo_id": -1, "adicionar": [7], "remover": [], "estado": "Em Curso"})
+    outbox.enqueue("delete_game", {"id": 3})
+
+    api.offline = True
+    result = asyncio.run(outbox.replay(api))
+    assert result.blocked and result.pending == 3
+    assert outbox.pending()[0].tentativas == 1
+
+    api.offline = False
+    api.errors["delete_game"] = ApiError(409, "Jogo já terminado")
+    result = asyncio.run(outbox.replay(api))
+    assert not result.blocked and result.sent == 3 and len(outbox) == 0
+    assert api.calls == [
+        ("create_game", "X"),
+        ("add_convocados", 100, [7]),
+        ("set_game_state", 100, "Em Curso"),
+    ]
+    assert [message for _, message in result.conflicts] == ["Jogo já terminado"]
+    # As respostas seguem para a interface, com os ids já traduzidos
+    assert [(op.tipo, entity) for op, entity in result.applied] == [("create_game", {"id": 100}), ("convocatoria", None)]
+    assert result.applied[1][0].dados["jogo_id"] == 100
+
+
+def test_convocation_resumes_after_partial_failure(tmp_path):
+    """Remoções e adições seguem em conjunto; uma nova tentativa só repete o que falhou."""
+    outbox = Outbox(tmp_path / "pendentes.sqlite3")
+    api = FakeApi()
+    outbox.enqueue("convocatoria", {"jogo_id": 5, "adicionar": [7, 8], "remover": [3], "estado": "Em Curso"})
+
+    api.errors["add_convocados"] = requests.ConnectionError("sem rede")
+    result = asyncio.run(outbox.replay(api))
+    assert result.blocked and api.calls == [("remove_convocados", 5, [3])]
+    [op] = outbox.pending()
+    assert op.dados["remover"] == [] and op.dados["adicionar"] == [7, 8]
+
+    del api.errors["add_convocados"]
+    result = asyncio.run(outbox.replay(api))
+    assert result.sent == 1 and len(outbox) == 0
+    assert api.calls[1:] == [("add_convocados", 5, [7, 8]), ("set_game_state", 5, "Em Curso")]
+
+
+def test_photo_of_rejected_player_is_dropped_with_its_file(tmp_path):
+    """Se o servidor recusar a criação do jogador, a foto pendente sai do diário e do disco."""
+    outbox = Outbox(tmp_path / "pendentes.sqlite3")
+    api = FakeApi()
+    photo = tmp_path / "foto.jpg"
+    photo.write_bytes(b"jpeg")
+    outbox.enqueue("create_player", {"local_id": -1, "payload": {"nome": "Ana"}})
+    outbox.enqueue("upload_photo", {"jogador_id": -1, "ficheiro": str(photo)})
+
+    api.errors["create_player"] = ApiError(409, "Número já usado")
+    result = asyncio.run(outbox.replay(api))
+    assert [message for _, message in result.conflicts] == ["Número já usado", "Depende de um registo que não foi criado."]
+    assert len(outbox) == 0 and not photo.exists()
+
+
+def test_replay_sends_operations_as_they_are_when_their_turn_comes(tmp_path):
+    """Alterações feitas durante o envio contam: o que foi anulado não sai, o que foi fundido sai completo."""
+    outbox = Outbox(tmp_path / "pendentes.sqlite3")
+    api = FakeApi()
+    outbox.enqueue("delete_game", {"id": 3})
+    outbox.enqueue("create_game", {"local_id": -1, "payload": {"adversario": "X"}})
+    outbox.enqueue("convocatoria", {"jogo_id": 5, "adicionar": [7], "remover": [], "estado": None})
+
+    def user_edits():
+        outbox.enqueue("delete_game", {"id": -1})
+        outbox.enqueue("convocatoria", {"jogo_id": 5, "adicionar": [8], "remover": [], "estado": "Em Curso"})
+
+    api.during["delete_game"] = user_edits
+    result = asyncio.run(outbox.replay(api))
+    assert api.calls == [
+        ("delete_game", 3),
+        ("add_convocados", 5, [7, 8]),
+        ("set_game_state", 5, "Em Curso"),
+    ]
+    assert result.sent == 2 and len(outbox) == 0
+
+
+def test_failures_that_retrying_would_not_fix_become_conflicts(tmp_path):
+    """Timeout numa criação, foto local desaparecida ou resposta ilegível: descarta em vez de repetir para sempre."""
+    outbox = Outbox(tmp_path / "pendentes.sqlite3")
+    api = FakeApi()
+    outbox.enqueue("create_game", {"local_id": -1, "payload": {"adversario": "X"}})
+    outbox.enqueue("convocatoria", {"jogo_id": -1, "adicionar": [7], "remover": [], "estado": None})
+    outbox.enqueue("upload_photo", {
+        "jogador_id": 4, "ficheiro": str(tmp_path / "apagada.jpg"), "filename": "f.jpg", "content_type": "image/jpeg",
+    })
+    outbox.enqueue("delete_game", {"id": 3})
+    api.errors["create_game"] = requests.ReadTimeout("sem resposta")
+    api.errors["delete_game"] = requests.ReadTimeout("sem resposta")
+
+    result = asyncio.run(outbox.replay(api))
+    # A criação pode ter chegado ao servidor: não é repetida, e a convocatória que dependia dela cai também
+    assert [op.tipo for op, _ in result.conflicts] == ["create_game", "convocatoria", "upload_photo"]
+    # Apagar é idempotente: um timeout só adia
+    assert result.blocked and [op.tipo for op in outbox.pending()] == ["delete_game"]
+
+    del api.errors["delete_game"]
+    api.errors["set_game_state"] = requests.JSONDecodeError("Expecting value", "<html>", 0)
+    outbox.enqueue("convocatoria", {"jogo_id": 5, "adicionar": [], "remover": [], "estado": "Em Curso"})
+    result = asyncio.run(outbox.replay(api))
+    assert not result.blocked and [op.tipo for op, _ in result.conflicts] == ["convocatoria"]
+    assert len(outbox) == 0
+
+
+def test_run_survives_unexpected_errors(tmp_path):
+    """Uma exceção inesperada numa tentativa não pára o envio em segundo plano."""
+    outbox = Outbox(tmp_path / "pendentes.sqlite3")
+    api = FakeApi()
+    results = []
+
+    def on_result(result):
+        results.append(result)
+        if len(results) == 1:
+            outbox.wake()
+            raise RuntimeError("falha no ecrã")
+
+    async def scenario():
+        task = asyncio.ensure_future(outbox.run(api, on_result))
+        outbox.enqueue("delete_game", {"id": 3})
+        while len(results) < 1:
+            await asyncio.sleep(0)
+        outbox.enqueue("delete_game", {"id": 4})
+        while len(results) < 2:
+            await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+    assert api.calls == [("delete_game", 3), ("delete_game", 4)]
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("toga")
+
+from Team_Tracker_Mobile.screens import ScreenManager
+
+
+def test_screens_are_reused_and_evicted_by_budget():
+    """Cada ecrã é construído uma vez; os escondidos menos usados saem quando passam o orçamento."""
+    built, released = [], []
+    screens = ScreenManager(budget=3)
+
+    def get(name, cost):
+        return screens.get(name, lambda: built.append(name) or name, cost, lambda: released.append(name))
+
+    get("jogadores", 2)
+    screens.hidden("jogadores")
+    get("jogadores", 2)
+    assert built == ["jogadores"]
+
+    # O ecrã visível nunca é descartado, mesmo acima do orçamento
+    screens.hidden("jogadores")
+    get("estatisticas", 3)
+    assert released == []
+
+    screens.hidden("estatisticas")
+    assert released == ["jogadores"]
+    assert "estatisticas" in screens and "jogadores" not in screens
+
+    screens.clear()
+    assert released == ["jogadores", "estatisticas"]
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Orçamento (em milissegundos) para importar Team_Tracker_Mobile.app, sem contar o próprio toga
+IMPORT_BUDGET_MS = 200
+# Módulos pesados que só devem ser importados no primeiro pedido ou na primeira foto
+DEFERRED_MODULES = ("requests", "urllib3", "charset_normalizer", "PIL")
+
+SRC = Path(__file__).parent.parent / "src"
+
+
+def test_app_import_time_within_budget():
+    """Importar a aplicação não carrega o requests nem o Pillow e cabe no orçamento (python -X importtime)."""
+    pytest.importorskip("toga")
+    code = (
+        "import sys, toga, toga.style.pack\n"
+        "import Team_Tracker_Mobile.app\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    # Primeira execução só para compilar os .pyc; mede-se a segunda
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], env=env, check=True, capture_output=True, text=True
+    )
+    assert result.stdout.strip() == ""
+
+    cumulative_us = next(
+        int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.rstrip().endswith("| Team_Tracker_Mobile.app")
+    )
+    assert cumulative_us / 1000 < IMPORT_BUDGET_MS
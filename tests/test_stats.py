@@ -0,0 +1,58 @@
+import math
+
+from Team_Tracker_Mobile.models import Player
+from Team_Tracker_Mobile.stats import Leaderboards, StatsEngine
+from Team_Tracker_Mobile.store import RosterColumns
+
+PLAYERS = [
+    Player(1, "Ana", 7, "Médio", "Sub-16", "FCP", golosMarcados=4, assistencias=1, TTU=360, jogosParticipados=4),
+    Player(2, "Rui", 9, "Avançado", "Sub-16", "FCP", golosMarcados=4, assistencias=3, TTU=180, jogosParticipados=2, CA=1),
+    Player(3, "Zé", 1, "Guarda-Redes", "Sub-16", "SCB", TTU=450, jogosParticipados=5),
+    Player(4, "Leo", 10, "Avançado", "Sub-17", "FCP", golosMarcados=1, TTU=90, jogosParticipados=1),
+]
+
+
+def test_derived_metrics():
+    """As métricas derivadas são calculadas por coluna, sem divisões por zero."""
+    engine = StatsEngine(RosterColumns(PLAYERS))
+    assert list(engine.derived["golos_por_jogo"]) == [1.0, 2.0, 0.0, 1.0]
+    assert engine.derived["minutos_por_golo"][1] == 45.0
+    assert engine.derived["minutos_por_golo"][2] == math.inf
+    assert engine.derived["cartoes_por_jogo"][1] == 0.5
+
+
+def test_multi_key_order_is_cached_and_filtered():
+    """A ordenação por várias chaves é reutilizada e pode ser filtrada por um subconjunto."""
+    engine = StatsEngine(RosterColumns(PLAYERS))
+    keys = ("golosMarcados", "assistencias")
+    assert engine.order(keys) == [1, 0, 3, 2]
+    assert engine.order(keys) is engine.order(keys)
+    assert engine.sorted_rows([0, 2, 3], keys) == [0, 3, 2]
+    # Menos minutos por golo é melhor
+    assert engine.order(("minutos_por_golo",))[0] == 1
+
+
+def test_percentile_within_escalao():
+    """O percentil é calculado dentro de cada escalão."""
+    percentiles = StatsEngine(RosterColumns(PLAYERS)).percentile("golosMarcados")
+    assert percentiles[0] == percentiles[1] == 100.0
+    assert round(percentiles[2]) == 33
+    assert percentiles[3] == 100.0
+
+
+def test_leaderboards_update_incrementally():
+    """As classificações refletem alterações de contadores, de clube e remoções."""
+    boards = Leaderboards(size=2)
+    for player in PLAYERS:
+        boards.update(player)
+    assert boards.top("golosMarcados", "Sub-16", "FCP") == [(1, 4), (2, 4)]
+
+    boards.update(Player(3, "Zé", 1, "Guarda-Redes", "Sub-16", "SCB", golosMarcados=9))
+    assert boards.top("golosMarcados") == [(3, 9), (1, 4)]
+    assert boards.top("golosMarcados", "Todos", "SCB") == [(3, 9)]
+
+    # Mudou de clube: sai das facetas antigas
+    boards.update(Player(3, "Zé", 1, "Guarda-Redes", "Sub-16", "FCP", golosMarcados=9))
+    assert boards.top("golosMarcados", "Todos", "SCB") == []
+    boards.remove(3)
+    assert boards.top("golosMarcados", "Sub-16", "Todos") == [(1, 4), (2, 4)]
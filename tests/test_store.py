@@ -0,0 +1,131 @@
+import asyncio
+import datetime
+import random
+
+from Team_Tracker_Mobile.models import Player
+from Team_Tracker_Mobile.store import GamesIndex, GamesStore, RosterColumns
+
+JOGOS = [
+    {"id": 1, "data": "2025-05-10", "escalao": "Sub-16", "clube": "FCP"},
+    {"id": 2, "data": "2025-05-01", "escalao": "Sub-14", "clube": "SLB"},
+    {"id": 3, "data": "2025-05-20", "escalao": "Sub-16", "clube": "SLB"},
+    {"id": 4, "data": "2025-06-01", "escalao": "Sub-16", "clube": "FCP"},
+]
+
+
+def test_query_uses_facets_in_date_order():
+    """Os filtros devolvem os jogos do balde correspondente, ordenados por data."""
+    index = GamesIndex(JOGOS)
+    assert [j["id"] for j in index.query()] == [2, 1, 3, 4]
+    assert [j["id"] for j in index.query("Sub-16", "Todos")] == [1, 3, 4]
+    assert [j["id"] for j in index.query("Sub-16", "FCP")] == [1, 4]
+    assert index.query("Sub-19", "FCP") == []
+    assert index.clubs() == ["FCP", "SLB"]
+    assert index.clube_counts["FCP"] == 2
+
+
+def test_upcoming_is_inclusive_date_range():
+    """As próximas N semanas incluem hoje e o último dia do intervalo."""
+    index = GamesIndex(JOGOS)
+    today = datetime.date(2025, 5, 10)
+    assert [j["id"] for j in index.upcoming(10, today=today)] == [1, 3]
+    assert [j["id"] for j in index.upcoming(10, "Todos", "SLB", today=today)] == [3]
+
+
+def test_incremental_index_matches_rebuild():
+    """add()/remove() jogo a jogo deixam o índice igual a uma reconstrução completa."""
+    rng = random.Random(7)
+    index = GamesIndex()
+    current = {}
+    for _ in range(500):
+        jogo_id = rng.randrange(40)
+        if jogo_id in current and rng.random() < 0.4:
+            index.remove(jogo_id)
+            del current[jogo_id]
+        else:
+            jogo = {
+                "id": jogo_id, "data": f"2025-0{rng.randrange(1, 10)}-1{rng.randrange(10)}",
+                "escalao": rng.choice(["Sub-14", "Sub-16"]), "clube": rng.choice(["FCP", "SLB", None]),
+            }
+            index.add(jogo)
+            current[jogo_id] = jogo
+
+    rebuilt = GamesIndex(current.values())
+    for key in [("Todos", "Todos"), ("Sub-16", "Todos"), ("Todos", "SLB"), ("Sub-14", "")]:
+        assert [j["data"] for j in index.query(*key)] == [j["data"] for j in rebuilt.query(*key)]
+        assert sorted(j["id"] for j in index.query(*key)) == sorted(j["id"] for j in rebuilt.query(*key))
+    assert index.clube_counts == rebuilt.clube_counts and index.clubs() == rebuilt.clubs()
+    assert index.by_id == rebuilt.by_id
+
+
+def test_roster_columns_select_and_totals():
+    """As colunas filtram por escalão/clube e somam estatísticas sem percorrer objetos Player."""
+    players = [
+        Player(1, "Ana", 7, "Médio", "Sub-16", "FCP", golosMarcados=3, assistencias=1),
+        Player(2, "Rui", 9, "Avançado", "Sub-16", "SCB", golosMarcados=5),
+        Player(3, "Zé", 1, "Guarda-Redes", "Sub-17", "FCP", CA=2),
+    ]
+    columns = RosterColumns(players)
+    rows = columns.select("Todos", "FCP")
+    assert [columns.ids[i] for i in rows] == [1, 3]
+    assert columns.totals(rows)["golosMarcados"] == 3
+    assert columns.totals(columns.select())["golosMarcados"] == 8
+    assert columns.stats["CA"].typecode == "i"
+    assert not hasattr(players[0], "__dict__")
+
+
+def test_local_changes_are_confirmed_or_rolled_back():
+    """Criações trocam o id local pelo do servidor; remoções recusadas repõem o item."""
+    store = GamesStore(api=None)
+    store.put_local(dict(JOGOS[0]))
+    store.put_local({"id": -1, "data": "2025-05-15", "escalao": "Sub-16", "clube": "FCP"}, created=True)
+    store.delete_local(1)
+    assert [j["id"] for j in store.index.query()] == [-1]
+
+    store.confirm_created(-1, {"id": 50, "data": "2025-05-15", "escalao": "Sub-16", "clube": "FCP"})
+    store.rollback_deleted(1)
+    store.settle_local(set(), set())
+    assert [j["id"] for j in store.index.query()] == [1, 50]
+
+    store.put_local({"id": -2, "data": "2025-06-01", "escalao": "Sub-16", "clube": "FCP"}, created=True)
+    store.rollback_created(-2)
+    assert sorted(store.by_id) == [1, 50]
+
+
+class SlowGamesStore(GamesStore):
+    """GamesStore com páginas servidas localmente, uma por ciclo, e registo dos downloads."""
+
+    def __init__(self):
+        super().__init__(api=None)
+        self.downloads = []
+
+    async def _iter_pages(self, escalao, clube):
+        self.downloads.append((escalao, clube))
+        for jogo in JOGOS:
+            await asyncio.sleep(0.01)
+            yield [jogo]
+
+
+def test_get_joins_covering_download_and_cancels_abandoned_one():
+    """Um âmbito contido num download em curso aproveita-o; um download que ninguém espera é cancelado."""
+    async def scenario():
+        store = SlowGamesStore()
+        prefetch = asyncio.ensure_future(store.get())
+        await asyncio.sleep(0)
+        pages = []
+        jogos = await store.get("Sub-16", "FCP", on_page=lambda items: pages.append(len(items)))
+        await prefetch
+        assert store.downloads == [("Todos", "Todos")]
+        assert [j["id"] for j in jogos] == [1, 4] and pages[-1] == 2
+        # Os lotes seguintes ao primeiro são agrupados (NOTIFY_INTERVAL), mas o último chega sempre
+        assert len(pages) < len(JOGOS)
+
+        store.invalidate()
+        prefetch = asyncio.ensure_future(store.get())
+        await asyncio.sleep(0.015)
+        prefetch.cancel()
+        await asyncio.sleep(0.05)
+        assert not store.is_fresh() and len(store.downloads) == 2
+        assert store._pending[("Todos", "Todos")].task.cancelled()
+
+    asyncio.run(scenario())
@@ -0,0 +1,111 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("toga")
+
+from Team_Tracker_Mobile.tables import PagedTableView, TableBinding
+
+
+class FakeSource(list):
+    """ListSource mínimo: linhas com atributos por coluna, inserção/remoção e registo de operações."""
+
+    accessors = ["nome", "golos"]
+
+    def __init__(self, rows, log):
+        super().__init__(SimpleNamespace(**row) for row in rows)
+        self.log = log
+
+    def insert(self, index, data):
+        row = SimpleNamespace(**data)
+        super().insert(index, row)
+        self.log.append(("insert", row.id))
+        return row
+
+    def remove(self, row):
+        super().remove(row)
+        self.log.append(("remove", row.id))
+
+    def notify(self, event, item):
+        self.log.append((event, item.id))
+
+
+class FakeTable:
+    def __init__(self):
+        self.log = []
+        self._data = FakeSource([], self.log)
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, rows):
+        self.log.append(("assign", len(rows)))
+        self._data = FakeSource(rows, self.log)
+
+
+def test_update_applies_reorders_inserts_removals_and_cell_changes():
+    """A tabela fica na ordem pedida, com as células certas, sem reinserir linhas que não mudaram."""
+    rng = random.Random(4)
+    table = FakeTable()
+    binding = TableBinding(table)
+    records = {i: [f"Jogador {i}", i % 5] for i in range(30)}
+    order = list(records)
+    binding.update((i, records[i]) for i in order)
+
+    for _ in range(50):
+        kept = [i for i in order if rng.random() > 0.15]
+        added = rng.sample(range(30, 60), 3)
+        order = kept + [i for i in added if i not in kept]
+        # Algumas linhas trocam de sítio, outras ficam onde estavam
+        for _ in range(3):
+            a, b = rng.randrange(len(order)), rng.randrange(len(order))
+            order[a], order[b] = order[b], order[a]
+        for i in rng.sample(order, 4):
+            records[i] = [f"Jogador {i}", rng.randrange(10)]
+        for i in added:
+            records.setdefault(i, [f"Jogador {i}", 0])
+
+        previous = [row.id for row in table.data]
+        table.log.clear()
+        binding.update((i, records[i]) for i in order)
+
+        assert [row.id for row in table.data] == order
+        assert all([row.nome, row.golos] == records[row.id] for row in table.data)
+        assert set(binding.rows) == set(order)
+        assert ("assign", len(order)) not in table.log
+        # Inserções: as linhas novas e as que ficam fora da maior subsequência já na ordem certa
+        common = [order.index(i) for i in previous if i in order]
+        expected = len(set(order) - set(previous)) + len(common) - longest_increasing_length(common)
+        assert sum(1 for op, _ in table.log if op == "insert") == expected
+
+
+def test_paging_lets_the_owner_refresh_row_references():
+    """Depois de cada desenho (incl. mudar de página) quem guarda linhas volta a obtê-las do binding."""
+    table = FakeTable()
+    binding = TableBinding(table)
+    selected = {"row": None}
+    view = PagedTableView(
+        binding, lambda i: (i, [f"Jogador {i}", 0]), page_size=5, max_pages=2,
+        on_render=lambda: selected.update(row=binding.row_for(3)),
+    )
+    view.set_items(list(range(20)))
+    first = selected["row"]
+    assert first is not None and first.id == 3
+
+    view.show_more()
+    view.show_more()  # a primeira página sai da tabela
+    assert selected["row"] is None and first not in table.data
+
+    view.show_previous()
+    assert selected["row"] in table.data and selected["row"].id == 3
+
+
+def longest_increasing_length(values):
+    """Versão quadrática, para comparar com a de tables.py."""
+    best = []
+    for i, value in enumerate(values):
+        best.append(1 + max((best[j] for j in range(i) if values[j] < value), default=0))
+    return max(best, default=0)
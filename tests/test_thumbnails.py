@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("toga")
+
+from Team_Tracker_Mobile import thumbnails
+from Team_Tracker_Mobile.thumbnails import RETRY_DELAY, ThumbnailCache
+
+
+class StubApi:
+    """Serve 100 bytes por foto; as fotos em `failing` falham uma vez."""
+
+    base_url = "https://exemplo.pt"
+
+    def __init__(self):
+        self.downloads = []
+        self.failing = set()
+
+    async def download(self, url):
+        self.downloads.append(url)
+        if url in self.failing:
+            self.failing.discard(url)
+            raise OSError("sem rede")
+        return b"x" * 100
+
+
+@pytest.fixture(autouse=True)
+def no_imaging(monkeypatch):
+    # Sem aplicação toga nem Pillow: ícones e miniaturas são os próprios dados
+    monkeypatch.setattr(thumbnails.toga, "Icon", lambda path: ("icon", path.name))
+    monkeypatch.setattr(thumbnails, "make_thumbnail", lambda data, size: data)
+
+
+def fetch(cache, *fotos, version=None):
+    for foto in fotos:
+        cache.get(foto, version)
+    return asyncio.gather(*cache._pending.values())
+
+
+def test_memory_and_disk_lru_and_versioned_keys(tmp_path):
+    """Os orçamentos de memória e de disco descartam os menos usados; uma versão nova é outra miniatura."""
+    async def scenario():
+        api = StubApi()
+        cache = ThumbnailCache(api, tmp_path, size=4, memory_budget=200, disk_budget=250)
+        await fetch(cache, "a.png", "b.png")
+        assert cache.get("a.png") is not None and cache.get("b.png") is not None
+        await fetch(cache, "c.png")
+        # Disco: 300 bytes > 250, sai a menos usada (a)
+        assert cache.key("a.png") not in cache._disk
+        assert sorted(p.stem for p in tmp_path.glob("*.png")) == sorted(cache.key(f) for f in ("b.png", "c.png"))
+        cache.get("c.png")
+        # Memória: só cabem duas miniaturas (100 bytes cada)
+        assert list(cache._memory) == [cache.key("b.png"), cache.key("c.png")]
+
+        assert cache.key("b.png", 1) != cache.key("b.png", 2)
+        await fetch(cache, "b.png", version=2)
+        assert api.downloads.count("https://exemplo.pt/b.png") == 2
+
+        # O índice do disco sobrevive ao reinício
+        reopened = ThumbnailCache(api, tmp_path, size=4, disk_budget=250)
+        assert set(reopened._disk) == set(cache._disk)
+
+    asyncio.run(scenario())
+
+
+def test_failed_download_is_retried_after_delay(tmp_path):
+    """Uma foto que falhou não é pedida de novo logo, mas volta a ser passado o tempo de espera."""
+    async def scenario():
+        now = [0.0]
+        api = StubApi()
+        api.failing.add("https://exemplo.pt/a.png")
+        cache = ThumbnailCache(api, tmp_path, clock=lambda: now[0])
+        await fetch(cache, "a.png")
+        assert cache.get("a.png") is None and not cache._pending
+
+        now[0] = RETRY_DELAY
+        await fetch(cache, "a.png")
+        assert cache.get("a.png") is not None
+        assert len(api.downloads) == 2 and not cache._failed
+
+    asyncio.run(scenario())
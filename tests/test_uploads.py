@@ -0,0 +1,36 @@
+import io
+
+import pytest
+
+from Team_Tracker_Mobile.uploads import MultipartBody, prepare_photo
+
+
+def test_multipart_body_streams_in_chunks():
+    """O corpo é lido por blocos, com Content-Length correto e progresso até ao total."""
+    data = bytes(range(256)) * 400
+    progress = []
+    body = MultipartBody("file", "foto.jpg", "image/jpeg", data, lambda sent, total: progress.append(sent))
+    chunks = []
+    while True:
+        chunk = body.read(8192)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    raw = b"".join(chunks)
+    assert len(raw) == len(body)
+    assert data in raw
+    assert raw.endswith(f"--{body.boundary}--\r\n".encode())
+    assert progress[-1] == len(body)
+
+    body.rewind()
+    assert body.read(8192) == chunks[0]
+
+
+def test_prepare_photo_downscales(tmp_path):
+    """Fotos grandes são reduzidas e recodificadas em JPEG antes do upload."""
+    Image = pytest.importorskip("PIL.Image")
+    path = tmp_path / "grande.png"
+    Image.new("RGB", (4000, 3000), "green").save(path)
+    data, filename, content_type = prepare_photo(path, max_side=800)
+    assert content_type == "image/jpeg"
+    assert max(Image.open(io.BytesIO(data)).size) == 800